@@ -1,24 +1,44 @@
 """Lightweight stub of `google.generativeai` for local tests.
 
-This provides `configure(api_key)` and a minimal `GenerativeModel` with a
-`generate_content(prompt)` method that returns an object with a `text`
-attribute containing JSON. It's intentionally simple: for CI/tests we don't
-invoke real Gemini.
+This provides `configure(api_key)` and a minimal `GenerativeModel` whose
+`generate_content` / `generate_content_async` return an object with a `text`
+attribute containing JSON. The signatures mirror the pinned SDK release
+(google-generativeai 0.8.x) and reject unknown keyword arguments, so a call
+the real SDK would refuse fails in tests too. It's intentionally simple: for
+CI/tests we don't invoke real Gemini.
 """
 import json
 
-def configure(api_key=None):
+# Keys the SDK accepts in `request_options` (passed on to the API call)
+REQUEST_OPTIONS = {"timeout", "retry"}
+
+
+def configure(api_key=None, **kwargs):
     # No-op for tests
     return None
 
+
 class GenerativeModel:
-    def __init__(self, model_name="gemini-2.5-pro"):
+    def __init__(self, model_name="gemini-2.5-pro", generation_config=None, safety_settings=None,
+                 tools=None, tool_config=None, system_instruction=None):
         self.model_name = model_name
 
-    def generate_content(self, prompt):
+    def generate_content(self, contents, *, generation_config=None, safety_settings=None, stream=False,
+                         tools=None, tool_config=None, request_options=None):
+        unknown = set(request_options or {}) - REQUEST_OPTIONS
+        if unknown:
+            raise TypeError(f"Unknown request_options: {sorted(unknown)}")
+
         # Return a minimal parseable JSON response with empty matches.
         class Resp:
             def __init__(self, text):
                 self.text = text
         resp_text = json.dumps({"matches": []})
-        return Resp(resp_text)
+        # Streaming responses are iterables of chunks with a `text` attribute
+        return [Resp(resp_text)] if stream else Resp(resp_text)
+
+    async def generate_content_async(self, contents, *, generation_config=None, safety_settings=None,
+                                     stream=False, tools=None, tool_config=None, request_options=None):
+        return self.generate_content(contents, generation_config=generation_config,
+                                     safety_settings=safety_settings, stream=stream, tools=tools,
+                                     tool_config=tool_config, request_options=request_options)
@@ -27,6 +27,7 @@ CREATE TABLE IF NOT EXISTS ai_predictions (
   id SERIAL PRIMARY KEY,
   league_id INTEGER NOT NULL,
   season INTEGER NOT NULL,
+  fixture_id INTEGER,
   home_team VARCHAR(255) NOT NULL,
   away_team VARCHAR(255) NOT NULL,
   prediction_type VARCHAR(100),
@@ -39,9 +40,14 @@ CREATE TABLE IF NOT EXISTS ai_predictions (
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Tables created before predictions carried their fixture
+ALTER TABLE ai_predictions ADD COLUMN IF NOT EXISTS fixture_id INTEGER;
+
 -- Indexes
 CREATE INDEX IF NOT EXISTS idx_ai_predictions_league_season 
   ON ai_predictions(league_id, season);
+CREATE INDEX IF NOT EXISTS idx_ai_predictions_fixture
+  ON ai_predictions(fixture_id);
 CREATE INDEX IF NOT EXISTS idx_ai_predictions_created_at 
   ON ai_predictions(created_at DESC);
 CREATE INDEX IF NOT EXISTS idx_api_cache_v2_expires 
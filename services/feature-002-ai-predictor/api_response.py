@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Conditional, compressed and filtered JSON responses for the data endpoints.
+
+  - Validators: the ETag is derived from the versions (stored_at) of the
+    cache entries / store rows a response was built from, plus the query
+    string, and Last-Modified is the newest of them. A matching
+    If-None-Match / If-Modified-Since gets a 304 before anything is filtered
+    or serialised. Responses built from nothing versioned fall back to a
+    hash of the body.
+  - Compression: brotli (when the `brotli` package is installed) or gzip,
+    negotiated from Accept-Encoding, for bodies above COMPRESS_MIN_BYTES.
+  - Filtering: date window, status and team for fixtures, team for
+    standings, field selection (dotted paths) and limit/offset.
+"""
+import os
+import gzip
+import json
+import hashlib
+from datetime import datetime, timedelta, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Dict, List, Optional
+
+from flask import Response
+
+from projection import project
+from store import fixture_kickoff
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+# Upper bound for ?limit=
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "500"))
+
+
+# === VALIDATORS ===
+
+def entity_tag(versions: Dict[str, float], variant: str) -> Optional[str]:
+    """Weak ETag of a response built from `versions`, for one query (`variant`)."""
+    if not versions:
+        return None
+    digest = hashlib.sha1(json.dumps([sorted(versions.items()), variant]).encode("utf-8")).hexdigest()
+    return f'W/"{digest[:20]}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Weak comparison: W/"x" and "x" match
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    return any(tag.strip().removeprefix("W/") == wanted for tag in header.split(","))
+
+
+def not_modified(request, etag: Optional[str], last_modified: Optional[float]) -> bool:
+    """Whether the client's copy (If-None-Match / If-Modified-Since) is current."""
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None:
+        return etag is not None and _etag_matches(if_none_match, etag)
+    since = request.headers.get("If-Modified-Since")
+    if since and last_modified:
+        try:
+            return int(last_modified) <= parsedate_to_datetime(since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+# === COMPRESSION ===
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Best supported content coding in an Accept-Encoding header (br, then gzip)."""
+    offered = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            offered[name.lower()] = q
+    for coding in (["br"] if BROTLI_AVAILABLE else []) + ["gzip"]:
+        if offered.get(coding, offered.get("*", 0)) > 0:
+            return coding
+    return None
+
+
+def compress(body: bytes, coding: str) -> bytes:
+    if coding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def _dumps(data: Any) -> bytes:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+
+def json_response(request, payload: Any, versions: Optional[Dict[str, float]] = None,
+                  status: int = 200) -> Response:
+    """JSON response with validators, a 304 for current clients and negotiated compression.
+
+    `payload` may be a callable so filtering and serialisation are skipped on a 304.
+    """
+    versions = versions or {}
+    etag = entity_tag(versions, request.full_path)
+    last_modified = max(versions.values()) if versions else None
+    body = None
+    if etag is None and status == 200:
+        # Nothing versioned behind it: validate on the body itself
+        body = _dumps(payload() if callable(payload) else payload)
+        etag = f'W/"{hashlib.sha1(body).hexdigest()[:20]}"'
+    if status == 200 and not_modified(request, etag, last_modified):
+        response = Response(status=304)
+    else:
+        if body is None:
+            body = _dumps(payload() if callable(payload) else payload)
+        response = Response(body, status=status, mimetype="application/json")
+        coding = negotiate_encoding(request.headers.get("Accept-Encoding", "")) \
+            if len(body) >= COMPRESS_MIN_BYTES else None
+        if coding:
+            response.set_data(compress(body, coding))
+            response.headers["Content-Encoding"] = coding
+    response.headers["Vary"] = "Accept-Encoding"
+    # Clients may keep the body but must revalidate before reusing it
+    response.headers["Cache-Control"] = "no-cache"
+    if etag and status in (200, 304):
+        response.headers["ETag"] = etag
+    if last_modified:
+        response.headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+    return response
+
+
+# === FILTERING ===
+
+def field_schema(fields: str) -> Dict[str, Any]:
+    """Projection schema for comma-separated dotted paths ("fixture.id,teams,goals")."""
+    schema: Dict[str, Any] = {}
+    for path in filter(None, (f.strip() for f in fields.split(","))):
+        node = schema
+        *parents, leaf = path.split(".")
+        for part in parents:
+            child = node.get(part)
+            if child is True:
+                break
+            node = node.setdefault(part, {})
+        else:
+            node[leaf] = True
+    return schema
+
+
+def _day(value: str, end: bool = False) -> float:
+    """Start of a YYYY-MM-DD day (UTC), or of the next day for an inclusive end."""
+    day = datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    return (day + timedelta(days=1) if end else day).timestamp()
+
+
+def window_args(args) -> Dict[str, Optional[float]]:
+    """?from= / ?to= (inclusive YYYY-MM-DD days) as kickoff bounds; ValueError if malformed."""
+    start, end = args.get("from"), args.get("to")
+    return {"start": _day(start) if start else None, "end": _day(end, end=True) if end else None}
+
+
+def page_args(args) -> Dict[str, int]:
+    limit = args.get("limit", type=int)
+    offset = max(0, args.get("offset", default=0, type=int) or 0)
+    return {"limit": min(limit, MAX_PAGE_SIZE) if limit is not None else None, "offset": offset}
+
+
+def paginate(items: List[Any], limit: Optional[int], offset: int) -> List[Any]:
+    return items[offset:] if limit is None else items[offset:offset + max(0, limit)]
+
+
+def select(items: List[Any], fields: Optional[str]) -> List[Any]:
+    if not fields:
+        return items
+    schema = field_schema(fields)
+    return [project(item, schema) for item in items]
+
+
+def fixture_filters(args) -> Dict[str, Any]:
+    """?from=&to=&status=&team= (status and team take comma-separated lists); ValueError if malformed."""
+    filters: Dict[str, Any] = window_args(args)
+    filters["statuses"] = {s.strip().upper() for s in args.get("status", "").split(",") if s.strip()}
+    filters["teams"] = {int(t) for t in args.get("team", "").split(",") if t.strip()}
+    return filters
+
+
+def filter_fixtures(fixtures: List[Dict[str, Any]], filters: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Fixtures matching parsed `fixture_filters`."""
+    start, end = filters.get("start"), filters.get("end")
+    statuses, teams = filters.get("statuses"), filters.get("teams")
+    out = []
+    for f in fixtures:
+        if start is not None or end is not None:
+            kickoff = fixture_kickoff(f)
+            if kickoff is None or (start is not None and kickoff < start) or (end is not None and kickoff >= end):
+                continue
+        if statuses and f.get("fixture", {}).get("status", {}).get("short") not in statuses:
+            continue
+        if teams and not teams & {f.get("teams", {}).get(side, {}).get("id") for side in ("home", "away")}:
+            continue
+        out.append(f)
+    return out
+
+
+def filtered_envelope(payload: Dict[str, Any], items: List[Any], args) -> Dict[str, Any]:
+    """The envelope with `items` paged and projected as its response (`total` = matches before paging)."""
+    page = page_args(args)
+    response = select(paginate(items, page["limit"], page["offset"]), args.get("fields"))
+    return dict(payload, response=response, results=len(response), total=len(items),
+                offset=page["offset"], limit=page["limit"])
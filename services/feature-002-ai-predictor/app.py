@@ -6,42 +6,60 @@ Uses Gemini 2.5 Pro for match analysis with RapidAPI data
 import os
 import sys
 import json
+import time
+import hashlib
+import asyncio
 import logging
-from datetime import datetime, timedelta
+import importlib.util
+from datetime import datetime
 from dotenv import load_dotenv
-from flask import Flask, render_template, request, jsonify
+from flask import Blueprint, Flask, Response, render_template, request, jsonify, stream_with_context
 
 # Ensure repository root is on sys.path so local stubs (e.g., `google`) import
 repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 if repo_root not in sys.path:
     sys.path.insert(0, repo_root)
 
-# AI & Storage imports
-import google.generativeai as genai
-try:
-    import redis
-    REDIS_AVAILABLE = True
-except ImportError:
-    REDIS_AVAILABLE = False
-
-try:
-    from supabase import create_client
-    SUPABASE_AVAILABLE = True
-except ImportError:
-    SUPABASE_AVAILABLE = False
+# AI & Storage SDKs are imported when their client is first built (see clients.py)
+REDIS_AVAILABLE = importlib.util.find_spec("redis") is not None
+SUPABASE_AVAILABLE = importlib.util.find_spec("supabase") is not None
 
 from main import EFootballFetcher
+from async_fetcher import AsyncEFootballFetcher
+from fanout import fan_out, afan_out
+from singleflight import RedisLock
+from prefetch import Prefetcher, PREFETCH_LOCK_TTL
+from store import FixtureStore, upcoming_fixtures
+from fixture_sync import FixtureSync
+from key_pool import KeyPool, KeyPoolExhausted
+from circuit import breaker_for, circuit_states, CircuitOpenError
+from predictions import (fixture_prediction_key, latest_prediction_key, fixture_inputs, standings_rows,
+                         assign_matches, is_cacheable_match, MatchAssigner, PROMPT_PLAYERS_PER_TEAM)
+from projection import project, Each, STANDINGS_ROW, key_players
+from model_output import MatchStreamParser
+from prompt_engine import PromptEngine
+from write_behind import WriteBehind
+from cache import (TieredCache, MemoryTier, RedisTier, SupabaseTier, ttl_for,
+                   start_age_tracking, tracked_age, record_version, record_age, run_io)
+from api_response import json_response, fixture_filters, filter_fixtures, filtered_envelope
+from clients import LazyClient, client_states, warm
 
 # === INIT ===
 load_dotenv()
 # Use an absolute template folder path (resolve relative to this file)
 TEMPLATE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'templates'))
-app = Flask(__name__, template_folder=TEMPLATE_DIR)
 logging.basicConfig(level=logging.INFO)
 
 # Prompt version control
 PROMPT_VERSION = os.getenv("PROMPT_VERSION", "v2")
 DEMO_MODE = os.getenv("DEMO_MODE", "0") == "1"
+# Templates are compiled once; a changed PROMPT_VERSION is picked up on the next request
+prompt_engine = PromptEngine(default_version=PROMPT_VERSION)
+
+# Context gathering (standings, team stats, players) fan-out limits
+CONTEXT_MAX_TEAMS = int(os.getenv("CONTEXT_MAX_TEAMS", "8"))
+CONTEXT_MAX_WORKERS = int(os.getenv("CONTEXT_MAX_WORKERS", "8"))
+CONTEXT_DEADLINE = float(os.getenv("CONTEXT_DEADLINE", "12"))
 
 
 # === CONFIG ===
@@ -52,132 +70,332 @@ RAPIDAPI_KEYS = [
 ]
 RAPIDAPI_KEYS = [k for k in RAPIDAPI_KEYS if k]
 
-genai.configure(api_key=os.getenv("GOOGLE_AI_API_KEY", ""))
-model = genai.GenerativeModel('gemini-2.5-pro')
+MODEL_NAME = 'gemini-2.5-pro'
+# Upper bound for a model call; the breaker lowers it from observed latency
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "90"))
+
+# External clients are built on first use, not at import (faster cold starts)
+def _gemini_model():
+    import google.generativeai as genai
+    genai.configure(api_key=os.getenv("GOOGLE_AI_API_KEY", ""))
+    return genai.GenerativeModel(MODEL_NAME)
+
+model = LazyClient(_gemini_model, "gemini", required=not DEMO_MODE)
 
 # Redis cache (optional)
-r = None
-if REDIS_AVAILABLE:
+def _redis_client():
+    if not REDIS_AVAILABLE:
+        return None
+    import redis
+    return redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379"))
+
+r = LazyClient(_redis_client, "redis")
+
+# Supabase backup (optional)
+def _supabase_client():
+    if not SUPABASE_AVAILABLE:
+        return None
+    from supabase import create_client
+    return create_client(
+        os.getenv("SUPABASE_URL", ""),
+        os.getenv("SUPABASE_KEY", "")
+    )
+
+supabase = LazyClient(_supabase_client, "supabase")
+
+# ai_predictions rows are written in bulk by a background writer, spilling
+# to a local file while Supabase is unreachable
+prediction_writer = WriteBehind(
+    lambda rows: supabase.table('ai_predictions').insert(rows).execute(), name="ai_predictions").register_atexit()
+
+# Leagues offered in the UI (/api/leagues) and kept warm by the prefetcher
+LEAGUES = [
+    {"id": 39, "name": "Premier League (England)"},
+    {"id": 140, "name": "La Liga (Spain)"},
+    {"id": 135, "name": "Serie A (Italy)"},
+    {"id": 78, "name": "Bundesliga (Germany)"},
+    {"id": 61, "name": "Ligue 1 (France)"},
+]
+
+# === API KEY POOL ===
+# Per-key minute/day token buckets shared across workers via Redis.
+# The key pool, cache tiers and locks hold the LazyClients themselves rather
+# than what they resolved to at build time, so every call goes through the
+# proxy and a Redis/Supabase client that failed at first use is picked up
+# once its retry succeeds.
+key_pool = LazyClient(lambda: KeyPool(RAPIDAPI_KEYS, redis_client=r if REDIS_AVAILABLE else None),
+                      "key_pool", required=True)
+
+# === FETCH + CACHE ===
+# Read-through cache shared by every fetcher endpoint
+# (in-process LRU first, then Redis, Supabase as backup)
+L1_CACHE_MAX_BYTES = int(os.getenv("L1_CACHE_MAX_MB", "64")) * 1024 * 1024
+L1_CACHE_MAX_TTL = int(os.getenv("L1_CACHE_MAX_TTL", "300"))
+def _response_cache():
+    return TieredCache([
+        MemoryTier(max_bytes=L1_CACHE_MAX_BYTES, max_ttl=L1_CACHE_MAX_TTL),
+        RedisTier(r) if REDIS_AVAILABLE else None,
+        SupabaseTier(supabase) if SUPABASE_AVAILABLE else None,
+    ], lock=RedisLock(r) if REDIS_AVAILABLE and os.getenv("SINGLEFLIGHT_REDIS_LOCK", "0") == "1" else None)
+
+response_cache = LazyClient(_response_cache, "response_cache", required=True)
+
+# Everything /api/ready builds and reports on
+CLIENTS = {"gemini": model, "redis": r, "supabase": supabase, "key_pool": key_pool, "response_cache": response_cache}
+
+def make_fetcher(api_key=None):
+    """Create a fetcher wired to the shared response cache and key pool.
+
+    Passing `api_key` pins that key and bypasses the pool.
+    """
+    return EFootballFetcher(api_key, cache=response_cache, key_pool=None if api_key else key_pool.resolve())
+
+# Fixtures live in a local per-fixture store, delta-synced from RapidAPI
+# (FIXTURE_SYNC=0 falls back to caching the whole season as one response)
+FIXTURE_SYNC = os.getenv("FIXTURE_SYNC", "1") == "1"
+# How many upcoming fixtures a prediction covers
+PREDICT_MAX_FIXTURES = int(os.getenv("PREDICT_MAX_FIXTURES", "10"))
+fixture_store = FixtureStore()
+fixture_sync = FixtureSync(fixture_store, lambda: EFootballFetcher(key_pool=key_pool.resolve()))
+
+# Prediction mode: "llm" (Gemini), "stats" (Poisson model only, no model call)
+# or "prior" (Gemini, given the Poisson probabilities as a baseline)
+PREDICT_MODES = ("llm", "stats", "prior")
+PREDICT_MODE = os.getenv("PREDICT_MODE", "llm")
+# Serve Poisson predictions for fixtures the model could not cover (no stale entry either)
+GOAL_MODEL_FALLBACK = os.getenv("GOAL_MODEL_FALLBACK", "1") == "1"
+
+def get_fixtures(league=39, season=2025, upcoming=False):
+    """Fixtures for a league/season: the delta-synced store, or the cached season response.
+
+    `upcoming` is for predictions: from the store it reads only the next
+    PREDICT_MAX_FIXTURES unfinished fixtures (an indexed query) rather than the
+    whole season; the season response is returned whole either way.
+    """
+    if FIXTURE_SYNC:
+        return _synced_fixtures(league, season, limit=PREDICT_MAX_FIXTURES if upcoming else None)
+    return season_fixtures(league, season)
+
+def season_fixtures(league, season):
+    """The whole season's fixtures through the response cache."""
     try:
-        r = redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379"))
+        fetched_data = make_fetcher().fetch_fixtures(league, season)
+        logging.info(f"Fetched {len(fetched_data.get('response', []))} fixtures")
+        return fetched_data
+    except KeyPoolExhausted as e:
+        logging.error(f"Fixtures fetch failed: {e}")
+        return {"response": [], "errors": "All API keys exhausted"}
     except Exception as e:
-        logging.warning(f"Redis connection failed: {e}")
+        logging.error(f"Fixtures fetch failed: {e}")
+        return {"response": [], "errors": str(e)}
 
-# Supabase backup (optional)
-supabase = None
-if SUPABASE_AVAILABLE:
+def _synced_fixtures(league, season, start=None, end=None, limit=None):
+    """Stored fixtures of a league, kept current by a background sync.
+
+    `start`/`end` (kickoff timestamps) narrow it to a window; `limit` instead
+    returns only the next `limit` unfinished fixtures. Only a league that was
+    never synced waits for its first sync; after that a due sync runs in the
+    background and the response reports the store's sync age (X-Data-Age /
+    X-Data-Stale).
+    """
+    error = None
+    now = time.time()
     try:
-        supabase = create_client(
-            os.getenv("SUPABASE_URL", ""),
-            os.getenv("SUPABASE_KEY", "")
-        )
+        if fixture_sync.age(league, season, now) is None:
+            fixture_sync.sync(league, season, now)
+        else:
+            fixture_sync.sync_in_background(league, season, now)
+    except KeyPoolExhausted as e:
+        logging.error(f"Fixture sync failed: {e}")
+        error = "All API keys exhausted"
     except Exception as e:
-        logging.warning(f"Supabase connection failed: {e}")
+        logging.error(f"Fixture sync failed: {e}")
+        error = str(e)
+    age = fixture_sync.age(league, season, now)
+    if age is not None:
+        record_age(max(age, 0.0), fixture_sync.due(league, season, now) is not None)
+    if limit is None:
+        fixtures = fixture_store.fixtures(league, season, start, end)
+    else:
+        fixtures = fixture_store.next_fixtures(league, season, limit, now)
+    record_version(f"store:fixtures:{league}:{season}", fixture_store.last_modified(league, season))
+    if not fixtures and error:
+        return {"response": [], "errors": error}
+    return {"response": fixtures, "errors": []}
 
-# === RATE LIMIT (with Redis fallback) ===
-current_key_index = 0
+# === CONTEXT ===
+def stored_standings(league, season):
+    """Last known table from the local store, in the RapidAPI response shape."""
+    rows = fixture_store.standings(league, season)
+    return [{"league": {"id": league, "season": season, "standings": [rows]}}] if rows else []
 
-def check_limit(key_prefix):
-    """Check and update rate limit using Redis."""
-    if not r:
-        return True  # No limit without Redis
-    
-    today = datetime.now().strftime("%Y-%m-%d")
-    key = f"{key_prefix}:{today}"
+def gather_additional_context(fixtures_list, league=39, season=2025):
+    """Fetch standings, team stats and players for fixture teams concurrently.
+
+    All upstream calls are fanned out on a bounded pool with a total deadline,
+    so latency is roughly the slowest call rather than the sum. Calls that fail
+    or miss the deadline degrade to empty context for that entry.
+    """
     try:
-        count = r.incr(key)
-        if count == 1:
-            r.expire(key, 86400)
-        if count > 900:  # 1000 limit
-            logging.warning(f"Rate limit near: {count}/{key_prefix}")
-            return False
-        return True
+        fetcher = make_fetcher()
     except Exception as e:
-        logging.warning(f"Rate limit check failed: {e}")
-        return True
+        logging.warning(f"Gathering context failed: {e}")
+        return {}, {}, []
 
-def rotate_api_key():
-    """Rotate to next API key."""
-    global current_key_index
-    current_key_index = (current_key_index + 1) % len(RAPIDAPI_KEYS)
-    return RAPIDAPI_KEYS[current_key_index]
+    team_ids = context_team_ids(fixtures_list)
+    calls = context_calls(fetcher, team_ids, league, season)
+    outcome = fan_out(calls, max_workers=CONTEXT_MAX_WORKERS, deadline=CONTEXT_DEADLINE)
+    return collect_context(outcome, len(calls), team_ids, league, season)
 
-# === FETCH + CACHE ===
-def get_fixtures(league=39, season=2025):
-    """Fetch fixtures with cache fallback."""
-    cache_key = f"fixtures:{league}:{season}"
-    
-    # Try Redis cache first
-    if r:
-        try:
-            cached = r.get(cache_key)
-            if cached:
-                logging.info(f"Cache hit: {cache_key}")
-                return json.loads(cached)
-        except Exception as e:
-            logging.warning(f"Redis cache miss: {e}")
-    
-    # Try Supabase cache
-    if supabase:
+def context_team_ids(fixtures_list):
+    """Teams of the fixtures (first CONTEXT_MAX_TEAMS) to fetch stats and players for."""
+    team_ids = []
+    for fx in fixtures_list:
         try:
-            result = supabase.table('api_cache').select('value').eq('key', cache_key).execute()
-            if result.data:
-                logging.info(f"Supabase cache hit: {cache_key}")
-                return result.data[0]['value']
-        except Exception as e:
-            logging.warning(f"Supabase cache miss: {e}")
-    
-    # Fetch from RapidAPI with key rotation
-    fetched_data = None
-    for attempt in range(len(RAPIDAPI_KEYS)):
-        api_key = RAPIDAPI_KEYS[current_key_index]
-        
-        if not check_limit(f"rapidapi_key_{current_key_index}"):
-            rotate_api_key()
+            for side in ('home', 'away'):
+                tid = fx.get('teams', {}).get(side, {}).get('id')
+                if tid and tid not in team_ids:
+                    team_ids.append(tid)
+        except Exception:
             continue
-        
-        try:
-            fetcher = EFootballFetcher(api_key)
-            fetched_data = fetcher.fetch_fixtures(league, season)
-            logging.info(f"Fetched {len(fetched_data.get('response', []))} fixtures from RapidAPI")
-            
-            # Cache in Redis
-            if r:
-                try:
-                    r.setex(cache_key, 3600, json.dumps(fetched_data))
-                except Exception as e:
-                    logging.warning(f"Redis cache set failed: {e}")
-            
-            # Cache in Supabase
-            if supabase:
-                try:
-                    supabase.table('api_cache').upsert({
-                        "key": cache_key,
-                        "value": fetched_data,
-                        "expires_at": (datetime.now() + timedelta(hours=1)).isoformat()
-                    }).execute()
-                except Exception as e:
-                    logging.warning(f"Supabase cache set failed: {e}")
-            
-            return fetched_data
-        
-        except Exception as e:
-            logging.error(f"Fetch failed with key {current_key_index}: {e}")
-            rotate_api_key()
-    
-    # Return empty if all attempts failed
-    return {"response": [], "errors": "All API keys exhausted"}
+    return team_ids[:CONTEXT_MAX_TEAMS]
+
+def context_calls(fetcher, team_ids, league, season):
+    """Context fetches keyed for the fan-out (coroutine functions with the async fetcher)."""
+    calls = {('standings', None): lambda: fetcher.fetch_standings(league=league, season=season)}
+    for tid in team_ids:
+        calls[('stats', tid)] = lambda tid=tid: fetcher.fetch_team_stats(team=tid, season=season)
+        calls[('players', tid)] = lambda tid=tid: fetcher.fetch_players(team=tid, season=season)
+    return calls
+
+def collect_context(outcome, total, team_ids, league, season):
+    """(team_stats, players_status, standings) from a context fan-out; failed calls give empty entries."""
+    team_stats = {}
+    players_status = {}
+    for key, exc in outcome.errors.items():
+        logging.warning(f"Context fetch {key} failed: {exc}")
+
+    standings_resp = outcome.get(('standings', None))
+    standings = standings_resp.get('response', []) if standings_resp else []
+    if standings:
+        fixture_store.upsert_standings(league, season, standings)
+    else:
+        standings = stored_standings(league, season)
+    for tid in team_ids:
+        stats = outcome.get(('stats', tid))
+        team_stats[tid] = stats.get('response', {}) if stats else {}
+        players = outcome.get(('players', tid))
+        players_status[tid] = players.get('response', []) if players else []
+    logging.info(f"Context gathered in {outcome.elapsed:.2f}s ({len(outcome.results)}/{total} calls ok)")
+    return team_stats, players_status, standings
 
 # === AI PREDICT ===
-def ai_predict(fixtures_data, query="over 2.5"):
-    """Analyze fixtures with Gemini."""
-    # Allow running with stubbed google.generativeai in test/dev environments
-    
-    fixtures = fixtures_data.get("response", [])[:10]
-    
-    if not fixtures:
-        return {"matches": [], "error": "No fixtures available"}
-    
+def prompt_version():
+    """Prompt version in effect (PROMPT_VERSION is re-read so a change hot-reloads the template)."""
+    return prompt_engine.version
+
+def prompt_sections(fixture_summary, team_stats, players_status, standings):
+    """Prompt sections for `fixture_summary`: its teams' slice of the context."""
+    team_ids = [t for fx in fixture_summary for t in (fx.get("home_id"), fx.get("away_id")) if t is not None]
+    return {
+        "fixtures_json": fixture_summary,
+        "team_stats_json": {k: team_stats[k] for k in team_ids if k in team_stats},
+        "players_status_json": {k: key_players(players_status[k], PROMPT_PLAYERS_PER_TEAM)
+                                for k in team_ids if k in players_status},
+        "standings_json": project(standings_rows(standings, team_ids), Each(STANDINGS_ROW)),
+    }
+
+def build_prompt(fixture_summary, team_stats, players_status, standings, query):
+    """Render the model prompt for `fixture_summary` and its teams' context.
+
+    Returns a RenderedPrompt (text plus size stats), trimmed to PROMPT_TOKEN_BUDGET.
+    """
+    sections = prompt_sections(fixture_summary, team_stats, players_status, standings)
+    prompt = prompt_engine.render(sections, query)
+    logging.info(f"Prompt {prompt.version}: {len(prompt.text)} chars, ~{prompt.tokens} tokens"
+                 + (f", trimmed {prompt.trimmed}" if prompt.trimmed else ""))
+    return prompt
+
+def placeholder_match(fixture, text=""):
+    """Shown when the model answered but its output could not be parsed."""
+    return {
+        "fixture_id": fixture["id"],
+        "home": fixture["home"],
+        "away": fixture["away"],
+        "prediction": "ANALYZING",
+        "probability": 0,
+        "reasoning": "AI analysis in progress",
+        "tweet": text[:140]
+    }
+
+def generate_predictions(fixture_summary, team_stats, players_status, standings, query):
+    """Run one model call for `fixture_summary`.
+
+    Returns (matches keyed by fixture id, error message or None, prompt stats).
+    """
+    prompt = build_prompt(fixture_summary, team_stats, players_status, standings, query)
+    return (*_generate(fixture_summary, prompt.text), prompt.stats())
+
+def _generate(fixture_summary, prompt):
+    try:
+        response = breaker_for("gemini:generate").call(
+            lambda timeout: model.generate_content(prompt, request_options={"timeout": timeout}),
+            GEMINI_TIMEOUT)
+        return parse_model_output(fixture_summary, response.text), None
+    except Exception as e:
+        logging.error(f"AI prediction failed: {e}")
+        return {}, str(e)
+
+def parse_model_output(fixture_summary, text):
+    """Matches keyed by fixture id from a model answer, keeping every well-formed one.
+
+    Truncated/unparseable output gets placeholders (not cached) for the fixtures
+    it did not cover, so only those are retried on the next request.
+    """
+    parser = MatchStreamParser()
+    assigned = assign_matches(fixture_summary, parser.feed(text) + parser.finish())
+    if parser.done:
+        return assigned
+    logging.warning(f"Model output incomplete: {len(assigned)}/{len(fixture_summary)} fixtures parsed")
+    return {f["id"]: assigned.get(f["id"]) or placeholder_match(f, text) for f in fixture_summary}
+
+def stream_predictions(fixture_summary, prompt):
+    """Stream one model call for a rendered `prompt`, yielding each match as soon as it is parsed.
+
+    The whole stream counts as one call of the `gemini:stream` breaker.
+    """
+    parser = MatchStreamParser()
+    assigner = MatchAssigner(fixture_summary)
+    breaker = breaker_for("gemini:stream")
+    if not breaker.allow():
+        raise CircuitOpenError(f"Circuit {breaker.name} is open")
+    start = time.monotonic()
+    try:
+        chunks = model.generate_content(prompt.text, stream=True,
+                                        request_options={"timeout": breaker.timeout(GEMINI_TIMEOUT)})
+        for chunk in chunks:
+            for match in parser.feed(getattr(chunk, "text", "") or ""):
+                placed = assigner.assign(match)
+                if placed:
+                    yield placed
+    except GeneratorExit:
+        breaker.cancel()
+        raise
+    except Exception:
+        breaker.record_failure()
+        raise
+    breaker.record_success(time.monotonic() - start)
+    for match in parser.finish():
+        placed = assigner.assign(match)
+        if placed:
+            yield placed
+    if not parser.done:
+        for f in fixture_summary:
+            if f["id"] not in assigner.assigned:
+                yield placeholder_match(f, parser.text)
+
+def summarize_fixtures(fixtures):
+    """Reduce raw RapidAPI fixtures to what the prompt and cache keys need."""
     fixture_summary = []
     for f in fixtures:
         try:
@@ -187,116 +405,522 @@ def ai_predict(fixtures_data, query="over 2.5"):
                 "id": f.get("fixture", {}).get("id"),
                 "home": h.get("name", "Unknown"),
                 "away": a.get("name", "Unknown"),
+                "home_id": h.get("id"),
+                "away_id": a.get("id"),
                 "date": f.get("fixture", {}).get("date", ""),
                 "status": f.get("fixture", {}).get("status", {}).get("short", "")
             })
         except Exception as e:
             logging.warning(f"Parse fixture error: {e}")
-    
-    # Gather additional context (standings, team stats, player availability)
-    def gather_additional_context(fixtures_list, league=39, season=2025):
-        team_stats = {}
-        players_status = {}
-        standings = []
-        try:
-            fetcher = EFootballFetcher(RAPIDAPI_KEYS[0] if RAPIDAPI_KEYS else None)
-            # Standings
-            try:
-                standings_resp = fetcher.fetch_standings(league=league, season=season)
-                standings = standings_resp.get('response', [])
-            except Exception:
-                standings = []
-
-            # For each team in fixtures, try to get team stats and players (limited)
-            team_ids = set()
-            for fx in fixtures_list:
-                try:
-                    h_id = fx.get('teams', {}).get('home', {}).get('id')
-                    a_id = fx.get('teams', {}).get('away', {}).get('id')
-                    if h_id: team_ids.add(h_id)
-                    if a_id: team_ids.add(a_id)
-                except Exception:
-                    continue
-
-            for tid in list(team_ids)[:8]:
-                try:
-                    stats = fetcher.fetch_team_stats(team=tid, season=season)
-                    team_stats[tid] = stats.get('response', {})
-                except Exception:
-                    team_stats[tid] = {}
-                try:
-                    players = fetcher.fetch_players(team=tid, season=season)
-                    players_status[tid] = players.get('response', [])
-                except Exception:
-                    players_status[tid] = []
-        except Exception as e:
-            logging.warning(f"Gathering context failed: {e}")
-        return team_stats, players_status, standings
+    return fixture_summary
+
+def lookup_cached_predictions(fixture_summary, team_stats, players_status, standings, query):
+    """Look up each fixture's prediction under a hash of its current inputs.
+
+    Returns (cache key per fixture id, cached matches per fixture id).
+    """
+    ttl = ttl_for("predictions")
+    keys, cached = {}, {}
+    for fx in fixture_summary:
+        if fx["id"] is None:
+            continue
+        inputs = fixture_inputs(fx, team_stats, players_status, standings, query)
+        keys[fx["id"]] = fixture_prediction_key(fx["id"], inputs, prompt_version(), MODEL_NAME)
+        hit = response_cache.get(keys[fx["id"]], ttl)
+        if hit is not None:
+            cached[fx["id"]] = hit
+    return keys, cached
 
-    team_stats, players_status, standings = gather_additional_context(fixtures, league=39, season=2025)
+def store_prediction(keys, match):
+    """Cache a freshly generated match under its fixture's key (and as its latest)."""
+    fid = match.get("fixture_id")
+    if fid in keys and is_cacheable_match(match):
+        response_cache.set(keys[fid], match, ttl_for("predictions"))
+        response_cache.set(latest_prediction_key(fid, prompt_version()), match, ttl_for("predictions"))
 
-    # Load prompt template based on PROMPT_VERSION
-    prompt_template = None
+def stale_predictions(fixture_summary):
+    """Last known prediction per fixture, for when the model is unavailable."""
+    stale = {}
+    for fx in fixture_summary:
+        entry = response_cache.lookup(latest_prediction_key(fx["id"], prompt_version()), count=False)
+        if entry is not None and entry.age < response_cache.max_stale:
+            stale[fx["id"]] = dict(entry.value, stale=True)
+    return stale
+
+def fit_goal_model(fixtures_data, league, season, standings=None, team_stats=None):
+    """Poisson model of a league from finished fixtures (fetched and stored) and the standings."""
+    # goal_model pulls in numpy: imported on the first fit, not with the app
+    from goal_model import GoalModel
+    results = {f.get("fixture", {}).get("id"): f for f in fixture_store.fixtures(league, season)}
+    results.update((f.get("fixture", {}).get("id"), f) for f in fixtures_data.get("response", []))
+    if standings is None:
+        standings = stored_standings(league, season)
+    return GoalModel().fit(results.values(), standings, team_stats)
+
+def goal_model_context(fixtures_list, league, season):
+    """(standings, team_stats) for fitting the goal model, through the cached fetcher.
+
+    The context fan-out without players: on a cold process the store has no
+    standings yet, and the season cache usually answers these without a request.
+    """
     try:
-        if PROMPT_VERSION == 'v1':
-            with open(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'prompts', 'prompt_v1_over_under.md'), 'r', encoding='utf-8') as f:
-                prompt_template = f.read()
+        fetcher = make_fetcher()
+    except Exception as e:
+        logging.warning(f"Goal model context failed: {e}")
+        return [], {}
+    team_ids = context_team_ids(fixtures_list)
+    calls = {key: call for key, call in context_calls(fetcher, team_ids, league, season).items()
+             if key[0] != 'players'}
+    outcome = fan_out(calls, max_workers=CONTEXT_MAX_WORKERS, deadline=CONTEXT_DEADLINE)
+    team_stats, _, standings = collect_context(outcome, len(calls), team_ids, league, season)
+    return standings, team_stats
+
+def stats_predict(fixtures_data, query="over 2.5", league=39, season=2025):
+    """Predict upcoming fixtures with the Poisson model alone (no model calls).
+
+    The model is fitted from the store; when that leaves fixture teams without
+    data (a cold process) the standings and team stats are fetched through the
+    cache and the model refitted. With no data at all it fails rather than
+    pricing every fixture at the league-average constants, and teams still
+    without data are listed in `unrated_teams`.
+    """
+    start = time.perf_counter()
+    fixtures = upcoming_fixtures(fixtures_data.get("response", []), PREDICT_MAX_FIXTURES)
+    fixture_summary = summarize_fixtures(fixtures)
+    if not fixture_summary:
+        return {"matches": [], "error": "No fixtures available"}
+    team_ids = [t for fx in fixture_summary for t in (fx.get("home_id"), fx.get("away_id")) if t is not None]
+    goal_model = fit_goal_model(fixtures_data, league, season)
+    if goal_model.unrated(team_ids):
+        standings, team_stats = goal_model_context(fixtures, league, season)
+        if standings or any(team_stats.values()):
+            goal_model = fit_goal_model(fixtures_data, league, season, standings or None, team_stats)
+    if not goal_model.games:
+        return {"matches": [], "error": "No standings or results to fit the goal model"}
+    predicted = goal_model.predict(fixture_summary, query)
+    elapsed = (time.perf_counter() - start) * 1000
+    logging.info(f"Poisson predictions for {len(predicted)} fixtures in {elapsed:.1f}ms")
+    out = {"matches": [predicted[fx["id"]] for fx in fixture_summary], "mode": "stats",
+           "elapsed_ms": round(elapsed, 2)}
+    unrated = goal_model.unrated(team_ids)
+    if unrated:
+        out["unrated_teams"] = unrated
+    return out
+
+def ai_predict(fixtures_data, query="over 2.5", league=39, season=2025, mode="llm", persist=False):
+    """Analyze fixtures with Gemini, caching one prediction per fixture.
+
+    Only fixtures with no cached prediction for their current inputs go to
+    the model; the rest come from cache and are merged back in fixture order.
+    In "prior" mode each fixture carries the Poisson model's probabilities as
+    a baseline for the model; in any mode those fill in for fixtures the model
+    could not cover. With `persist` the predictions are queued for Supabase.
+    """
+    if mode == "stats":
+        return stats_predict(fixtures_data, query, league=league, season=season)
+    plan = plan_prediction(fixtures_data, query, league, season, mode)
+    if "error" in plan:
+        return {"matches": [], "error": plan["error"]}
+    fresh, error, prompt_stats = run_model_call([plan])
+    return finish_prediction(plan, fresh, error, prompt_stats, persist)
+
+def prediction_fixtures(fixtures_data):
+    """The upcoming fixtures a prediction covers."""
+    return upcoming_fixtures(fixtures_data.get("response", []), PREDICT_MAX_FIXTURES)
+
+def plan_prediction(fixtures_data, query, league, season, mode="llm", context=None):
+    """Everything up to the model call: fixtures, context, cache lookups and what is left to predict.
+
+    `context` (team_stats, players_status, standings) skips gathering it here.
+    """
+    fixtures = prediction_fixtures(fixtures_data)
+    if not fixtures:
+        return {"error": "No fixtures available"}
+
+    fixture_summary = summarize_fixtures(fixtures)
+    team_stats, players_status, standings = context or gather_additional_context(fixtures, league=league,
+                                                                                   season=season)
+    goal_model = fit_goal_model(fixtures_data, league, season, standings, team_stats)
+    if mode == "prior":
+        from goal_model import goal_line
+        baselines = goal_model.baselines(fixture_summary, goal_line(query))
+        fixture_summary = [dict(fx, baseline=baselines[fx["id"]]) for fx in fixture_summary]
+    keys, cached = lookup_cached_predictions(fixture_summary, team_stats, players_status, standings, query)
+    return {
+        "league": league, "season": season, "query": query, "mode": mode,
+        "fixture_summary": fixture_summary, "team_stats": team_stats, "players_status": players_status,
+        "standings": standings, "goal_model": goal_model, "keys": keys, "cached": cached,
+        "pending": [fx for fx in fixture_summary if fx["id"] not in cached],
+    }
+
+def merged_context(plans):
+    """Pending fixtures and context of several plans, as one model call's inputs."""
+    pending = [fx for plan in plans for fx in plan["pending"]]
+    team_stats, players_status, standings, keys = {}, {}, [], {}
+    for plan in plans:
+        team_stats.update(plan["team_stats"])
+        players_status.update(plan["players_status"])
+        standings.extend(plan["standings"])
+        keys.update(plan["keys"])
+    return pending, team_stats, players_status, standings, keys
+
+def run_model_call(plans):
+    """One model call for the pending fixtures of `plans` (same query); returns generate_predictions' result."""
+    pending, team_stats, players_status, standings, keys = merged_context(plans)
+    if not pending:
+        return {}, None, None
+    query = plans[0]["query"]
+    # Concurrent requests needing the same fixtures share one model call
+    fresh, error, prompt_stats = response_cache.flight.do(
+        model_call_key(pending, keys), lambda: generate_predictions(pending, team_stats, players_status,
+                                                                    standings, query))
+    store_fresh(plans, fresh)
+    return fresh, error, prompt_stats
+
+def model_call_key(pending, keys):
+    return "predict:" + ",".join(sorted(keys.get(fx["id"]) or repr(fx) for fx in pending))
+
+def store_fresh(plans, fresh):
+    for plan in plans:
+        for fx in plan["pending"]:
+            if fx["id"] in fresh:
+                store_prediction(plan["keys"], fresh[fx["id"]])
+
+def finish_prediction(plan, fresh, error, prompt_stats, persist=False):
+    """Merge cached, fresh, stale and fallback predictions of a plan into the response."""
+    fixture_summary, pending, cached = plan["fixture_summary"], plan["pending"], plan["cached"]
+    logging.info(f"Predictions league={plan['league']}: {len(cached)} cached, {len(pending)} sent to model")
+
+    stale = {}
+    if error:
+        # Model down or its circuit open: fall back to the last known predictions
+        stale = stale_predictions([fx for fx in pending if fx["id"] not in fresh])
+    fallback = {}
+    if error and GOAL_MODEL_FALLBACK:
+        fallback = plan["goal_model"].predict(
+            [fx for fx in pending if fx["id"] not in fresh and fx["id"] not in stale], plan["query"])
+    matches = [cached.get(fx["id"]) or fresh.get(fx["id"]) or stale.get(fx["id"]) or fallback.get(fx["id"])
+               for fx in fixture_summary]
+    result = {"matches": [m for m in matches if m], "cached": len(cached), "computed": len(pending),
+              "mode": plan["mode"]}
+    if fallback:
+        result["fallback"] = len(fallback)
+    if prompt_stats and pending:
+        result["prompt"] = prompt_stats
+    if stale:
+        result["stale"] = len(stale)
+    if error:
+        result["error"] = error
+    if persist and fresh:
+        # Only newly generated predictions: cached ones were stored when they were made
+        save_predictions({"matches": [fresh[fx["id"]] for fx in pending if fx["id"] in fresh]},
+                         plan["league"], plan["season"], plan["query"], plan["players_status"], fixture_summary)
+    return result
+
+# === BATCH ===
+# Leagues per batch request and the deadline for their fixtures + context
+PREDICT_BATCH_MAX = int(os.getenv("PREDICT_BATCH_MAX", "10"))
+PREDICT_BATCH_DEADLINE = float(os.getenv("PREDICT_BATCH_DEADLINE", "30"))
+
+def group_model_calls(plans):
+    """Pack plans into model calls: same query, merged while the prompt fits the token budget untrimmed.
+
+    Each plan's sections are sized once and a group's size is the sum (a
+    slight overestimate where plans share teams), so packing costs no prompt
+    renders. A plan sharing pending fixtures with the group starts a new one.
+    """
+    groups = []
+    by_query = {}
+    for key, plan in plans.items():
+        if plan["pending"]:
+            by_query.setdefault(plan["query"], []).append(key)
+    for query, keys in by_query.items():
+        current, sizes, fixture_ids = [], {}, set()
+        for key in keys:
+            plan = plans[key]
+            plan_sizes = prompt_engine.section_sizes(prompt_sections(
+                plan["pending"], plan["team_stats"], plan["players_status"], plan["standings"]))
+            plan_ids = {fx["id"] for fx in plan["pending"]}
+            merged = {name: sizes.get(name, 0) + size for name, size in plan_sizes.items()}
+            if current and not plan_ids & fixture_ids and prompt_engine.estimate(merged, query) <= prompt_engine.budget:
+                current.append(key)
+                sizes, fixture_ids = merged, fixture_ids | plan_ids
+                continue
+            if current:
+                groups.append(current)
+            current, sizes, fixture_ids = [key], plan_sizes, plan_ids
+        groups.append(current)
+    return groups
+
+def batch_predict(items):
+    """Predict several (league, season, query, mode) items in one go.
+
+    Fixtures and context of all leagues are gathered in parallel, their
+    pending fixtures are merged into as few model calls as the token budget
+    allows, and those calls run in parallel too, so the wall-clock time is
+    close to the slowest league rather than the sum.
+    """
+    start = time.monotonic()
+
+    def prepare(item):
+        fixtures_data = get_fixtures(item["league"], item["season"], upcoming=True)
+        if item["mode"] == "stats":
+            return stats_predict(fixtures_data, item["query"], league=item["league"], season=item["season"])
+        return plan_prediction(fixtures_data, item["query"], item["league"], item["season"], item["mode"])
+
+    # Repeated items are predicted once and share the result
+    firsts = {}
+    for i, item in enumerate(items):
+        firsts.setdefault((item["league"], item["season"], item["query"], item["mode"]), i)
+    unique = sorted(firsts.values())
+    prepared = fan_out({i: lambda item=items[i]: prepare(item) for i in unique},
+                       max_workers=len(unique), deadline=PREDICT_BATCH_DEADLINE)
+    plans = {i: plan for i, plan in prepared.results.items() if "pending" in plan}
+    groups = group_model_calls(plans)
+    calls = fan_out({tuple(group): lambda group=group: run_model_call([plans[i] for i in group]) for group in groups},
+                    max_workers=max(1, len(groups)), deadline=GEMINI_TIMEOUT)
+
+    outcomes = {}
+    for i in unique:
+        if i in plans:
+            group = next(tuple(g) for g in groups if i in g) if plans[i]["pending"] else None
+            if group is None:
+                fresh, error, prompt_stats = {}, None, None
+            elif group in calls.results:
+                fresh, error, prompt_stats = calls.results[group]
+            else:
+                fresh, error, prompt_stats = {}, str(calls.errors.get(group) or "Model call timed out"), None
+            result = finish_prediction(plans[i], fresh, error, prompt_stats, persist=True)
+        elif i in prepared.results:
+            result = dict(prepared.results[i], matches=prepared.results[i].get("matches", []))
+        elif i in prepared.errors:
+            result = {"matches": [], "error": str(prepared.errors[i])}
         else:
-            with open(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'prompts', 'prompt_v2_over_under.md'), 'r', encoding='utf-8') as f:
-                prompt_template = f.read()
-    except Exception:
-        # fallback to inline prompt if files missing
-        prompt_template = None
-
-    prompt = None
-    if prompt_template:
-        prompt = prompt_template.replace('{fixtures_json}', json.dumps(fixture_summary, indent=2))
-        prompt = prompt.replace('{team_stats_json}', json.dumps({k: v for k, v in list(team_stats.items())[:5]}, indent=2))
-        prompt = prompt.replace('{players_status_json}', json.dumps({k: v[:4] for k, v in list(players_status.items())[:5]}, indent=2))
-        prompt = prompt.replace('{standings_json}', json.dumps(standings[:8], indent=2))
+            result = {"matches": [], "error": "Timed out gathering fixtures and context"}
+        outcomes[i] = result
+
+    results = []
+    for item in items:
+        result = outcomes[firsts[(item["league"], item["season"], item["query"], item["mode"])]]
+        status = "ok" if "error" not in result else ("partial" if result["matches"] else "error")
+        results.append(dict(result, league=item["league"], season=item["season"], query=item["query"], status=status))
+    elapsed = time.monotonic() - start
+    logging.info(f"Batch of {len(items)} leagues in {elapsed:.2f}s with {len(groups)} model calls")
+    return {"leagues": results, "model_calls": len(groups), "elapsed": round(elapsed, 3)}
+
+# === ASYNC (ASGI mode) ===
+# Used by asgi.py: upstream and model I/O is awaited, so one process holds many
+# predictions in flight; CPU work and blocking cache/store calls go to the I/O pool (run_io).
+
+def make_async_fetcher(api_key=None):
+    """make_fetcher for the event loop (same cache and key pool)."""
+    return AsyncEFootballFetcher(api_key, cache=response_cache, key_pool=None if api_key else key_pool.resolve())
+
+async def aget_fixtures(league=39, season=2025, upcoming=False):
+    """get_fixtures without blocking the event loop."""
+    if FIXTURE_SYNC:
+        # A local store read; due syncs run in the background
+        limit = PREDICT_MAX_FIXTURES if upcoming else None
+        return await run_io(_synced_fixtures, league, season, None, None, limit)
+    try:
+        fetched_data = await make_async_fetcher().fetch_fixtures(league, season)
+        logging.info(f"Fetched {len(fetched_data.get('response', []))} fixtures")
+        return fetched_data
+    except KeyPoolExhausted as e:
+        logging.error(f"Fixtures fetch failed: {e}")
+        return {"response": [], "errors": "All API keys exhausted"}
+    except Exception as e:
+        logging.error(f"Fixtures fetch failed: {e}")
+        return {"response": [], "errors": str(e)}
+
+async def agather_additional_context(fixtures_list, league=39, season=2025):
+    """gather_additional_context with the context calls awaited concurrently."""
+    try:
+        fetcher = make_async_fetcher()
+    except Exception as e:
+        logging.warning(f"Gathering context failed: {e}")
+        return {}, {}, []
+
+    team_ids = context_team_ids(fixtures_list)
+    calls = context_calls(fetcher, team_ids, league, season)
+    outcome = await afan_out(calls, max_concurrency=CONTEXT_MAX_WORKERS, deadline=CONTEXT_DEADLINE)
+    # Reads/writes the store's standings
+    return await run_io(collect_context, outcome, len(calls), team_ids, league, season)
+
+async def generate_content_async(prompt, timeout):
+    """One Gemini call awaited on the loop (through the SDK's async API when the client has one)."""
+    if hasattr(model, "generate_content_async"):
+        call = model.generate_content_async(prompt, request_options={"timeout": timeout})
     else:
-        # inline fallback
-        prompt = f"Analyze these upcoming football fixtures for \"{query}\" predictions:\n{json.dumps(fixture_summary, indent=2)}\nReturn JSON."
-    
+        call = asyncio.to_thread(model.generate_content, prompt, request_options={"timeout": timeout})
+    return await asyncio.wait_for(call, timeout)
+
+async def agenerate_predictions(fixture_summary, team_stats, players_status, standings, query):
+    """generate_predictions with the model call awaited."""
+    prompt = build_prompt(fixture_summary, team_stats, players_status, standings, query)
     try:
-        response = model.generate_content(prompt)
-        try:
-            # Extract JSON from response
-            text = response.text
-            start = text.find("{")
-            end = text.rfind("}") + 1
-            if start >= 0 and end > start:
-                json_str = text[start:end]
-                return json.loads(json_str)
-        except json.JSONDecodeError:
-            pass
-        
-        return {
-            "matches": [
-                {
-                    "home": f["home"],
-                    "away": f["away"],
-                    "prediction": "ANALYZING",
-                    "probability": 0,
-                    "reasoning": "AI analysis in progress",
-                    "tweet": response.text[:140]
-                }
-                for f in fixture_summary
-            ]
-        }
-    
+        response = await breaker_for("gemini:generate").acall(
+            lambda timeout: generate_content_async(prompt.text, timeout), GEMINI_TIMEOUT)
+        return parse_model_output(fixture_summary, response.text), None, prompt.stats()
     except Exception as e:
         logging.error(f"AI prediction failed: {e}")
-        return {"error": str(e), "matches": []}
+        return {}, str(e), prompt.stats()
+
+async def arun_model_call(plans):
+    """run_model_call with the model call awaited (shared by concurrent requests on the loop)."""
+    pending, team_stats, players_status, standings, keys = merged_context(plans)
+    if not pending:
+        return {}, None, None
+    query = plans[0]["query"]
+    fresh, error, prompt_stats = await response_cache.aflight.do(
+        model_call_key(pending, keys), lambda: agenerate_predictions(pending, team_stats, players_status,
+                                                                     standings, query))
+    await run_io(store_fresh, plans, fresh)
+    return fresh, error, prompt_stats
+
+async def apredict(fixtures_data, query="over 2.5", league=39, season=2025, mode="llm", persist=False):
+    """ai_predict for the event loop: context fetches and the model call are awaited."""
+    if mode == "stats":
+        return await run_io(stats_predict, fixtures_data, query, league=league, season=season)
+    fixtures = prediction_fixtures(fixtures_data)
+    if not fixtures:
+        return {"matches": [], "error": "No fixtures available"}
+    context = await agather_additional_context(fixtures, league=league, season=season)
+    plan = await run_io(plan_prediction, fixtures_data, query, league, season, mode, context)
+    if "error" in plan:
+        return {"matches": [], "error": plan["error"]}
+    fresh, error, prompt_stats = await arun_model_call([plan])
+    return await run_io(finish_prediction, plan, fresh, error, prompt_stats, persist)
+
+def iter_prediction_events(league=39, season=2025, query="over 2.5"):
+    """Yield (event, data) pairs for a streamed prediction.
+
+    Progress events mark each stage; cached matches are sent first, then each
+    newly generated match as soon as it is parsed from the model stream.
+    """
+    yield "progress", {"stage": "fixtures"}
+    fixtures_data = get_fixtures(league, season, upcoming=True)
+    fixtures = upcoming_fixtures(fixtures_data.get("response", []), PREDICT_MAX_FIXTURES)
+    if not fixtures:
+        yield "error", {"error": "No fixtures available"}
+        return
+
+    fixture_summary = summarize_fixtures(fixtures)
+    yield "progress", {"stage": "context", "fixtures": len(fixture_summary)}
+    team_stats, players_status, standings = gather_additional_context(fixtures, league=league, season=season)
+
+    keys, cached = lookup_cached_predictions(fixture_summary, team_stats, players_status, standings, query)
+    yield "progress", {"stage": "cache", "cached": len(cached)}
+    for fx in fixture_summary:
+        if fx["id"] in cached:
+            yield "match", cached[fx["id"]]
+
+    pending = [fx for fx in fixture_summary if fx["id"] not in cached]
+    generated = []
+    if pending:
+        prompt = build_prompt(pending, team_stats, players_status, standings, query)
+        yield "progress", {"stage": "model", "fixtures": len(pending), "prompt": prompt.stats()}
+        try:
+            for match in stream_predictions(pending, prompt):
+                store_prediction(keys, match)
+                generated.append(match)
+                yield "match", match
+        except Exception as e:
+            logging.error(f"AI prediction stream failed: {e}")
+            sent = {m.get("fixture_id") for m in generated}
+            stale = stale_predictions([fx for fx in pending if fx["id"] not in sent])
+            for match in stale.values():
+                yield "match", match
+            missing = [fx for fx in pending if fx["id"] not in sent and fx["id"] not in stale]
+            if missing and GOAL_MODEL_FALLBACK:
+                goal_model = fit_goal_model(fixtures_data, league, season, standings, team_stats)
+                for match in goal_model.predict(missing, query).values():
+                    yield "match", match
+            yield "error", {"error": str(e)}
+    save_predictions({"matches": generated}, league, season, query, players_status, fixture_summary)
+    yield "done", {"cached": len(cached), "computed": len(pending), "prompt_version": prompt_version()}
+
+def prediction_rows(prediction, league, season, query, players_status=None, fixture_summary=None):
+    """ai_predictions rows for the model's matches (stale and Poisson fallbacks are not stored)."""
+    teams = {fx["id"]: (fx.get("home_id"), fx.get("away_id")) for fx in fixture_summary or []}
+    players_status = players_status or {}
+    created_at = datetime.now().isoformat()
+    rows = []
+    for match in prediction.get("matches", []):
+        if match.get("stale") or match.get("model") == "poisson":
+            continue
+        # Limited player snapshot to avoid very large payloads
+        home_id, away_id = teams.get(match.get("fixture_id"), (None, None))
+        player_snapshot = {
+            side: [p.get('player', {}).get('name') for p in players_status.get(tid) or []][:6]
+            for side, tid in (('home_players', home_id), ('away_players', away_id))
+        }
+        rows.append({
+            "league_id": league,
+            "season": season,
+            "fixture_id": match.get("fixture_id"),
+            "home_team": match.get("home", ""),
+            "away_team": match.get("away", ""),
+            "prediction_type": query,
+            "prediction": match.get("prediction", ""),
+            "probability": match.get("probability", 0),
+            "reasoning": match.get("reasoning", ""),
+            "tweet": match.get("tweet", ""),
+            "prompt_version": prompt_engine.version,
+            "player_snapshot": json.dumps(player_snapshot),
+            "created_at": created_at
+        })
+    return rows
+
+def save_predictions(prediction, league, season, query, players_status=None, fixture_summary=None):
+    """Queue predictions for Supabase (optional); written in bulk off the request path."""
+    if supabase and "matches" in prediction:
+        prediction_writer.submit(prediction_rows(prediction, league, season, query, players_status, fixture_summary))
+
+# === PREFETCH ===
+PREFETCH_SEASON = int(os.getenv("PREFETCH_SEASON", "2025"))
+PREFETCH_QUERY = os.getenv("PREFETCH_QUERY", "over 2.5")
+
+def warm_league(league, season=PREFETCH_SEASON, query=PREFETCH_QUERY):
+    """Warm fixtures, context (standings, team stats, players) and predictions for a league."""
+    fixtures_data = get_fixtures(league, season, upcoming=True)
+    ai_predict(fixtures_data, query, league, season)
+    return fixtures_data.get("response", [])
+
+def make_prefetcher(leagues=None):
+    """Prefetcher over LEAGUES sharing this process's key pool; Redis lock avoids duplicate work across workers."""
+    return Prefetcher(
+        leagues or [l["id"] for l in LEAGUES],
+        warm_league,
+        key_pool=key_pool.resolve(),
+        lock=RedisLock(r, ttl=PREFETCH_LOCK_TTL, wait=0) if REDIS_AVAILABLE else None,
+    )
+
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "0") == "1" and not DEMO_MODE
 
 # === ROUTES ===
+routes = Blueprint("predictor", __name__)
+
+@routes.before_app_request
+def track_data_age():
+    """Start recording the age of cached data served for this request."""
+    start_age_tracking()
 
-@app.route("/")
+@routes.after_app_request
+def add_data_age_headers(response):
+    """Tell clients how old the upstream data behind this response is."""
+    age = tracked_age()
+    if age and age["age"] is not None:
+        response.headers["X-Data-Age"] = str(int(age["age"]))
+        response.headers["X-Data-Stale"] = "1" if age["stale"] else "0"
+    return response
+
+@routes.route("/")
 def dashboard():
     """Main dashboard."""
     return render_template("predict.html")
 
-@app.route("/api/predict", methods=["POST"])
+@routes.route("/api/predict", methods=["POST"])
 def predict():
     """AI prediction endpoint."""
     try:
@@ -304,6 +928,9 @@ def predict():
         league = data.get("league", 39)
         season = data.get("season", 2025)
         query = data.get("query", "over 2.5")
+        mode = data.get("mode", PREDICT_MODE)
+        if mode not in PREDICT_MODES:
+            return jsonify({"error": f"Unknown mode {mode!r}, expected one of {list(PREDICT_MODES)}"}), 400
         
         # DEMO MODE: Only return mock data when explicitly enabled with DEMO_MODE=1
         if DEMO_MODE:
@@ -329,12 +956,12 @@ def predict():
                         "tweet": "City vs Arsenal: Under 2.5 lean (65%) ⚪🔵 Tight tactical battle expected"
                     }
                 ],
-                "prompt_version": PROMPT_VERSION,
+                "prompt_version": prompt_version(),
                 "demo_mode": True
             })
         
         # Get fixtures
-        fixtures = get_fixtures(league, season)
+        fixtures = get_fixtures(league, season, upcoming=True)
         # If fetching fixtures failed, fallback to demo data only when DEMO_MODE is enabled
         if "errors" in fixtures and not fixtures.get("response"):
             logging.warning("Fixtures fetch failed: %s", fixtures.get('errors'))
@@ -352,47 +979,14 @@ def predict():
                             "tweet": "Man Utd vs Liverpool: Over 2.5 likely (72%) Expect attacking display #BetTips"
                         }
                     ],
-                    "prompt_version": PROMPT_VERSION,
+                    "prompt_version": prompt_version(),
                     "demo_mode": True
                 })
             return jsonify({"error": "No fixtures available"}), 503
         
         # AI prediction
-        prediction = ai_predict(fixtures, query)
-        
-        # Save predictions to Supabase (optional)
-        if supabase and "matches" in prediction:
-            try:
-                prompt_version = os.getenv('PROMPT_VERSION', PROMPT_VERSION)
-                # store limited player snapshot to avoid very large payloads
-                for match in prediction.get("matches", []):
-                    player_snapshot = {}
-                    try:
-                        # look up available players for home and away if present
-                        # match may include team ids in fixture_summary; attempt to include small snapshot
-                        player_snapshot = {
-                            'home_players': [p.get('player', {}).get('name') for p in players_status.get(match.get('home'), [])][:6] if isinstance(players_status, dict) else [],
-                            'away_players': [p.get('player', {}).get('name') for p in players_status.get(match.get('away'), [])][:6] if isinstance(players_status, dict) else []
-                        }
-                    except Exception:
-                        player_snapshot = {}
-
-                    supabase.table('ai_predictions').insert({
-                        "league_id": league,
-                        "season": season,
-                        "home_team": match.get("home", ""),
-                        "away_team": match.get("away", ""),
-                        "prediction_type": query,
-                        "prediction": match.get("prediction", ""),
-                        "probability": match.get("probability", 0),
-                        "reasoning": match.get("reasoning", ""),
-                        "tweet": match.get("tweet", ""),
-                        "prompt_version": prompt_version,
-                        "player_snapshot": json.dumps(player_snapshot),
-                        "created_at": datetime.now().isoformat()
-                    }).execute()
-            except Exception as e:
-                logging.warning(f"Supabase insert failed: {e}")
+        # Predictions are queued for Supabase (optional) and written in the background
+        prediction = ai_predict(fixtures, query, league=league, season=season, mode=mode, persist=True)
         
         return jsonify(prediction)
     
@@ -400,76 +994,220 @@ def predict():
         logging.error(f"Predict endpoint error: {e}")
         return jsonify({"error": str(e)}), 500
 
-@app.route("/api/health", methods=["GET"])
+@routes.route("/api/predict/batch", methods=["POST"])
+def predict_batch():
+    """Predictions for several leagues in one request (default: every league in /api/leagues)."""
+    data = request.get_json() or {}
+    defaults = {"season": data.get("season", 2025), "query": data.get("query", "over 2.5"),
+                "mode": data.get("mode", PREDICT_MODE)}
+    items = [dict(defaults, **entry) for entry in data.get("requests") or [{"league": l["id"]} for l in LEAGUES]]
+    if len(items) > PREDICT_BATCH_MAX:
+        return jsonify({"error": f"At most {PREDICT_BATCH_MAX} leagues per batch"}), 400
+    for item in items:
+        if "league" not in item:
+            return jsonify({"error": "Every request needs a league"}), 400
+        if item["mode"] not in PREDICT_MODES:
+            return jsonify({"error": f"Unknown mode {item['mode']!r}, expected one of {list(PREDICT_MODES)}"}), 400
+    try:
+        return jsonify(batch_predict(items))
+    except Exception as e:
+        logging.error(f"Batch predict error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+def sse_event(event, data):
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@routes.route("/api/predict/stream", methods=["GET", "POST"])
+def predict_stream():
+    """Streaming AI prediction endpoint (Server-Sent Events).
+
+    Emits `progress` events per stage, one `match` event per prediction as
+    soon as it is available, then `done` (or `error`).
+    """
+    data = (request.get_json(silent=True) or {}) if request.method == "POST" else request.args
+    league = int(data.get("league", 39))
+    season = int(data.get("season", 2025))
+    query = data.get("query", "over 2.5")
+
+    def events():
+        if DEMO_MODE:
+            yield sse_event("match", {
+                "home": "Manchester United",
+                "away": "Liverpool",
+                "prediction": "Over 2.5",
+                "probability": 72,
+                "reasoning": "Strong attacking teams, historical high-scoring matches",
+                "tournament_note": "Premier League - High Priority",
+                "tweet": "Man Utd vs Liverpool: Over 2.5 likely (72%) Expect attacking display #BetTips"
+            })
+            yield sse_event("done", {"prompt_version": prompt_version(), "demo_mode": True})
+            return
+        try:
+            for event, payload in iter_prediction_events(league, season, query):
+                yield sse_event(event, payload)
+        except Exception as e:
+            logging.error(f"Predict stream error: {e}")
+            yield sse_event("error", {"error": str(e)})
+
+    return Response(stream_with_context(events()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@routes.route("/api/health", methods=["GET"])
 def health():
-    """Health check."""
+    """Health check (liveness): reports on clients without building them."""
     return jsonify({
         "status": "healthy",
-        "redis": bool(r),
-        "supabase": bool(supabase),
+        "redis": r.initialized and bool(r),
+        "supabase": supabase.initialized and bool(supabase),
         "google_ai": bool(os.getenv("GOOGLE_AI_API_KEY")),
-        "api_keys": len(RAPIDAPI_KEYS)
+        "api_keys": len(RAPIDAPI_KEYS),
+        "key_pool": key_pool.status() if key_pool.initialized else None,
+        "prediction_writer": prediction_writer.status(),
+        "circuits": circuit_states(),
+        "cache": response_cache.stats() if response_cache.initialized else None,
+        "clients": client_states(CLIENTS),
     })
 
-@app.route("/api/leagues", methods=["GET"])
+@routes.route("/api/ready", methods=["GET"])
+def ready():
+    """Readiness: builds every client, 503 until the required ones are up.
+
+    Redis is pinged when configured; being down only degrades caching and the
+    shared key quotas, so it is reported but does not fail the check.
+    """
+    warm(CLIENTS.values())
+    states = client_states(CLIENTS)
+    if r:
+        try:
+            r.ping()
+        except Exception as e:
+            states["redis"].update(state="down", error=str(e))
+    is_ready = all(s["state"] == "ok" for s in states.values() if s["required"])
+    return jsonify({"ready": is_ready, "clients": states}), 200 if is_ready else 503
+
+@routes.route("/api/leagues", methods=["GET"])
 def leagues():
     """Popular leagues."""
-    return jsonify([
-        {"id": 39, "name": "Premier League (England)"},
-        {"id": 140, "name": "La Liga (Spain)"},
-        {"id": 135, "name": "Serie A (Italy)"},
-        {"id": 78, "name": "Bundesliga (Germany)"},
-        {"id": 61, "name": "Ligue 1 (France)"},
-    ])
+    return jsonify(LEAGUES)
 
 
-@app.route("/api/fixtures", methods=["GET"])
+@routes.route("/api/fixtures", methods=["GET"])
 def api_fixtures():
+    """Fixtures of a league, filtered by ?from=&to=&status=&team=, with ?fields= and ?limit=&offset=."""
     league = int(request.args.get("league", 39))
     season = int(request.args.get("season", 2025))
     try:
-        data = get_fixtures(league=league, season=season)
-        return jsonify(data)
+        filters = fixture_filters(request.args)
+    except ValueError:
+        return jsonify({"error": "from/to must be YYYY-MM-DD, team a list of ids"}), 400
+    try:
+        if not FIXTURE_SYNC:
+            data = get_fixtures(league=league, season=season)
+        elif fixture_sync.covers(filters["start"], filters["end"]):
+            # The store holds every fixture of its sync window
+            data = _synced_fixtures(league, season, filters["start"], filters["end"])
+        else:
+            # Older or later than the store's window, or unbounded (e.g. every FT result)
+            data = season_fixtures(league, season)
+        fixtures = filter_fixtures(data.get("response", []), filters)
+        versions = tracked_age()["versions"]
+        if versions:
+            # The fixtures returned are part of the version, so the ETag changes whenever the set does
+            versions["fixture_ids:" + hashlib.sha1(json.dumps(
+                [f.get("fixture", {}).get("id") for f in fixtures]).encode("utf-8")).hexdigest()] = 0.0
+        return json_response(request, lambda: filtered_envelope(data, fixtures, request.args), versions)
     except Exception as e:
         logging.error(f"/api/fixtures error: {e}")
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/api/players", methods=["GET"])
+@routes.route("/api/fixtures/today", methods=["GET"])
+def api_fixtures_today():
+    """Today's synced fixtures from the local store (optionally ?league=)."""
+    league = request.args.get("league", type=int)
+    return jsonify({"response": fixture_store.todays_fixtures(league), "errors": []})
+
+@routes.route("/api/teams/<int:team_id>/fixtures", methods=["GET"])
+def api_team_fixtures(team_id):
+    """A team's next synced fixtures from the local store (?past=1 for recent ones)."""
+    limit = request.args.get("limit", default=10, type=int)
+    past = request.args.get("past", "0") == "1"
+    return jsonify({"response": fixture_store.team_fixtures(team_id, limit, upcoming=not past), "errors": []})
+
+@routes.route("/api/players", methods=["GET"])
 def api_players():
+    """Players of a team, with ?fields= and ?limit=&offset=."""
     team = request.args.get("team")
     season = int(request.args.get("season", 2025))
     if not team:
         return jsonify({"error": "team param required"}), 400
     try:
-        fetcher = EFootballFetcher(RAPIDAPI_KEYS[0] if RAPIDAPI_KEYS else None)
+        fetcher = make_fetcher()
         data = fetcher.fetch_players(team=int(team), season=season)
-        return jsonify(data)
+        return json_response(request, lambda: filtered_envelope(data, data.get("response", []), request.args),
+                             tracked_age()["versions"])
     except Exception as e:
         logging.error(f"/api/players error: {e}")
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/api/standings", methods=["GET"])
+STANDINGS_FILTERS = ("team", "fields", "limit", "offset")
+
+@routes.route("/api/standings", methods=["GET"])
 def api_standings():
+    """League table; with ?team=, ?fields= or ?limit=&offset= the response is the filtered table rows."""
     league = int(request.args.get("league", 39))
     season = int(request.args.get("season", 2025))
     try:
-        fetcher = EFootballFetcher(RAPIDAPI_KEYS[0] if RAPIDAPI_KEYS else None)
+        teams = {int(t) for t in request.args.get("team", "").split(",") if t.strip()}
+    except ValueError:
+        return jsonify({"error": "team must be a list of ids"}), 400
+    try:
+        fetcher = make_fetcher()
         data = fetcher.fetch_standings(league=league, season=season)
-        return jsonify(data)
+
+        def payload():
+            if not any(name in request.args for name in STANDINGS_FILTERS):
+                return data
+            rows = [row for entry in data.get("response", [])
+                    for group in (entry.get("league", {}) if isinstance(entry, dict) else {}).get("standings", [])
+                    for row in group]
+            if teams:
+                rows = standings_rows(data.get("response", []), teams)
+            return filtered_envelope(data, rows, request.args)
+
+        return json_response(request, payload, tracked_age()["versions"])
     except Exception as e:
         logging.error(f"/api/standings error: {e}")
         return jsonify({"error": str(e)}), 500
 
-@app.errorhandler(404)
+@routes.app_errorhandler(404)
 def not_found(e):
     return jsonify({"error": "Not found"}), 404
 
-@app.errorhandler(500)
+@routes.app_errorhandler(500)
 def server_error(e):
     return jsonify({"error": "Server error"}), 500
 
+_prefetcher_started = False
+
+def create_app():
+    """Flask app serving the dashboard and API.
+
+    Cheap to call: external clients are built on first use (or by /api/ready).
+    """
+    global _prefetcher_started
+    flask_app = Flask(__name__, template_folder=TEMPLATE_DIR)
+    flask_app.register_blueprint(routes)
+    # One prefetcher per process, however many apps are created
+    if PREFETCH_ENABLED and not _prefetcher_started:
+        _prefetcher_started = True
+        make_prefetcher().start()
+    return flask_app
+
+app = create_app()
+
 if __name__ == "__main__":
     print("\n[*] E-Football AI Predictor")
     print(f"[OK] API Keys: {len(RAPIDAPI_KEYS)}")
@@ -479,7 +1217,7 @@ if __name__ == "__main__":
     print("\n[START] Running on http://localhost:5000")
     print("[INFO] Dashboard: http://localhost:5000")
     print("[INFO] API: /api/predict (POST)")
-    print("[INFO] Health: /api/health (GET)\n")
+    print("[INFO] Health: /api/health (GET), readiness: /api/ready (GET)\n")
     # Run without the automatic reloader by default to avoid noisy restarts
     dev_mode = os.getenv("DEV_MODE", "0") == "1"
     app.run(debug=dev_mode, use_reloader=dev_mode, host="0.0.0.0", port=5000)
\ No newline at end of file
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+ASGI serving mode: `uvicorn asgi:app --host 0.0.0.0 --port 5000`
+
+Under WSGI every /api/predict holds a worker for its whole chain of RapidAPI
+calls and the Gemini call. Here POST /api/predict runs on the event loop with
+that I/O awaited (async fetcher, async Gemini client), so one process keeps
+hundreds of predictions in flight; only short CPU and cache/store work goes to
+threads (the CACHE_IO_THREADS pool). Every other route, and /api/predict in
+DEMO_MODE, is served by the unchanged Flask app on a thread pool
+(ASGI_WSGI_THREADS), streaming responses (SSE) included. That covers
+/api/predict/batch and /api/predict/stream: each holds a bridge thread for its
+whole duration, so at most ASGI_WSGI_THREADS of them run at once.
+"""
+import os
+import io
+import sys
+import json
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import app as predictor
+from cache import start_age_tracking
+from http_pool import close_async_client
+
+# Threads serving the Flask routes (each SSE stream holds one while open)
+ASGI_WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS", "32"))
+# Chunks a streamed Flask response may run ahead of the client
+WSGI_STREAM_BUFFER = 16
+
+_DONE = object()
+
+
+async def read_body(receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def send_json(send, status: int, payload: Any, headers: Optional[List[Tuple[bytes, bytes]]] = None) -> None:
+    body = json.dumps(payload, default=str).encode("utf-8")
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"application/json"),
+                            (b"content-length", str(len(body)).encode())] + (headers or [])})
+    await send({"type": "http.response.body", "body": body})
+
+
+# === FLASK BRIDGE ===
+
+def wsgi_environ(scope: Dict[str, Any], body: bytes) -> Dict[str, Any]:
+    """WSGI environ for an ASGI HTTP scope."""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client")
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0] if client else "",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", []):
+        name, value = name.decode("latin-1"), value.decode("latin-1")
+        if name == "content-type":
+            key = "CONTENT_TYPE"
+        elif name == "content-length":
+            key = "CONTENT_LENGTH"
+        else:
+            key = "HTTP_" + name.upper().replace("-", "_")
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class WsgiBridge:
+    """Serve a WSGI app from ASGI, one thread per request.
+
+    The whole response (app call and body iteration) runs on a single thread,
+    as Flask's streamed responses expect, and chunks are handed to the event
+    loop through a bounded queue.
+    """
+
+    def __init__(self, wsgi_app, threads: int = ASGI_WSGI_THREADS):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="wsgi")
+
+    async def __call__(self, scope, receive, send) -> None:
+        environ = wsgi_environ(scope, await read_body(receive))
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(WSGI_STREAM_BUFFER)
+        cancelled = False
+
+        def put(item) -> None:
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+        def run() -> None:
+            def start_response(status, headers, exc_info=None):
+                put(("start", int(status.split(" ", 1)[0]),
+                     [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers]))
+                return lambda data: put(("body", data))
+
+            iterable = None
+            try:
+                iterable = self.wsgi_app(environ, start_response)
+                for chunk in iterable:
+                    if cancelled:
+                        break
+                    if chunk:
+                        put(("body", chunk))
+            except Exception as e:
+                logging.error(f"WSGI bridge error: {e}")
+                put(("error", e))
+            finally:
+                if hasattr(iterable, "close"):
+                    iterable.close()
+                put(_DONE)
+
+        worker = loop.run_in_executor(self.executor, run)
+        started = False
+        try:
+            while True:
+                item = await queue.get()
+                if item is _DONE:
+                    break
+                if item[0] == "start":
+                    await send({"type": "http.response.start", "status": item[1], "headers": item[2]})
+                    started = True
+                elif item[0] == "body":
+                    await send({"type": "http.response.body", "body": item[1], "more_body": True})
+                elif not started:
+                    await send_json(send, 500, {"error": "Server error"})
+                    return
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            cancelled = True
+            # Unblock a worker waiting on a full queue, then let it finish
+            while not worker.done():
+                while not queue.empty():
+                    queue.get_nowait()
+                await asyncio.sleep(0.01)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# === NATIVE ROUTES ===
+
+async def predict(body: bytes) -> Tuple[int, Any]:
+    """POST /api/predict with every upstream and model call awaited."""
+    try:
+        data = json.loads(body) if body else {}
+    except ValueError:
+        return 400, {"error": "Request body must be JSON"}
+    data = data or {}
+    league = data.get("league", 39)
+    season = data.get("season", 2025)
+    query = data.get("query", "over 2.5")
+    mode = data.get("mode", predictor.PREDICT_MODE)
+    if mode not in predictor.PREDICT_MODES:
+        return 400, {"error": f"Unknown mode {mode!r}, expected one of {list(predictor.PREDICT_MODES)}"}
+    try:
+        fixtures = await predictor.aget_fixtures(league, season, upcoming=True)
+        if "errors" in fixtures and not fixtures.get("response"):
+            logging.warning(f"Fixtures fetch failed: {fixtures.get('errors')}")
+            return 503, {"error": "No fixtures available"}
+        return 200, await predictor.apredict(fixtures, query, league=league, season=season, mode=mode,
+                                             persist=True)
+    except Exception as e:
+        logging.error(f"Predict endpoint error: {e}")
+        return 500, {"error": str(e)}
+
+
+NATIVE_ROUTES = {("POST", "/api/predict"): predict}
+
+
+class AsgiApp:
+    """ASGI entry point: native async routes, the Flask app for everything else."""
+
+    def __init__(self, flask_app=None, threads: int = ASGI_WSGI_THREADS):
+        self.bridge = WsgiBridge(flask_app or predictor.app, threads)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            return await self.lifespan(receive, send)
+        if scope["type"] != "http":
+            return
+        handler = NATIVE_ROUTES.get((scope["method"], scope["path"]))
+        if handler is None or predictor.DEMO_MODE:
+            return await self.bridge(scope, receive, send)
+        holder = start_age_tracking()
+        status, payload = await handler(await read_body(receive))
+        headers = []
+        if holder["age"] is not None:
+            headers = [(b"x-data-age", str(int(holder["age"])).encode()),
+                       (b"x-data-stale", b"1" if holder["stale"] else b"0")]
+        await send_json(send, status, payload, headers)
+
+    async def lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await close_async_client()
+                self.bridge.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+app = AsgiApp()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Non-blocking RapidAPI fetcher for the ASGI serving mode.
+
+`AsyncEFootballFetcher` is `EFootballFetcher` with its transport swapped for
+the pooled `httpx.AsyncClient`: every `fetch_*` method returns a coroutine,
+while cache keys, payload projection, columnar caching, key-pool rotation and
+circuit breakers are shared with the sync fetcher, which sync callers keep
+using unchanged.
+"""
+import time
+import asyncio
+from typing import Any, Dict, Optional
+
+from main import EFootballFetcher, _compacted, _retry_after
+from http_pool import (get_async_client, timeout_for, HTTPX_AVAILABLE, RETRY_TOTAL, RETRY_BACKOFF,
+                       RETRY_STATUSES)
+from cache import cache_key, ttl_for, run_io
+from compact import Columns, COMPACT_CACHE, COMPACT_ENDPOINTS
+from projection import project_payload
+from key_pool import KeyPoolExhausted, ACQUIRE_WAIT
+from circuit import breaker_for
+
+if HTTPX_AVAILABLE:
+    import httpx
+
+
+async def acquire_key(key_pool, wait: float = ACQUIRE_WAIT) -> str:
+    """`KeyPool.acquire` for the event loop: waits for a token with asyncio.sleep, not on a thread.
+
+    Each attempt may be a Redis round trip, so it runs on the I/O pool.
+    """
+    deadline = time.monotonic() + wait
+    while True:
+        key = await run_io(key_pool.try_acquire)
+        if key is not None:
+            return key
+        if time.monotonic() >= deadline:
+            raise KeyPoolExhausted("All RapidAPI keys exhausted or cooling down")
+        await asyncio.sleep(min(0.25, max(0.0, deadline - time.monotonic())))
+
+
+class AsyncEFootballFetcher(EFootballFetcher):
+    """Fetch e-football data from RapidAPI without blocking the event loop.
+
+    `await fetcher.fetch_fixtures(39, 2025)` etc.; `client` defaults to the
+    event loop's shared pooled client.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, client=None, base_url: Optional[str] = None,
+                 cache=None, key_pool=None):
+        super().__init__(api_key, base_url=base_url, cache=cache, key_pool=key_pool)
+        self.client = client
+
+    async def _get(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """GET an endpoint, read-through the cache when one is configured."""
+        if self.cache is None:
+            return project_payload(endpoint, await self._request(endpoint, params))
+        compact = COMPACT_ENDPOINTS.get(endpoint) if COMPACT_CACHE else None
+
+        async def load():
+            payload = await self._request(endpoint, params)
+            return project_payload(endpoint, payload) if compact is None else _compacted(compact, payload)
+
+        value = await self.cache.aget_or_load(cache_key(endpoint, params), load, ttl_for(endpoint))
+        return value.to_response() if isinstance(value, Columns) else value
+
+    async def _request(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """GET an endpoint; with a key pool a 429 cools that key down and the next one is tried."""
+        url = f"{self.base_url}/{endpoint}"
+        if self.key_pool is None:
+            response = await self._send(endpoint, url, self.headers, params)
+            response.raise_for_status()
+            return response.json()
+
+        for _ in range(len(self.key_pool)):
+            key = await acquire_key(self.key_pool)
+            headers = dict(self.headers, **{"X-RapidAPI-Key": key})
+            response = await self._send(endpoint, url, headers, params)
+            if response.status_code == 429:
+                await run_io(self.key_pool.cooldown, key, _retry_after(response))
+                continue
+            response.raise_for_status()
+            return response.json()
+        raise KeyPoolExhausted(f"All RapidAPI keys rate limited for {endpoint}")
+
+    async def _send(self, endpoint: str, url: str, headers: Dict[str, str], params: Dict[str, Any]):
+        """One GET through the endpoint's circuit breaker, retrying 5xx with backoff like the sync session."""
+        connect, read = timeout_for(endpoint)
+        client = self.client or get_async_client()
+
+        async def get(timeout: float):
+            # Injected clients (tests) may not be httpx ones
+            timeouts = httpx.Timeout(timeout, connect=connect) if HTTPX_AVAILABLE else timeout
+            for attempt in range(RETRY_TOTAL + 1):
+                response = await client.get(url, headers=headers, params=params, timeout=timeouts)
+                if response.status_code not in RETRY_STATUSES or attempt == RETRY_TOTAL:
+                    return response
+                await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+        return await breaker_for(f"rapidapi:{endpoint}").acall(
+            get, read, is_failure=lambda response: getattr(response, "status_code", 200) >= 500)
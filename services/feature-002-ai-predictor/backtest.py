@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Backtest predictions against results of past seasons.
+
+Seasons are replayed from a local archive: either a directory of RapidAPI
+fixture responses named `<league>_<season>.json` (`--fetch` downloads missing
+ones) or a FixtureStore SQLite file (FIXTURE_STORE_PATH). Two sources can be
+scored:
+
+  - the Poisson model, walked forward: every fixture is predicted from the
+    results of the days before it. The per-matchday team records are built
+    with cumulative sums and all matchdays are fitted in one NumPy pass.
+  - stored LLM predictions (`--predictions`, a JSON/JSONL export of the
+    ai_predictions table or of cached matches), joined to results by fixture
+    id or team names.
+
+Each is scored with Brier score, log-loss and hit rate (over/under for both,
+BTTS and 1X2 for the model). League/seasons run in parallel on a process pool.
+
+Usage:
+    python backtest.py --archive archive/ --leagues 39,140 --seasons 2023,2024 [--workers 4]
+    python backtest.py --archive fixtures.db [--predictions ai_predictions.jsonl] [--json]
+"""
+import os
+import sys
+import json
+import glob
+import time
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from goal_model import GoalModel, RESULT_STATUSES, GOAL_MODEL_PRIOR_GAMES, goal_line, team_rates
+from store import FixtureStore, fixture_kickoff
+
+# Fixtures of a season replayed before the model is scored (too little history)
+BACKTEST_MIN_HISTORY = int(os.getenv("BACKTEST_MIN_HISTORY", "30"))
+BACKTEST_WORKERS = int(os.getenv("BACKTEST_WORKERS", str(os.cpu_count() or 1)))
+
+_EPS = 1e-12
+
+
+class Score:
+    """Running sums of Brier score, log-loss and hits, so seasons can be combined."""
+
+    __slots__ = ("n", "brier", "log_loss", "hits")
+
+    def __init__(self, n: int = 0, brier: float = 0.0, log_loss: float = 0.0, hits: int = 0):
+        self.n = n
+        self.brier = brier
+        self.log_loss = log_loss
+        self.hits = hits
+
+    @classmethod
+    def binary(cls, p: np.ndarray, y: np.ndarray) -> "Score":
+        """Score probabilities `p` of events `y` (booleans)."""
+        p = np.clip(p, _EPS, 1 - _EPS)
+        return cls(len(p), float(((p - y) ** 2).sum()),
+                   float(-(y * np.log(p) + (1 - y) * np.log(1 - p)).sum()), int(((p >= 0.5) == y).sum()))
+
+    @classmethod
+    def categorical(cls, p: np.ndarray, y: np.ndarray) -> "Score":
+        """Score class probabilities `p` (n x classes) of outcomes `y` (class indices)."""
+        onehot = np.eye(p.shape[1])[y]
+        picked = np.clip(p[np.arange(len(y)), y], _EPS, 1)
+        return cls(len(y), float(((p - onehot) ** 2).sum()), float(-np.log(picked).sum()),
+                   int((p.argmax(axis=1) == y).sum()))
+
+    def __add__(self, other: "Score") -> "Score":
+        return Score(self.n + other.n, self.brier + other.brier, self.log_loss + other.log_loss,
+                     self.hits + other.hits)
+
+    def as_dict(self) -> Dict[str, Any]:
+        if not self.n:
+            return {"n": 0}
+        return {"n": self.n, "brier": round(self.brier / self.n, 4), "log_loss": round(self.log_loss / self.n, 4),
+                "hit_rate": round(self.hits / self.n, 4)}
+
+
+# --- archive ---
+
+def archive_path(archive: str, league: int, season: int) -> str:
+    return os.path.join(archive, f"{league}_{season}.json")
+
+
+def load_season(archive: str, league: int, season: int) -> List[Dict[str, Any]]:
+    """Raw RapidAPI fixtures of a league/season from the archive."""
+    if os.path.isdir(archive):
+        path = archive_path(archive, league, season)
+        if not os.path.exists(path):
+            return []
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data.get("response", []) if isinstance(data, dict) else data
+    return FixtureStore(archive).fixtures(league, season)
+
+
+def archive_seasons(archive: str) -> List[Tuple[int, int]]:
+    """Every (league, season) in the archive."""
+    if os.path.isdir(archive):
+        pairs = []
+        for path in glob.glob(os.path.join(archive, "*_*.json")):
+            league, _, season = os.path.basename(path)[:-5].partition("_")
+            if league.isdigit() and season.isdigit():
+                pairs.append((int(league), int(season)))
+        return sorted(pairs)
+    return [tuple(row) for row in FixtureStore(archive).seasons()]
+
+
+def fetch_missing(archive: str, jobs: Iterable[Tuple[int, int]]) -> None:
+    """Download seasons missing from an archive directory."""
+    from main import EFootballFetcher
+    os.makedirs(archive, exist_ok=True)
+    fetcher = EFootballFetcher()
+    for league, season in jobs:
+        path = archive_path(archive, league, season)
+        if os.path.exists(path):
+            continue
+        data = fetcher.fetch_fixtures(league, season)
+        if data.get("errors"):
+            logging.warning(f"Fetching {league}/{season} failed: {data['errors']}")
+            continue
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        logging.info(f"Archived {league}/{season}: {len(data.get('response', []))} fixtures")
+
+
+# --- evaluation ---
+
+def finished(fixtures: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Fixtures with a final score, in kickoff order."""
+    done = [f for f in fixtures if f.get("fixture", {}).get("status", {}).get("short") in RESULT_STATUSES
+            and (f.get("goals") or {}).get("home") is not None and fixture_kickoff(f) is not None]
+    return sorted(done, key=lambda f: (fixture_kickoff(f), f["fixture"].get("id") or 0))
+
+
+def walk_forward(results: List[Dict[str, Any]], model: GoalModel, line: float = 2.5,
+                 min_history: int = BACKTEST_MIN_HISTORY) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Predict each result from the days before it.
+
+    Returns (mask of scored fixtures, market probabilities of those fixtures).
+    """
+    n = len(results)
+    teams = {t: i for i, t in enumerate(sorted({f["teams"][s]["id"] for f in results for s in ("home", "away")},
+                                                key=str))}
+    h = np.array([teams[f["teams"]["home"]["id"]] for f in results], dtype=int)
+    a = np.array([teams[f["teams"]["away"]["id"]] for f in results], dtype=int)
+    hg = np.array([f["goals"]["home"] for f in results], dtype=float)
+    ag = np.array([f["goals"]["away"] for f in results], dtype=float)
+    day = np.array([fixture_kickoff(f) // 86400 for f in results])
+
+    # Each result's contribution to [venue, (for, against, played), team]
+    rows = np.arange(n)
+    contrib = np.zeros((n, 2, 3, len(teams)))
+    contrib[rows, 0, 0, h] = hg
+    contrib[rows, 0, 1, h] = ag
+    contrib[rows, 0, 2, h] = 1
+    contrib[rows, 1, 0, a] = ag
+    contrib[rows, 1, 1, a] = hg
+    contrib[rows, 1, 2, a] = 1
+    # Records as of the start of each fixture's day (same-day results are unknown)
+    cumulative = np.concatenate([np.zeros((1,) + contrib.shape[1:]), np.cumsum(contrib, axis=0)])
+    first_of_day = np.searchsorted(day, day, side="left")
+    records = cumulative[first_of_day]
+
+    scored = first_of_day >= min_history
+    records, h, a = records[scored], h[scored], a[scored]
+    mu, attack, defence = team_rates(records[:, :, 0], records[:, :, 1], records[:, :, 2], model.prior_games)
+    idx = np.arange(len(h))
+    xg_home = mu[:, 0] * attack[idx, 0, h] * defence[idx, 1, a]
+    xg_away = mu[:, 1] * attack[idx, 1, a] * defence[idx, 0, h]
+    return scored, model.markets(xg_home, xg_away, line)
+
+
+def _name(value: Any) -> str:
+    return str(value or "").strip().lower()
+
+
+def _other_season(row: Dict[str, Any], league: Optional[int], season: Optional[int]) -> bool:
+    """Whether a prediction row names a different league or season than the one scored."""
+    for value, wanted in ((row.get("league_id", row.get("league")), league), (row.get("season"), season)):
+        if wanted is not None and value not in (None, "") and int(value) != wanted:
+            return True
+    return False
+
+
+def llm_probabilities(results: List[Dict[str, Any]], predictions: List[Dict[str, Any]],
+                      line: float = 2.5, league: Optional[int] = None,
+                      season: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """P(over `line`) of stored predictions joined to results; (result indices, probabilities).
+
+    Rows of another `league`/`season` are dropped first, so the team-name
+    join cannot match the same pairing in a different season.
+    """
+    by_id, by_teams = {}, {}
+    for row in predictions:
+        if _other_season(row, league, season):
+            continue
+        if goal_line(row.get("prediction_type") or row.get("query") or "", line) != line:
+            continue
+        label = str(row.get("prediction", "")).upper()
+        if not label.startswith(("OVER", "UNDER")):
+            continue
+        p = (float(row.get("probability") or 0) / 100)
+        p_over = p if label.startswith("OVER") else 1 - p
+        # Later rows (newer predictions) win
+        if row.get("fixture_id") is not None:
+            by_id[row["fixture_id"]] = p_over
+        by_teams[(_name(row.get("home_team", row.get("home"))), _name(row.get("away_team", row.get("away"))))] = p_over
+    index, probs = [], []
+    for i, f in enumerate(results):
+        p = by_id.get(f["fixture"].get("id"))
+        if p is None:
+            p = by_teams.get((_name(f["teams"]["home"].get("name")), _name(f["teams"]["away"].get("name"))))
+        if p is not None:
+            index.append(i)
+            probs.append(p)
+    return np.array(index, dtype=int), np.array(probs, dtype=float)
+
+
+def evaluate_season(archive: str, league: int, season: int, line: float = 2.5,
+                    min_history: int = BACKTEST_MIN_HISTORY,
+                    predictions: Optional[List[Dict[str, Any]]] = None,
+                    prior_games: float = GOAL_MODEL_PRIOR_GAMES) -> Dict[str, Any]:
+    """Score one league/season; returns {"league", "season", "fixtures", "scores": {source/market: Score}}."""
+    results = finished(load_season(archive, league, season))
+    scores: Dict[str, Score] = {}
+    if results:
+        goals = np.array([[f["goals"]["home"], f["goals"]["away"]] for f in results], dtype=float)
+        over = goals.sum(axis=1) > line
+        btts = (goals > 0).all(axis=1)
+        outcome = np.where(goals[:, 0] > goals[:, 1], 0, np.where(goals[:, 0] == goals[:, 1], 1, 2))
+
+        mask, p = walk_forward(results, GoalModel(prior_games=prior_games), line, min_history)
+        if mask.any():
+            scores["model/over"] = Score.binary(p["over"], over[mask])
+            scores["model/btts"] = Score.binary(p["btts"], btts[mask])
+            scores["model/1x2"] = Score.categorical(np.stack([p["home"], p["draw"], p["away"]], axis=1),
+                                                    outcome[mask])
+        if predictions:
+            index, p_over = llm_probabilities(results, predictions, line, league, season)
+            if len(index):
+                scores["llm/over"] = Score.binary(p_over, over[index])
+    return {"league": league, "season": season, "fixtures": len(results), "scores": scores}
+
+
+def backtest(archive: str, jobs: List[Tuple[int, int]], line: float = 2.5,
+             min_history: int = BACKTEST_MIN_HISTORY, predictions: Optional[List[Dict[str, Any]]] = None,
+             workers: int = BACKTEST_WORKERS) -> Dict[str, Any]:
+    """Evaluate every (league, season) job, on a process pool when workers > 1."""
+    start = time.perf_counter()
+    args = [(archive, league, season, line, min_history, predictions) for league, season in jobs]
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            seasons = list(pool.map(evaluate_season, *zip(*args)))
+    else:
+        seasons = [evaluate_season(*a) for a in args]
+    totals: Dict[str, Score] = {}
+    for result in seasons:
+        for name, score in result["scores"].items():
+            totals[name] = totals.get(name, Score()) + score
+    return {
+        "seasons": [dict(r, scores={k: s.as_dict() for k, s in r["scores"].items()}) for r in seasons],
+        "total": {k: s.as_dict() for k, s in sorted(totals.items())},
+        "fixtures": sum(r["fixtures"] for r in seasons),
+        "elapsed": round(time.perf_counter() - start, 3),
+    }
+
+
+def load_predictions(path: str) -> List[Dict[str, Any]]:
+    """Prediction rows from a JSON list, a {"matches": [...]} object or JSONL."""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    return data.get("matches", []) if isinstance(data, dict) else data
+
+
+def _ints(value: Optional[str]) -> List[int]:
+    return [int(x) for x in value.split(",")] if value else []
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Backtest predictions over archived seasons")
+    parser.add_argument("--archive", required=True, help="directory of <league>_<season>.json or a FixtureStore file")
+    parser.add_argument("--leagues", help="comma-separated league ids (default: everything archived)")
+    parser.add_argument("--seasons", help="comma-separated seasons (default: everything archived)")
+    parser.add_argument("--predictions", help="JSON/JSONL export of stored LLM predictions")
+    parser.add_argument("--line", type=float, default=2.5, help="over/under goal line")
+    parser.add_argument("--min-history", type=int, default=BACKTEST_MIN_HISTORY)
+    parser.add_argument("--workers", type=int, default=BACKTEST_WORKERS)
+    parser.add_argument("--fetch", action="store_true", help="download missing seasons into the archive directory")
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = parser.parse_args(argv)
+
+    leagues, seasons = _ints(args.leagues), _ints(args.seasons)
+    if args.fetch:
+        if not (leagues and seasons):
+            parser.error("--fetch needs --leagues and --seasons")
+        fetch_missing(args.archive, [(l, s) for l in leagues for s in seasons])
+    jobs = [(l, s) for l, s in archive_seasons(args.archive)
+            if (not leagues or l in leagues) and (not seasons or s in seasons)]
+    if not jobs:
+        print("[ERROR] No archived seasons match")
+        return 1
+    predictions = load_predictions(args.predictions) if args.predictions else None
+    report = backtest(args.archive, jobs, args.line, args.min_history, predictions, args.workers)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    for result in report["seasons"]:
+        print(f"{result['league']}/{result['season']}: {result['fixtures']} fixtures")
+        for name, score in result["scores"].items():
+            print(f"  {name:<12} {score}")
+    print(f"TOTAL ({report['fixtures']} fixtures in {report['elapsed']}s)")
+    for name, score in report["total"].items():
+        print(f"  {name:<12} {score}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
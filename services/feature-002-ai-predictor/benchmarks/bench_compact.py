@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cached season fixtures as JSON vs the columnar form.
+
+Builds a synthetic season per league (RapidAPI-shaped) and reports, for
+`--leagues` warm leagues:
+  - resident memory of the cached values (tracemalloc)
+  - size of the Redis value
+  - time to decode one cached value back into a Python object
+  - time to read one league as callers get it: decode plus, for the
+    columnar form, `to_response()` back into a RapidAPI-shaped envelope
+
+Usage:
+    python benchmarks/bench_compact.py [--leagues 5] [--fixtures 380] [--repeat 50]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from cache import CacheEntry  # noqa: E402
+from compact import Columns, FixtureColumns  # noqa: E402
+
+
+def season(league: int, n: int) -> dict:
+    return {"get": "fixtures", "parameters": {"league": str(league), "season": "2025"}, "errors": [],
+            "results": n, "response": [{
+                "fixture": {"id": league * 10000 + i, "referee": "Referee Name", "timezone": "UTC",
+                            "date": datetime.fromtimestamp(1755352800 + i * 3600, tz=timezone.utc).isoformat(),
+                            "timestamp": 1755352800 + i * 3600,
+                            "venue": {"id": 500 + i % 20, "name": "Some Stadium", "city": "Some City"},
+                            "status": {"long": "Not Started", "short": "NS", "elapsed": None}},
+                "league": {"id": league, "name": "League", "country": "Country", "logo": "https://x/l.png",
+                           "flag": "https://x/f.svg", "season": 2025, "round": f"Regular Season - {i // 10 + 1}"},
+                "teams": {"home": {"id": 40 + i % 20, "name": f"Team {i % 20}", "logo": "https://x/t.png", "winner": None},
+                          "away": {"id": 40 + (i + 7) % 20, "name": f"Team {(i + 7) % 20}", "logo": "https://x/t.png",
+                                   "winner": None}},
+                "goals": {"home": None, "away": None},
+                "score": {"halftime": {"home": None, "away": None}, "fulltime": {"home": None, "away": None},
+                          "extratime": {"home": None, "away": None}, "penalty": {"home": None, "away": None}},
+            } for i in range(n)]}
+
+
+def resident(build) -> int:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def decode_time(raw, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        CacheEntry.decode(raw)
+    return (time.perf_counter() - start) / repeat
+
+
+def read_time(raw, repeat: int) -> float:
+    """Decode plus expansion: what the fetcher pays per cache hit."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        value = CacheEntry.decode(raw).value
+        if isinstance(value, Columns):
+            value.to_response()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leagues", type=int, default=5)
+    parser.add_argument("--fixtures", type=int, default=380)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    payloads = [season(league, args.fixtures) for league in range(1, args.leagues + 1)]
+    wire_json = [CacheEntry(p).encode().encode("utf-8") for p in payloads]
+    wire_compact = [CacheEntry(FixtureColumns.from_response(p)).encode() for p in payloads]
+
+    rows = [
+        ("json", lambda: [CacheEntry.decode(raw) for raw in wire_json], wire_json),
+        ("columnar", lambda: [CacheEntry.decode(raw) for raw in wire_compact], wire_compact),
+    ]
+    for label, build, wire in rows:
+        memory = resident(build)
+        redis_bytes = sum(len(raw) for raw in wire)
+        decode = decode_time(wire[0], args.repeat)
+        read = read_time(wire[0], args.repeat)
+        print(f"{label:>9}: memory={memory / 1024:8.1f}KB redis={redis_bytes / 1024:8.1f}KB "
+              f"decode={decode * 1000:7.3f}ms read={read * 1000:7.3f}ms per league "
+              f"({args.leagues} leagues x {args.fixtures} fixtures)")
+
+
+if __name__ == "__main__":
+    main()
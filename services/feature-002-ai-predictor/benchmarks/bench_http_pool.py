@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark: EFootballFetcher latency with and without connection pooling.
+
+Starts a local keep-alive HTTP server that mimics the RapidAPI fixtures
+endpoint and reports p50/p99 latency for:
+  - pooled:   one shared session (keep-alive connections reused)
+  - unpooled: a fresh session per call (new TCP connection every time)
+
+The server is plain HTTP on loopback, so the numbers understate the real gap:
+against RapidAPI every unpooled call also pays a TLS handshake. Calls run one
+at a time by default so the latency is request plus connection setup; with
+`--threads N` the local server and the GIL are shared by N callers and their
+queueing hides the setup cost on loopback.
+
+Usage:
+    python benchmarks/bench_http_pool.py [--requests 500] [--threads 1] [--payload-kb 8]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from http_pool import build_session  # noqa: E402
+from main import EFootballFetcher  # noqa: E402
+
+
+def make_handler(body: bytes):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start_server(payload_kb: int):
+    fixture = {"fixture": {"id": 1, "date": "2025-08-16T14:00:00+00:00"}, "teams": {"home": {"id": 1}, "away": {"id": 2}}}
+    count = max(1, payload_kb * 1024 // len(json.dumps(fixture)))
+    body = json.dumps({"response": [fixture] * count}).encode()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(body))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def run(base_url: str, pooled: bool, total: int, threads: int):
+    shared = build_session(pool_maxsize=threads) if pooled else None
+
+    def one_call(_):
+        session = shared or requests.Session()
+        fetcher = EFootballFetcher("bench-key", session=session, base_url=base_url)
+        start = time.perf_counter()
+        fetcher.fetch_fixtures(39, 2025)
+        elapsed = time.perf_counter() - start
+        if not pooled:
+            session.close()
+        return elapsed
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        samples = list(pool.map(one_call, range(total)))
+    if shared:
+        shared.close()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--payload-kb", type=int, default=8)
+    args = parser.parse_args()
+
+    server = start_server(args.payload_kb)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        for pooled in (False, True):
+            samples = run(base_url, pooled, args.requests, args.threads)
+            label = "pooled" if pooled else "unpooled"
+            print(f"{label:>9}: p50={percentile(samples, 50) * 1000:7.2f}ms "
+                  f"p99={percentile(samples, 99) * 1000:7.2f}ms n={len(samples)}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
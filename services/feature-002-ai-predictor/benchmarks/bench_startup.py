@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark: import time and cold start of app.py.
+
+Each sample is a fresh interpreter (as for a serverless cold start or a new
+gunicorn worker) and reports:
+  - import:      `import app`
+  - first /api/health: import plus the first request, which builds no clients
+  - first /api/ready:  import plus building every external client
+
+for two paths:
+  - lazy:  the app as it is (SDKs, clients and numpy loaded on first use)
+  - eager: the same app with what it used to load at import time done up
+           front: the SDK modules, numpy (goal_model) and every client
+
+Run with DEMO_MODE=1 and no real credentials, so client construction is
+measured rather than network round trips.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 10]
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+CHILD = """
+import os, json, time, importlib
+start = time.perf_counter()
+if os.environ.get("BENCH_EAGER") == "1":
+    import goal_model
+    for name in ("google.generativeai", "redis", "supabase"):
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+import app
+if os.environ.get("BENCH_EAGER") == "1":
+    app.warm(app.CLIENTS.values())
+imported = time.perf_counter()
+client = app.app.test_client()
+client.get("/api/health")
+health = time.perf_counter()
+client.get("/api/ready")
+ready = time.perf_counter()
+print(json.dumps({"import": imported - start, "first /api/health": health - start, "first /api/ready": ready - start}))
+"""
+
+
+def sample(env):
+    out = subprocess.run([sys.executable, "-c", CHILD], cwd=APP_DIR, env=env,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    for path, eager in (("lazy", "0"), ("eager", "1")):
+        env = dict(os.environ, DEMO_MODE="1", PREFETCH_ENABLED="0", BENCH_EAGER=eager)
+        samples = [sample(env) for _ in range(args.runs)]
+        for name in samples[0]:
+            values = sorted(s[name] for s in samples)
+            print(f"{path:>5} {name:>18}: median={statistics.median(values) * 1000:7.1f}ms "
+                  f"max={values[-1] * 1000:7.1f}ms n={len(values)}")
+
+
+if __name__ == "__main__":
+    main()
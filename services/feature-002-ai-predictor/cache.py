@@ -0,0 +1,515 @@
+#!/usr/bin/env python3
+"""
+Read-through response cache for RapidAPI endpoints.
+
+Entries are keyed by endpoint + query params and expire after a TTL chosen
+per data kind (standings change within minutes, season stats within hours).
+Storage is a chain of tiers (in-process LRU, Redis, then Supabase
+`api_cache`); a hit in a lower tier is copied back into the tiers above it.
+
+Columnar values (`compact.Columns`) are stored in Redis as a binary frame
+and in Supabase as base64 instead of JSON.
+
+Entries carry the time they were stored, which enables stale-while-revalidate:
+once an entry is older than its TTL it is still served for a refresh window
+while a background refresh replaces it, and (up to a hard max staleness) it
+is served when upstream fails.
+"""
+import os
+import json
+import time
+import asyncio
+import base64
+import struct
+import logging
+import threading
+import functools
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from singleflight import SingleFlight, AsyncSingleFlight
+from compact import Columns, COMPACT_TYPES
+
+# TTL per data kind (seconds). Override with CACHE_TTL_<KIND>, e.g. CACHE_TTL_STANDINGS=300.
+CACHE_TTLS: Dict[str, int] = {
+    "fixtures": 3600,
+    "fixtures/statistics": 24 * 3600,
+    "standings": 10 * 60,
+    "players": 6 * 3600,
+    "teams/statistics": 6 * 3600,
+    "predictions": 6 * 3600,
+}
+DEFAULT_TTL = 3600
+
+# Serve stale entries for this long past their TTL while refreshing in background
+STALE_WHILE_REVALIDATE = int(os.getenv("CACHE_STALE_WHILE_REVALIDATE", "3600"))
+# Never serve data older than this (also the physical lifetime in shared tiers)
+MAX_STALENESS = int(os.getenv("CACHE_MAX_STALENESS", str(24 * 3600)))
+# Threads for blocking tier/store I/O awaited from the event loop (ASGI mode)
+CACHE_IO_THREADS = int(os.getenv("CACHE_IO_THREADS", "16"))
+
+
+# === BLOCKING I/O FROM THE EVENT LOOP ===
+# The Redis and Supabase clients block. Awaited callers run them on this
+# dedicated, sized pool rather than asyncio's default executor, which is
+# shared with everything else using asyncio.to_thread.
+_io_executor: Optional[ThreadPoolExecutor] = None
+_io_lock = threading.Lock()
+
+
+def io_executor() -> ThreadPoolExecutor:
+    """The blocking-I/O pool (CACHE_IO_THREADS workers), created on first use."""
+    global _io_executor
+    if _io_executor is None:
+        with _io_lock:
+            if _io_executor is None:
+                _io_executor = ThreadPoolExecutor(max_workers=CACHE_IO_THREADS, thread_name_prefix="cache-io")
+    return _io_executor
+
+
+async def run_io(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Await blocking `fn(*args, **kwargs)` on the I/O pool, in a copy of the current context."""
+    call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(io_executor(), call)
+
+
+def ttl_for(kind: str) -> int:
+    """Return the cache TTL (seconds) for a data kind / endpoint."""
+    env = os.getenv("CACHE_TTL_" + kind.upper().replace("/", "_"))
+    return int(env) if env else CACHE_TTLS.get(kind, DEFAULT_TTL)
+
+
+def cache_key(endpoint: str, params: Dict[str, Any]) -> str:
+    """Build a stable cache key from endpoint and params (order-independent)."""
+    query = "&".join(f"{k}={params[k]}" for k in sorted(params))
+    return f"rapidapi:{endpoint}:{query}"
+
+
+def is_cacheable(payload: Any) -> bool:
+    """RapidAPI reports quota/param problems with HTTP 200 + `errors`; never cache those."""
+    return isinstance(payload, Columns) or (isinstance(payload, dict) and not payload.get("errors"))
+
+
+class CacheEntry:
+    """A cached value plus the wall-clock time it was fetched."""
+
+    __slots__ = ("value", "stored_at")
+
+    def __init__(self, value: Any, stored_at: Optional[float] = None):
+        self.value = value
+        self.stored_at = time.time() if stored_at is None else stored_at
+
+    @property
+    def age(self) -> float:
+        return max(0.0, time.time() - self.stored_at)
+
+    def to_json(self) -> str:
+        return json.dumps({"t": self.stored_at, "v": self.value})
+
+    def encode(self) -> Union[str, bytes]:
+        """Wire form for Redis: a binary frame for columnar values, JSON otherwise."""
+        if isinstance(self.value, Columns):
+            return _BINARY_MAGIC + self.value.TAG + _STORED_AT.pack(self.stored_at) + self.value.to_bytes()
+        return self.to_json()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-safe form for Supabase."""
+        if isinstance(self.value, Columns):
+            return {"t": self.stored_at, "c": self.value.TAG.decode("ascii"),
+                    "b": base64.b64encode(self.value.to_bytes()).decode("ascii")}
+        return {"t": self.stored_at, "v": self.value}
+
+    @classmethod
+    def decode(cls, raw) -> Optional["CacheEntry"]:
+        if isinstance(raw, (bytes, bytearray)) and raw[:len(_BINARY_MAGIC)] == _BINARY_MAGIC:
+            start = len(_BINARY_MAGIC)
+            kind = COMPACT_TYPES.get(bytes(raw[start:start + 4]))
+            if kind is None:
+                return None
+            (stored_at,) = _STORED_AT.unpack_from(raw, start + 4)
+            return cls(kind.from_bytes(bytes(raw[start + 4 + _STORED_AT.size:])), stored_at)
+        return cls.from_json(raw)
+
+    @classmethod
+    def from_json(cls, raw) -> Optional["CacheEntry"]:
+        return cls.from_dict(json.loads(raw))
+
+    @classmethod
+    def from_dict(cls, data) -> Optional["CacheEntry"]:
+        if isinstance(data, dict) and "b" in data and "t" in data:
+            kind = COMPACT_TYPES.get(str(data.get("c", "")).encode("ascii"))
+            return cls(kind.from_bytes(base64.b64decode(data["b"])), data["t"]) if kind else None
+        if not isinstance(data, dict) or "v" not in data or "t" not in data:
+            return None  # pre-SWR entry without a timestamp
+        return cls(data["v"], data["t"])
+
+
+_BINARY_MAGIC = b"CE1"
+_STORED_AT = struct.Struct("<d")
+
+
+# === DATA AGE TRACKING ===
+# Request handlers call start_age_tracking(); every cache read in that context
+# (including fan-out workers, which copy the context) records the oldest data
+# it served so the response can report it, and the version (stored_at) of
+# each entry so the response can be given validators (ETag/Last-Modified).
+_data_age: contextvars.ContextVar = contextvars.ContextVar("data_age", default=None)
+
+
+def start_age_tracking() -> Dict[str, Any]:
+    holder = {"age": None, "stale": False, "versions": {}}
+    _data_age.set(holder)
+    return holder
+
+
+def tracked_age() -> Optional[Dict[str, Any]]:
+    return _data_age.get()
+
+
+def record_version(key: str, version: float) -> None:
+    """Note that data `key` at `version` (a modification time) went into this response."""
+    holder = _data_age.get()
+    if holder is not None:
+        holder["versions"][key] = version
+
+
+def record_age(age: float, stale: bool) -> None:
+    """Note the age of data served from outside the cache (e.g. the fixture store)."""
+    _record_age(age, stale)
+
+
+def _record_age(age: float, stale: bool, key: Optional[str] = None, entry: Optional["CacheEntry"] = None) -> None:
+    holder = _data_age.get()
+    if holder is None:
+        return
+    if holder["age"] is None or age > holder["age"]:
+        holder["age"] = age
+    holder["stale"] = holder["stale"] or stale
+    if key is not None and entry is not None:
+        holder["versions"][key] = entry.stored_at
+
+
+class MemoryTier:
+    """In-process LRU tier holding already-parsed objects.
+
+    Bounded by an approximate byte budget (JSON-encoded size of each value)
+    and by `max_ttl`, so entries never outlive the shared tiers by much.
+    Values are returned as-is: callers must treat them as read-only.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_ttl: int = 300):
+        self.max_bytes = max_bytes
+        self.max_ttl = max_ttl
+        self.size = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            entry, expires_at, nbytes = item
+            if expires_at <= time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry, expire_in: float) -> None:
+        if isinstance(entry.value, Columns):
+            nbytes = entry.value.nbytes
+        else:
+            nbytes = len(json.dumps(entry.value, separators=(",", ":")))
+        if nbytes > self.max_bytes:
+            return
+        expires_at = time.monotonic() + min(expire_in, self.max_ttl)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (entry, expires_at, nbytes)
+            self.size += nbytes
+            while self.size > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+
+    def _drop(self, key: str) -> None:
+        _, _, nbytes = self._entries.pop(key)
+        self.size -= nbytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisTier:
+    """Cache tier backed by a redis client (JSON or binary values, native expiry)."""
+
+    name = "redis"
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        cached = self.client.get(key)
+        return CacheEntry.decode(cached) if cached else None
+
+    def set(self, key: str, entry: CacheEntry, expire_in: float) -> None:
+        self.client.setex(key, max(1, int(expire_in)), entry.encode())
+
+
+class SupabaseTier:
+    """Cache tier backed by the Supabase `api_cache` table."""
+
+    name = "supabase"
+
+    def __init__(self, client, table: str = "api_cache"):
+        self.client = client
+        self.table = table
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        result = (self.client.table(self.table).select('value')
+                  .eq('key', key).gt('expires_at', datetime.now().isoformat()).execute())
+        return CacheEntry.from_dict(result.data[0]['value']) if result.data else None
+
+    def set(self, key: str, entry: CacheEntry, expire_in: float) -> None:
+        self.client.table(self.table).upsert({
+            "key": key,
+            "value": entry.to_dict(),
+            "expires_at": (datetime.now() + timedelta(seconds=expire_in)).isoformat()
+        }).execute()
+
+
+class TieredCache:
+    """Read-through cache over an ordered list of tiers (fastest first).
+
+    Tier failures are logged and treated as misses so an unavailable Redis or
+    Supabase never fails a request. Hits and misses are counted per tier.
+
+    Misses are coalesced: concurrent loads of one key inside the process share
+    a single call, and with a `lock` (singleflight.RedisLock) only one worker
+    across the deployment calls upstream while the others wait for its result.
+
+    Freshness: age < ttl is fresh; ttl <= age < ttl + stale_while_revalidate
+    is served immediately and refreshed in the background; anything older is
+    reloaded, falling back to the stale entry (up to max_stale) if the load
+    fails.
+    """
+
+    def __init__(self, tiers: Optional[List[Any]] = None, lock=None,
+                 stale_while_revalidate: int = STALE_WHILE_REVALIDATE,
+                 max_stale: int = MAX_STALENESS):
+        self.tiers = [t for t in (tiers or []) if t is not None]
+        self.lock = lock
+        self.stale_while_revalidate = stale_while_revalidate
+        self.max_stale = max_stale
+        self.flight = SingleFlight()
+        self.aflight = AsyncSingleFlight()
+        self._refreshes = set()
+        self._counts = {tier.name: {"hits": 0, "misses": 0} for tier in self.tiers}
+
+    def lifetime(self, ttl: int) -> int:
+        """How long tiers keep an entry (covers the stale window)."""
+        return max(ttl, self.max_stale)
+
+    def lookup(self, key: str, ttl: Optional[int] = None, count: bool = True) -> Optional[CacheEntry]:
+        """Return the newest stored entry for `key` regardless of freshness."""
+        for i, tier in enumerate(self.tiers):
+            try:
+                entry = tier.get(key)
+            except Exception as e:
+                logging.warning(f"{tier.name} cache get failed: {e}")
+                entry = None
+            if entry is None:
+                if count:
+                    self._counts[tier.name]["misses"] += 1
+                continue
+            if count:
+                self._counts[tier.name]["hits"] += 1
+            if i:
+                logging.info(f"{tier.name} cache hit: {key}")
+                if ttl:
+                    self._set_tiers(self.tiers[:i], key, entry, self.lifetime(ttl) - entry.age)
+            return entry
+        return None
+
+    def get(self, key: str, ttl: Optional[int] = None, count: bool = True) -> Optional[Any]:
+        """Return the cached value if present and (given a ttl) still fresh."""
+        entry = self.lookup(key, ttl, count)
+        if entry is None or (ttl is not None and entry.age >= ttl):
+            return None
+        return entry.value
+
+    def set(self, key: str, value: Any, ttl: int) -> CacheEntry:
+        entry = CacheEntry(value)
+        self._set_tiers(self.tiers, key, entry, self.lifetime(ttl))
+        return entry
+
+    def _set_tiers(self, tiers, key: str, entry: CacheEntry, expire_in: float) -> None:
+        if expire_in <= 0:
+            return
+        for tier in tiers:
+            try:
+                tier.set(key, entry, expire_in)
+            except Exception as e:
+                logging.warning(f"{tier.name} cache set failed: {e}")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hit/miss counters and hit ratio per tier."""
+        out = {}
+        for name, counts in self._counts.items():
+            total = counts["hits"] + counts["misses"]
+            out[name] = dict(counts, hit_ratio=round(counts["hits"] / total, 4) if total else 0.0)
+        return out
+
+    def get_or_load(self, key: str, loader: Callable[[], Any], ttl: int,
+                    cacheable: Callable[[Any], bool] = is_cacheable) -> Any:
+        """Return the cached value for `key`, or call `loader` and cache its result."""
+        entry = self.lookup(key, ttl)
+        if entry is not None:
+            age = entry.age
+            if age < ttl:
+                _record_age(age, False, key, entry)
+                return entry.value
+            if age < min(ttl + self.stale_while_revalidate, self.max_stale):
+                _record_age(age, True, key, entry)
+                self._refresh_in_background(key, loader, ttl, cacheable)
+                return entry.value
+
+        result = self.flight.do(key, lambda: self._load(key, loader, ttl, cacheable, entry))
+        if isinstance(result, CacheEntry):
+            _record_age(result.age, result.age >= ttl, key, result)
+            return result.value
+        return result
+
+    def _refresh_in_background(self, key: str, loader: Callable[[], Any], ttl: int,
+                               cacheable: Callable[[Any], bool]) -> None:
+        if self.flight.is_running(key):
+            return
+
+        def refresh():
+            try:
+                self.flight.do(key, lambda: self._load(key, loader, ttl, cacheable, None, force=True))
+            except Exception as e:
+                logging.warning(f"Background refresh failed for {key}: {e}")
+
+        threading.Thread(target=refresh, name=f"refresh:{key}", daemon=True).start()
+
+    def _load(self, key: str, loader: Callable[[], Any], ttl: int,
+              cacheable: Callable[[Any], bool], stale: Optional[CacheEntry],
+              force: bool = False) -> Any:
+        """Load through `loader`; returns a CacheEntry, or the raw uncacheable value."""
+        # A previous flight may have filled the cache between our miss and now
+        if not force:
+            entry = self._fresh_entry(key, ttl)
+            if entry is not None:
+                return entry
+
+        token = None
+        if self.lock is not None:
+            try:
+                token = self.lock.acquire(key)
+                if token is None:
+                    entry = self.lock.wait_for(key, lambda: self._fresh_entry(key, ttl))
+                    if entry is not None:
+                        return entry
+            except Exception as e:
+                logging.warning(f"Cache lock failed for {key}: {e}")
+
+        try:
+            try:
+                value = loader()
+            except Exception:
+                if stale is not None and stale.age < self.max_stale:
+                    logging.warning(f"Upstream failed, serving stale {key} ({stale.age:.0f}s old)")
+                    return stale
+                raise
+            if cacheable(value):
+                return self.set(key, value, ttl)
+            if stale is not None and stale.age < self.max_stale:
+                logging.warning(f"Upstream returned errors, serving stale {key} ({stale.age:.0f}s old)")
+                return stale
+            return value
+        finally:
+            if token is not None:
+                try:
+                    self.lock.release(key, token)
+                except Exception as e:
+                    logging.warning(f"Cache lock release failed for {key}: {e}")
+
+    # --- async (ASGI mode) ---
+
+    async def aget_or_load(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: int,
+                           cacheable: Callable[[Any], bool] = is_cacheable) -> Any:
+        """`get_or_load` for a coroutine `loader`.
+
+        Tier reads and writes run on the I/O pool (the Redis and Supabase
+        clients block); the load itself is awaited and coalesced per key within
+        the event loop. The cross-worker Redis lock is not taken on this path.
+        """
+        entry = await run_io(self.lookup, key, ttl)
+        if entry is not None:
+            age = entry.age
+            if age < ttl:
+                _record_age(age, False, key, entry)
+                return entry.value
+            if age < min(ttl + self.stale_while_revalidate, self.max_stale):
+                _record_age(age, True, key, entry)
+                self._arefresh_in_background(key, loader, ttl, cacheable)
+                return entry.value
+
+        result = await self.aflight.do(key, lambda: self._aload(key, loader, ttl, cacheable, entry))
+        if isinstance(result, CacheEntry):
+            _record_age(result.age, result.age >= ttl, key, result)
+            return result.value
+        return result
+
+    def _arefresh_in_background(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: int,
+                                cacheable: Callable[[Any], bool]) -> None:
+        if self.aflight.is_running(key):
+            return
+
+        async def refresh():
+            try:
+                await self.aflight.do(key, lambda: self._aload(key, loader, ttl, cacheable, None, force=True))
+            except Exception as e:
+                logging.warning(f"Background refresh failed for {key}: {e}")
+
+        # Keep a reference so the task is not garbage collected mid-flight
+        task = asyncio.ensure_future(refresh())
+        self._refreshes.add(task)
+        task.add_done_callback(self._refreshes.discard)
+
+    async def _aload(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: int,
+                     cacheable: Callable[[Any], bool], stale: Optional[CacheEntry],
+                     force: bool = False) -> Any:
+        """`_load` for a coroutine `loader`."""
+        if not force:
+            entry = await run_io(self._fresh_entry, key, ttl)
+            if entry is not None:
+                return entry
+        try:
+            value = await loader()
+        except Exception:
+            if stale is not None and stale.age < self.max_stale:
+                logging.warning(f"Upstream failed, serving stale {key} ({stale.age:.0f}s old)")
+                return stale
+            raise
+        if cacheable(value):
+            return await run_io(self.set, key, value, ttl)
+        if stale is not None and stale.age < self.max_stale:
+            logging.warning(f"Upstream returned errors, serving stale {key} ({stale.age:.0f}s old)")
+            return stale
+        return value
+
+    def _fresh_entry(self, key: str, ttl: int) -> Optional[CacheEntry]:
+        entry = self.lookup(key, ttl, count=False)
+        return entry if entry is not None and entry.age < ttl else None
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Circuit breakers with adaptive timeouts for upstream calls.
+
+One breaker per upstream endpoint (e.g. `rapidapi:fixtures`, `gemini:generate`).
+After enough consecutive failures the circuit opens and calls fail fast with
+`CircuitOpenError`, so callers fall back to cached/stale data instead of
+blocking a worker for the full timeout. After `reset_timeout` a single probe
+call is let through (half-open); its outcome closes or re-opens the circuit.
+
+Timeouts follow observed latency: once enough samples exist, the timeout is
+a multiple of the latency percentile, clamped between a floor and the
+configured ceiling.
+"""
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+LATENCY_WINDOW = int(os.getenv("CIRCUIT_LATENCY_WINDOW", "100"))
+TIMEOUT_PERCENTILE = float(os.getenv("ADAPTIVE_TIMEOUT_PERCENTILE", "99"))
+TIMEOUT_MULTIPLIER = float(os.getenv("ADAPTIVE_TIMEOUT_MULTIPLIER", "3"))
+TIMEOUT_FLOOR = float(os.getenv("ADAPTIVE_TIMEOUT_MIN", "2"))
+TIMEOUT_MIN_SAMPLES = int(os.getenv("ADAPTIVE_TIMEOUT_MIN_SAMPLES", "20"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a latency-derived timeout."""
+
+    def __init__(self, name: str, failure_threshold: Optional[int] = None,
+                 reset_timeout: Optional[float] = None, window: int = LATENCY_WINDOW):
+        self.name = name
+        self.failure_threshold = failure_threshold or FAILURE_THRESHOLD
+        self.reset_timeout = reset_timeout if reset_timeout is not None else RESET_TIMEOUT
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now (claims the probe when half-open)."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._probing = False
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self, latency: Optional[float] = None) -> None:
+        with self._lock:
+            if latency is not None:
+                self._latencies.append(latency)
+            if self.state != CLOSED:
+                logging.info(f"Circuit {self.name} closed")
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logging.warning(f"Circuit {self.name} opened after {self.failures} failures")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def cancel(self) -> None:
+        """Give back a claimed half-open probe without an outcome (caller went away)."""
+        with self._lock:
+            self._probing = False
+
+    def latency_percentile(self, percentile: float = TIMEOUT_PERCENTILE) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._latencies)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(percentile / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+    def timeout(self, ceiling: float) -> float:
+        """Adaptive timeout: percentile latency x multiplier, within [floor, ceiling]."""
+        if len(self._latencies) < TIMEOUT_MIN_SAMPLES:
+            return ceiling
+        observed = self.latency_percentile() * TIMEOUT_MULTIPLIER
+        return max(min(TIMEOUT_FLOOR, ceiling), min(ceiling, observed))
+
+    def call(self, fn: Callable[[float], Any], ceiling: float,
+             is_failure: Optional[Callable[[Any], bool]] = None) -> Any:
+        """Run `fn(timeout)` through the breaker.
+
+        Exceptions count as failures and are re-raised; `is_failure` can mark
+        a returned value (e.g. an HTTP 5xx response) as a failure too.
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit {self.name} is open")
+        start = time.monotonic()
+        try:
+            result = fn(self.timeout(ceiling))
+        except Exception:
+            self.record_failure()
+            raise
+        if is_failure is not None and is_failure(result):
+            self.record_failure()
+        else:
+            self.record_success(time.monotonic() - start)
+        return result
+
+    async def acall(self, fn: Callable[[float], Awaitable[Any]], ceiling: float,
+                    is_failure: Optional[Callable[[Any], bool]] = None) -> Any:
+        """`call` for a coroutine function `fn(timeout)` (async fetcher and model calls)."""
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit {self.name} is open")
+        start = time.monotonic()
+        try:
+            result = await fn(self.timeout(ceiling))
+        except asyncio.CancelledError:
+            self.cancel()
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        if is_failure is not None and is_failure(result):
+            self.record_failure()
+        else:
+            self.record_success(time.monotonic() - start)
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        p = self.latency_percentile(99)
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "samples": len(self._latencies),
+            "latency_p99": round(p, 3) if p is not None else None,
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(name: str) -> CircuitBreaker:
+    """Return the process-wide breaker for `name`, creating it on first use."""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(name, CircuitBreaker(name))
+    return breaker
+
+
+def circuit_states() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of every breaker (for /api/health)."""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {b.name: b.snapshot() for b in breakers}
+
+
+def reset_breakers() -> None:
+    """Drop all breakers (tests)."""
+    with _breakers_lock:
+        _breakers.clear()
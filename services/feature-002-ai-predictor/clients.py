@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Lazily built external clients (Gemini, Redis, Supabase) and the objects
+wired to them.
+
+Building these at import time made every cold start (serverless, gunicorn
+workers, tests) pay for SDK imports and client construction before the
+first request. A `LazyClient` runs its factory on first use instead, once,
+under a lock so concurrent first requests build a single instance, and
+forwards attribute access to what it built. A factory that fails is logged
+and leaves the client as None, the same as an unavailable optional
+dependency, until LAZY_CLIENT_RETRY_AFTER seconds have passed: the next use
+after that builds it again, so a dependency that was down at first use
+(Redis restarting, a network blip) is picked up without a restart. A factory
+that returns None (not configured) is not retried; `reset()` forces another
+attempt either way.
+"""
+import os
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+_UNSET = object()
+# Seconds before a client whose factory raised is built again
+LAZY_CLIENT_RETRY_AFTER = float(os.getenv("LAZY_CLIENT_RETRY_AFTER", "30"))
+
+
+class LazyClient:
+    """Build `factory()` on first use and forward attribute access to it."""
+
+    def __init__(self, factory: Callable[[], Any], name: str, required: bool = False,
+                 retry_after: float = LAZY_CLIENT_RETRY_AFTER):
+        self._factory = factory
+        self._name = name
+        self._required = required
+        self._retry_after = retry_after
+        self._lock = threading.Lock()
+        self._value: Any = _UNSET
+        self._error: Optional[str] = None
+        self._failed_at: Optional[float] = None
+        self._build_seconds: Optional[float] = None
+
+    def resolve(self) -> Any:
+        """The client (None if unavailable), building it on the first call and retrying failures."""
+        value = self._value
+        if value is not _UNSET and not self._retry_due():
+            return value
+        with self._lock:
+            if self._value is _UNSET or self._retry_due():
+                start = time.perf_counter()
+                try:
+                    self._value = self._factory()
+                    self._error, self._failed_at = None, None
+                except Exception as e:
+                    logging.warning(f"{self._name} client init failed: {e}"
+                                    f" (retrying after {self._retry_after:g}s)")
+                    self._error = str(e)
+                    self._failed_at = time.monotonic()
+                    self._value = None
+                self._build_seconds = time.perf_counter() - start
+            return self._value
+
+    def _retry_due(self) -> bool:
+        failed_at = self._failed_at
+        return failed_at is not None and time.monotonic() - failed_at >= self._retry_after
+
+    @property
+    def initialized(self) -> bool:
+        return self._value is not _UNSET
+
+    def reset(self) -> None:
+        """Drop the built client so the next use builds it again."""
+        with self._lock:
+            self._value, self._error, self._failed_at, self._build_seconds = _UNSET, None, None, None
+
+    def state(self) -> Dict[str, Any]:
+        """Init state without building anything."""
+        if not self.initialized:
+            return {"state": "pending", "required": self._required}
+        return {"state": "ok" if self._value is not None else ("failed" if self._error else "unavailable"),
+                "required": self._required, "init_ms": round(self._build_seconds * 1000, 1),
+                **({"error": self._error} if self._error else {})}
+
+    def __getattr__(self, attr: str) -> Any:
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        value = self.resolve()
+        if value is None:
+            raise AttributeError(f"{self._name} client is not available")
+        return getattr(value, attr)
+
+    def __bool__(self) -> bool:
+        return self.resolve() is not None
+
+    def __repr__(self) -> str:
+        return f"LazyClient({self._name}, {self.state()['state']})"
+
+
+def client_states(clients: Dict[str, LazyClient]) -> Dict[str, Dict[str, Any]]:
+    return {name: client.state() for name, client in clients.items()}
+
+
+def warm(clients: Iterable[LazyClient]) -> None:
+    """Build every client now (readiness checks, pre-forked workers)."""
+    for client in clients:
+        client.resolve()
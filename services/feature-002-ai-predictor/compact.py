@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Compact columnar form of season fixtures and standings.
+
+A season of fixtures as RapidAPI JSON is a few hundred nested dicts (several
+hundred bytes of Python objects per fixture). Cached in this form it is a
+handful of `array` columns (fixture ids, team ids, kickoff timestamps, status
+codes, scores) plus a small table of team names, and serialises to a compact
+binary frame for Redis/Supabase instead of JSON.
+
+The form is lossless: `to_response()` rebuilds the payload the API returned.
+Fields without a column (venue, referee, score, winner, periods, a date in
+another timezone, standings status/update, ...) are kept per row as a
+"residual", the part of the row the columns cannot rebuild, as compact JSON
+interned in a table (fixtures of a venue and status mostly share one). The
+saving is mostly memory and Redis size: a cache hit still pays for the
+expansion (see benchmarks/bench_compact.py).
+"""
+import os
+import sys
+import json
+import math
+import struct
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+_HEADER = struct.Struct("<II")  # rows, metadata bytes
+_NONE = -32768  # missing id/score/stat in integer columns (goal difference can be negative)
+
+
+class Columns:
+    """Base class: named `array` columns of equal length plus JSON metadata.
+
+    Subclasses define COLUMNS as (name, typecode) pairs and TAG (4 bytes)
+    identifying them in serialised cache entries.
+    """
+
+    __slots__ = ("cols", "meta")
+
+    TAG = b"????"
+    COLUMNS: Tuple[Tuple[str, str], ...] = ()
+
+    def __init__(self, cols: Optional[Dict[str, array]] = None, meta: Optional[Dict[str, Any]] = None):
+        self.cols = cols or {name: array(code) for name, code in self.COLUMNS}
+        self.meta = meta or {}
+
+    def __len__(self) -> int:
+        first = self.COLUMNS[0][0]
+        return len(self.cols[first])
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate in-memory size (column buffers + metadata)."""
+        return sum(c.itemsize * len(c) for c in self.cols.values()) + len(json.dumps(self.meta))
+
+    def to_bytes(self) -> bytes:
+        meta = json.dumps(self.meta, separators=(",", ":")).encode("utf-8")
+        parts = [_HEADER.pack(len(self), len(meta)), meta]
+        for name, _ in self.COLUMNS:
+            col = self.cols[name]
+            if sys.byteorder != "little":
+                col = array(col.typecode, col)
+                col.byteswap()
+            parts.append(col.tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "Columns":
+        rows, meta_len = _HEADER.unpack_from(raw, 0)
+        offset = _HEADER.size
+        meta = json.loads(raw[offset:offset + meta_len].decode("utf-8"))
+        offset += meta_len
+        cols = {}
+        for name, code in cls.COLUMNS:
+            col = array(code)
+            size = col.itemsize * rows
+            col.frombytes(raw[offset:offset + size])
+            if sys.byteorder != "little":
+                col.byteswap()
+            cols[name] = col
+            offset += size
+        return cls(cols, meta)
+
+
+def _intern(table: List[Any], index: Dict[Any, int], value: Any) -> int:
+    """Code of `value` in a lookup table, adding it if new."""
+    code = index.get(value)
+    if code is None:
+        code = index[value] = len(table)
+        table.append(value)
+    return code
+
+
+_SAME = object()
+_DROP = "$drop"  # residual key listing keys the rebuild adds but the original lacked
+
+
+def _residual(original: Any, rebuilt: Any) -> Any:
+    """The parts of `original` that `rebuilt` lacks or gets wrong (`_SAME` if it matches)."""
+    if not isinstance(original, dict) or not isinstance(rebuilt, dict):
+        return _SAME if original == rebuilt and type(original) is type(rebuilt) else original
+    out = {}
+    for key, value in original.items():
+        if key not in rebuilt:
+            out[key] = value
+            continue
+        diff = _residual(value, rebuilt[key])
+        if diff is not _SAME:
+            out[key] = diff
+    dropped = [key for key in rebuilt if key not in original]
+    if dropped:
+        out[_DROP] = dropped
+    return out or _SAME
+
+
+def _merge(rebuilt: Dict[str, Any], residual: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply a `_residual` to a freshly rebuilt row (in place)."""
+    for key, value in residual.items():
+        if type(value) is dict:
+            base = rebuilt.get(key)
+            if type(base) is dict:
+                _merge(base, value)
+                continue
+        elif key == _DROP:
+            for dropped in value:
+                rebuilt.pop(dropped, None)
+            continue
+        rebuilt[key] = value
+    return rebuilt
+
+
+def _intern_residual(table: List[str], index: Dict[str, int], original: Any, rebuilt: Any) -> int:
+    """Code of a row's residual in the extras table (0 = nothing to add)."""
+    diff = _residual(original, rebuilt)
+    if diff is _SAME:
+        return 0
+    return _intern(table, index, json.dumps(diff, separators=(",", ":"), ensure_ascii=False))
+
+
+def _apply_residuals(rows: List[Dict[str, Any]], codes: array, extras: List[str]) -> None:
+    # One parse for all rows: each row gets its own containers without a
+    # json.loads call per row.
+    residuals = json.loads("[" + ",".join([extras[code] if code else "null" for code in codes]) + "]")
+    for row, residual in zip(rows, residuals):
+        if residual:
+            _merge(row, residual)
+
+
+def _int(value: Any) -> int:
+    return _NONE if value is None else int(value)
+
+
+def _opt(value: int) -> Optional[int]:
+    return None if value == _NONE else value
+
+
+class FixtureColumns(Columns):
+    """Season fixtures as columns: ids, league, teams, kickoff, status, round, goals, residual."""
+
+    __slots__ = ()
+
+    TAG = b"FXC2"
+    COLUMNS = (
+        ("id", "i"),
+        ("league", "i"),
+        ("home", "i"),
+        ("away", "i"),
+        ("kickoff", "d"),
+        ("status", "B"),
+        ("round", "H"),
+        ("home_goals", "h"),
+        ("away_goals", "h"),
+        ("extra", "I"),
+    )
+
+    @classmethod
+    def from_response(cls, payload: Dict[str, Any]) -> "FixtureColumns":
+        out = cls()
+        c = out.cols
+        leagues, teams = {}, {}
+        statuses, status_index = [], {}
+        rounds, round_index = [], {}
+        kept = []
+        for item in payload.get("response", []):
+            fixture = item.get("fixture", {})
+            league = item.get("league", {})
+            home = item.get("teams", {}).get("home", {})
+            away = item.get("teams", {}).get("away", {})
+            goals = item.get("goals", {}) or {}
+            if fixture.get("id") is None:
+                continue
+            leagues.setdefault(str(league.get("id")), {k: v for k, v in league.items() if k != "round"})
+            for team in (home, away):
+                teams.setdefault(str(team.get("id")), [team.get("name"), team.get("logo")])
+            kickoff = fixture.get("timestamp")
+            if kickoff is None and fixture.get("date"):
+                kickoff = datetime.fromisoformat(fixture["date"]).timestamp()
+            status = fixture.get("status", {}) or {}
+            c["id"].append(int(fixture["id"]))
+            c["league"].append(_int(league.get("id")))
+            c["home"].append(_int(home.get("id")))
+            c["away"].append(_int(away.get("id")))
+            c["kickoff"].append(float(kickoff) if kickoff is not None else math.nan)
+            c["status"].append(_intern(statuses, status_index, (status.get("short"), status.get("long"))))
+            c["round"].append(_intern(rounds, round_index, league.get("round")))
+            c["home_goals"].append(_int(goals.get("home")))
+            c["away_goals"].append(_int(goals.get("away")))
+            kept.append(item)
+        out.meta = {
+            "parameters": payload.get("parameters", {}),
+            "leagues": leagues,
+            "teams": teams,
+            "statuses": [list(s) for s in statuses],
+            "rounds": rounds,
+        }
+        extras, extra_index = [""], {}
+        for item, rebuilt in zip(kept, out._rows()):
+            c["extra"].append(_intern_residual(extras, extra_index, item, rebuilt))
+        out.meta["extras"] = extras
+        return out
+
+    def _rows(self) -> List[Dict[str, Any]]:
+        """The fixtures as far as the columns go (no residuals)."""
+        c, meta = self.cols, self.meta
+        leagues, teams, rounds = meta["leagues"], meta["teams"], meta["rounds"]
+        statuses = meta["statuses"]
+        unknown = [None, None]
+        rows = []
+        for fixture_id, league, home, away, kickoff, status, round_, home_goals, away_goals in zip(
+                c["id"], c["league"], c["home"], c["away"], c["kickoff"], c["status"], c["round"],
+                c["home_goals"], c["away_goals"]):
+            has_kickoff = not math.isnan(kickoff)
+            short, long_ = statuses[status]
+            home_name, home_logo = teams.get(str(home), unknown)
+            away_name, away_logo = teams.get(str(away), unknown)
+            rows.append({
+                "fixture": {
+                    "id": fixture_id,
+                    "date": datetime.fromtimestamp(kickoff, tz=timezone.utc).isoformat() if has_kickoff else None,
+                    "timestamp": int(kickoff) if has_kickoff else None,
+                    "status": {"short": short, "long": long_},
+                },
+                "league": dict(leagues.get(str(league), {}), round=rounds[round_]),
+                "teams": {
+                    "home": {"id": _opt(home), "name": home_name, "logo": home_logo},
+                    "away": {"id": _opt(away), "name": away_name, "logo": away_logo},
+                },
+                "goals": {"home": _opt(home_goals), "away": _opt(away_goals)},
+            })
+        return rows
+
+    def to_response(self) -> Dict[str, Any]:
+        meta = self.meta
+        response = self._rows()
+        _apply_residuals(response, self.cols["extra"], meta["extras"])
+        return {"get": "fixtures", "parameters": meta["parameters"], "errors": [],
+                "results": len(response), "response": response}
+
+
+_SPLITS = ("all", "home", "away")
+_SPLIT_STATS = ("played", "win", "draw", "lose", "for", "against")
+
+
+class StandingsColumns(Columns):
+    """League table as columns: rank, team, points, goal difference and W/D/L splits."""
+
+    __slots__ = ()
+
+    TAG = b"STC2"
+    COLUMNS = (
+        ("group", "B"),
+        ("rank", "H"),
+        ("team", "i"),
+        ("points", "h"),
+        ("goals_diff", "h"),
+        ("extra", "I"),
+    ) + tuple((f"{split}_{stat}", "h") for split in _SPLITS for stat in _SPLIT_STATS)
+
+    @classmethod
+    def from_response(cls, payload: Dict[str, Any]) -> "StandingsColumns":
+        out = cls()
+        c = out.cols
+        league_meta, teams, forms, descriptions = {}, {}, [], []
+        groups, group_index = [], {}
+        extras, extra_index = [""], {}
+        for entry in payload.get("response", []):
+            league = entry.get("league", {}) if isinstance(entry, dict) else {}
+            league_meta = league_meta or {k: v for k, v in league.items() if k != "standings"}
+            for table in league.get("standings", []):
+                for row in table:
+                    team = row.get("team", {})
+                    teams.setdefault(str(team.get("id")), [team.get("name"), team.get("logo")])
+                    c["group"].append(_intern(groups, group_index, row.get("group")))
+                    c["rank"].append(int(row.get("rank") or 0))
+                    c["team"].append(_int(team.get("id")))
+                    c["points"].append(_int(row.get("points")))
+                    c["goals_diff"].append(_int(row.get("goalsDiff")))
+                    for split in _SPLITS:
+                        record = row.get(split, {}) or {}
+                        goals = record.get("goals", {}) or {}
+                        for stat in _SPLIT_STATS:
+                            value = goals.get(stat) if stat in ("for", "against") else record.get(stat)
+                            c[f"{split}_{stat}"].append(_int(value))
+                    forms.append(row.get("form"))
+                    descriptions.append(row.get("description"))
+                    rebuilt = out._row(len(c["team"]) - 1, teams, groups, forms, descriptions)
+                    c["extra"].append(_intern_residual(extras, extra_index, row, rebuilt))
+        out.meta = {
+            "parameters": payload.get("parameters", {}),
+            "league": league_meta,
+            "teams": teams,
+            "groups": groups,
+            "form": forms,
+            "description": descriptions,
+            "extras": extras,
+        }
+        return out
+
+    def _row(self, i: int, teams: Dict[str, Any], groups: List[Any], forms: List[Any],
+             descriptions: List[Any]) -> Dict[str, Any]:
+        """Table row `i` as far as the columns go."""
+        c = self.cols
+        name, logo = teams.get(str(c["team"][i]), [None, None])
+        row = {
+            "rank": c["rank"][i],
+            "team": {"id": _opt(c["team"][i]), "name": name, "logo": logo},
+            "points": _opt(c["points"][i]),
+            "goalsDiff": _opt(c["goals_diff"][i]),
+            "group": groups[c["group"][i]],
+            "form": forms[i],
+            "description": descriptions[i],
+        }
+        for split in _SPLITS:
+            row[split] = {stat: _opt(c[f"{split}_{stat}"][i]) for stat in ("played", "win", "draw", "lose")}
+            row[split]["goals"] = {"for": _opt(c[f"{split}_for"][i]), "against": _opt(c[f"{split}_against"][i])}
+        return row
+
+    def to_response(self) -> Dict[str, Any]:
+        c, meta = self.cols, self.meta
+        rows = [self._row(i, meta["teams"], meta["groups"], meta["form"], meta["description"])
+                for i in range(len(self))]
+        _apply_residuals(rows, c["extra"], meta["extras"])
+        tables: Dict[int, List[Dict[str, Any]]] = {}
+        for i, row in enumerate(rows):
+            tables.setdefault(c["group"][i], []).append(row)
+        league = dict(meta["league"], standings=[tables[g] for g in sorted(tables)])
+        response = [{"league": league}] if len(self) or meta["league"] else []
+        return {"get": "standings", "parameters": meta["parameters"], "errors": [],
+                "results": len(response), "response": response}
+
+
+# Cache season fixtures/standings in columnar form (0 keeps raw JSON)
+COMPACT_CACHE = os.getenv("CACHE_COMPACT", "1") == "1"
+
+# Endpoints whose cached payload is kept in columnar form
+COMPACT_ENDPOINTS = {
+    "fixtures": FixtureColumns,
+    "standings": StandingsColumns,
+}
+COMPACT_TYPES = {cls.TAG: cls for cls in COMPACT_ENDPOINTS.values()}
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Bounded concurrent fan-out for blocking upstream calls.
+
+Runs a set of named callables on a thread pool with a concurrency limit and a
+total deadline. Calls that finish in time are returned; the rest are reported
+as timed out so callers can continue with partial results. `afan_out` does the
+same for coroutines on the running event loop (ASGI mode).
+"""
+import time
+import asyncio
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_DEADLINE = 12.0
+
+
+class FanOutResult:
+    """Outcome of a fan-out: successful results, errors and timed-out keys."""
+
+    def __init__(self):
+        self.results: Dict[Hashable, Any] = {}
+        self.errors: Dict[Hashable, BaseException] = {}
+        self.timed_out = set()
+        self.elapsed = 0.0
+
+    @property
+    def complete(self) -> bool:
+        return not self.errors and not self.timed_out
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        return self.results.get(key, default)
+
+
+def fan_out(calls: Dict[Hashable, Callable[[], Any]],
+            max_workers: Optional[int] = None,
+            deadline: Optional[float] = None) -> FanOutResult:
+    """
+    Run `calls` concurrently and collect whatever finishes before the deadline.
+
+    Args:
+        calls: Mapping of key -> zero-argument callable
+        max_workers: Concurrency limit (default DEFAULT_MAX_WORKERS)
+        deadline: Total wall-clock budget in seconds (default DEFAULT_DEADLINE)
+
+    Returns:
+        FanOutResult with per-key results, errors and timed-out keys
+    """
+    outcome = FanOutResult()
+    if not calls:
+        return outcome
+
+    max_workers = max(1, min(max_workers or DEFAULT_MAX_WORKERS, len(calls)))
+    deadline = DEFAULT_DEADLINE if deadline is None else deadline
+    start = time.monotonic()
+    stop_at = start + deadline
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fanout")
+    try:
+        # Each call runs in a copy of the caller's context so context-local
+        # request state (e.g. tracking holders) is visible inside workers.
+        futures = {
+            executor.submit(contextvars.copy_context().run, fn): key
+            for key, fn in calls.items()
+        }
+        pending = set(futures)
+        while pending:
+            remaining = stop_at - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = futures[future]
+                try:
+                    outcome.results[key] = future.result()
+                except Exception as e:
+                    outcome.errors[key] = e
+        for future in pending:
+            outcome.timed_out.add(futures[future])
+    finally:
+        # Do not block on stragglers: they finish (or hit their own HTTP timeout)
+        # in the background while the caller moves on with partial results.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    outcome.elapsed = time.monotonic() - start
+    if outcome.timed_out:
+        logging.warning(f"Fan-out deadline {deadline}s hit: {len(outcome.timed_out)}/{len(calls)} calls timed out")
+    return outcome
+
+
+async def afan_out(calls: Dict[Hashable, Callable[[], Awaitable[Any]]],
+                   max_concurrency: Optional[int] = None,
+                   deadline: Optional[float] = None) -> FanOutResult:
+    """`fan_out` for coroutine functions: at most `max_concurrency` awaited at once.
+
+    Calls still running at the deadline are cancelled and reported as timed out.
+    """
+    outcome = FanOutResult()
+    if not calls:
+        return outcome
+
+    limit = asyncio.Semaphore(max(1, max_concurrency or DEFAULT_MAX_WORKERS))
+    deadline = DEFAULT_DEADLINE if deadline is None else deadline
+    start = time.monotonic()
+
+    async def run(fn):
+        async with limit:
+            return await fn()
+
+    # Tasks copy the caller's context, like the thread pool version
+    tasks = {asyncio.ensure_future(run(fn)): key for key, fn in calls.items()}
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in done:
+        try:
+            outcome.results[tasks[task]] = task.result()
+        except Exception as e:
+            outcome.errors[tasks[task]] = e
+    for task in pending:
+        task.cancel()
+        outcome.timed_out.add(tasks[task])
+
+    outcome.elapsed = time.monotonic() - start
+    if outcome.timed_out:
+        logging.warning(f"Fan-out deadline {deadline}s hit: {len(outcome.timed_out)}/{len(calls)} calls timed out")
+    return outcome
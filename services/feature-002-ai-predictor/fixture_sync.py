@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Incremental fixture sync from RapidAPI into the local FixtureStore.
+
+Instead of downloading a whole season (~380 fixtures for the Premier League)
+only the fixtures in a date window around today are fetched (`from`/`to`),
+and while matches are in play only live fixtures (`live`) are refreshed.
+Results are merged per fixture, so unchanged fixtures cost nothing.
+Request paths call `sync_in_background()` so a due sync never holds up a
+response that the store can already serve.
+"""
+import os
+import time
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from singleflight import SingleFlight
+from store import FixtureStore, MATCH_LENGTH
+
+FIXTURE_SYNC_DAYS_BACK = int(os.getenv("FIXTURE_SYNC_DAYS_BACK", "1"))
+FIXTURE_SYNC_DAYS_AHEAD = int(os.getenv("FIXTURE_SYNC_DAYS_AHEAD", "7"))
+# Minimum seconds between window syncs and between live syncs of a league
+FIXTURE_SYNC_INTERVAL = float(os.getenv("FIXTURE_SYNC_INTERVAL", "900"))
+FIXTURE_LIVE_INTERVAL = float(os.getenv("FIXTURE_LIVE_INTERVAL", "60"))
+
+LIVE_STATUSES = {"1H", "HT", "2H", "ET", "BT", "P", "SUSP", "INT", "LIVE"}
+
+
+class FixtureSync:
+    """Keep a league/season's fixtures in `store` current with minimal fetches.
+
+    `fetcher_factory()` returns an `EFootballFetcher` (uncached: the store is
+    the cache for fixtures).
+    """
+
+    def __init__(self, store: FixtureStore, fetcher_factory: Callable[[], object],
+                 days_back: int = FIXTURE_SYNC_DAYS_BACK, days_ahead: int = FIXTURE_SYNC_DAYS_AHEAD,
+                 interval: float = FIXTURE_SYNC_INTERVAL, live_interval: float = FIXTURE_LIVE_INTERVAL):
+        self.store = store
+        self.fetcher_factory = fetcher_factory
+        self.days_back = days_back
+        self.days_ahead = days_ahead
+        self.interval = interval
+        self.live_interval = live_interval
+        self.flight = SingleFlight()
+
+    def window(self, now: float) -> tuple:
+        """(from, to) dates of the sync window, as RapidAPI YYYY-MM-DD strings."""
+        today = datetime.fromtimestamp(now, tz=timezone.utc).date()
+        return ((today - timedelta(days=self.days_back)).isoformat(),
+                (today + timedelta(days=self.days_ahead)).isoformat())
+
+    def covers(self, start: Optional[float], end: Optional[float], now: Optional[float] = None) -> bool:
+        """Whether every kickoff in [start, end) falls inside the sync window, i.e. the store holds them all."""
+        if start is None or end is None:
+            return False
+        today = datetime.fromtimestamp(time.time() if now is None else now, tz=timezone.utc)
+        today = today.replace(hour=0, minute=0, second=0, microsecond=0)
+        first = today - timedelta(days=self.days_back)
+        last = today + timedelta(days=self.days_ahead + 1)
+        return first.timestamp() <= start and end <= last.timestamp()
+
+    def has_live(self, league: int, season: int, now: float) -> bool:
+        for kickoff, status in self.store.statuses(league, season):
+            if status in LIVE_STATUSES:
+                return True
+            # Not started per the store but past kickoff: probably live already
+            if status == "NS" and kickoff and kickoff <= now < kickoff + MATCH_LENGTH:
+                return True
+        return False
+
+    def due(self, league: int, season: int, now: float) -> Optional[str]:
+        """The kind of sync that is due ("window" or "live"), or None."""
+        if now - self.store.last_sync(league, season, "window") >= self.interval:
+            return "window"
+        if now - self.store.last_sync(league, season, "live") >= self.live_interval \
+                and self.has_live(league, season, now):
+            return "live"
+        return None
+
+    def age(self, league: int, season: int, now: float) -> Optional[float]:
+        """Seconds since the league/season was last synced, None if it never was."""
+        synced = max(self.store.last_sync(league, season, "window"), self.store.last_sync(league, season, "live"))
+        return now - synced if synced else None
+
+    def sync(self, league: int, season: int, now: Optional[float] = None) -> int:
+        """Bring the store up to date if due; returns the number of fixtures changed."""
+        now = time.time() if now is None else now
+        return self.flight.do(f"{league}:{season}", lambda: self._sync(league, season, now))
+
+    def sync_in_background(self, league: int, season: int, now: Optional[float] = None) -> bool:
+        """Start a due sync on a daemon thread unless one is running; True if one was started."""
+        now = time.time() if now is None else now
+        if self.flight.is_running(f"{league}:{season}") or self.due(league, season, now) is None:
+            return False
+
+        def run():
+            try:
+                self.sync(league, season)
+            except Exception as e:
+                logging.warning(f"Background fixture sync failed for league={league}: {e}")
+
+        threading.Thread(target=run, name=f"fixture-sync:{league}:{season}", daemon=True).start()
+        return True
+
+    def _sync(self, league: int, season: int, now: float) -> int:
+        kind = self.due(league, season, now)
+        if kind == "window":
+            start, end = self.window(now)
+            data = self.fetcher_factory().fetch_fixtures(league, season, **{"from": start, "to": end})
+        elif kind == "live":
+            data = self.fetcher_factory().fetch_fixtures(league, season, live="all")
+        else:
+            return 0
+        if data.get("errors"):
+            raise RuntimeError(f"Fixture sync failed: {data['errors']}")
+        fixtures = data.get("response", [])
+        changed = self.store.upsert_fixtures(league, season, fixtures)
+        self.store.mark_synced(league, season, kind, now)
+        logging.info(f"Fixture {kind} sync league={league}: {len(fixtures)} fetched, {changed} changed")
+        return changed
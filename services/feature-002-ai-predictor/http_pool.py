@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP connection pool for upstream APIs (RapidAPI).
+
+A single `requests.Session` is kept per process so keep-alive connections
+are reused across requests instead of paying a TCP+TLS handshake per call.
+ASGI mode gets the same from one `httpx.AsyncClient` per event loop.
+"""
+import os
+import asyncio
+import threading
+from typing import Dict, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+Timeout = Union[float, Tuple[float, float]]
+
+# Pool / retry configuration (overridable via env)
+POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "4"))
+POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "32"))
+RETRY_TOTAL = int(os.getenv("HTTP_RETRIES", "2"))
+RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "0.3"))
+RETRY_STATUSES = (500, 502, 503, 504)
+
+# Keep-alive connections of the async client (many requests share few sockets)
+ASYNC_POOL_MAXSIZE = int(os.getenv("HTTP_ASYNC_POOL_MAXSIZE", "100"))
+
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+
+# Read timeouts per RapidAPI endpoint (seconds). Override a single endpoint with
+# HTTP_TIMEOUT_<NAME>, e.g. HTTP_TIMEOUT_TEAMS_STATISTICS=20.
+ENDPOINT_TIMEOUTS: Dict[str, float] = {
+    "fixtures": 30.0,
+    "fixtures/statistics": 15.0,
+    "standings": 15.0,
+    "players": 20.0,
+    "teams/statistics": 15.0,
+}
+DEFAULT_TIMEOUT = float(os.getenv("HTTP_TIMEOUT_DEFAULT", "30"))
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_async_clients: Dict[int, "httpx.AsyncClient"] = {}
+
+
+def build_session(pool_connections: int = POOL_CONNECTIONS,
+                  pool_maxsize: int = POOL_MAXSIZE,
+                  retries: int = RETRY_TOTAL,
+                  backoff_factor: float = RETRY_BACKOFF) -> requests.Session:
+    """Create a session with a sized connection pool and retry/backoff policy."""
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
+
+def reset_session() -> None:
+    """Close and drop the shared session (e.g. after fork or in tests)."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def get_async_client() -> "httpx.AsyncClient":
+    """Return the running event loop's pooled async client, creating it on first use."""
+    if not HTTPX_AVAILABLE:
+        raise RuntimeError("httpx is required for the async fetcher (pip install httpx)")
+    loop_id = id(asyncio.get_running_loop())
+    client = _async_clients.get(loop_id)
+    if client is None or client.is_closed:
+        client = _async_clients[loop_id] = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=ASYNC_POOL_MAXSIZE, max_keepalive_connections=ASYNC_POOL_MAXSIZE),
+            transport=httpx.AsyncHTTPTransport(retries=RETRY_TOTAL),
+        )
+    return client
+
+
+async def close_async_client() -> None:
+    """Close the running event loop's async client (ASGI lifespan shutdown)."""
+    client = _async_clients.pop(id(asyncio.get_running_loop()), None)
+    if client is not None:
+        await client.aclose()
+
+
+def timeout_for(endpoint: str) -> Timeout:
+    """Return the (connect, read) timeout tuple for a RapidAPI endpoint."""
+    env_name = "HTTP_TIMEOUT_" + endpoint.upper().replace("/", "_")
+    read = os.getenv(env_name)
+    read_timeout = float(read) if read else ENDPOINT_TIMEOUTS.get(endpoint, DEFAULT_TIMEOUT)
+    return (CONNECT_TIMEOUT, read_timeout)
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+RapidAPI key pool with per-key token buckets.
+
+Every key has two token buckets, per-minute and per-day, that refill
+continuously. `acquire()` picks the least-loaded key, meaning the one with
+the most headroom left in its tighter bucket, and takes one token from it.
+A key that got HTTP 429 is put on cooldown. State is kept atomically in Redis
+through a Lua script so all workers share one budget, with an in-memory
+fallback when Redis is unavailable.
+"""
+import os
+import time
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+QUOTA_PER_MINUTE = float(os.getenv("RAPIDAPI_QUOTA_PER_MINUTE", "30"))
+# 1000/day plan with a safety margin (the old hardcoded limit was 900)
+QUOTA_PER_DAY = float(os.getenv("RAPIDAPI_QUOTA_PER_DAY", "900"))
+COOLDOWN_SECONDS = float(os.getenv("RAPIDAPI_COOLDOWN", "60"))
+ACQUIRE_WAIT = float(os.getenv("RAPIDAPI_ACQUIRE_WAIT", "2"))
+# How long to stay on in-memory buckets after a Redis error before retrying Redis
+REDIS_RETRY_AFTER = 30.0
+
+# KEYS: one hash per API key. ARGV: now, per_minute, per_day.
+# Returns the 1-based index of the chosen key (0 if none is available).
+_ACQUIRE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local pm = tonumber(ARGV[2])
+local pd = tonumber(ARGV[3])
+local best, best_score, best_m, best_d = 0, -1, 0, 0
+for i, k in ipairs(KEYS) do
+    local h = redis.call('HMGET', k, 'mt', 'dt', 'ts', 'cool')
+    local mt = tonumber(h[1]) or pm
+    local dt = tonumber(h[2]) or pd
+    local ts = tonumber(h[3]) or now
+    local cool = tonumber(h[4]) or 0
+    local elapsed = math.max(0, now - ts)
+    mt = math.min(pm, mt + elapsed * pm / 60)
+    dt = math.min(pd, dt + elapsed * pd / 86400)
+    if cool <= now and mt >= 1 and dt >= 1 then
+        local score = math.min(mt / pm, dt / pd)
+        if score > best_score then
+            best, best_score, best_m, best_d = i, score, mt, dt
+        end
+    end
+end
+if best > 0 then
+    redis.call('HSET', KEYS[best], 'mt', tostring(best_m - 1), 'dt', tostring(best_d - 1), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[best], 172800)
+end
+return best
+"""
+
+
+class KeyPoolExhausted(Exception):
+    """No API key has quota left (all empty or cooling down)."""
+
+
+def _key_id(api_key: str) -> str:
+    # Never store raw API keys in Redis or logs
+    return hashlib.sha1(api_key.encode("utf-8")).hexdigest()[:12]
+
+
+class _Bucket:
+    __slots__ = ("minute", "day", "ts", "cool_until")
+
+    def __init__(self, per_minute: float, per_day: float, now: float):
+        self.minute = per_minute
+        self.day = per_day
+        self.ts = now
+        self.cool_until = 0.0
+
+
+class KeyPool:
+    """Least-loaded API key selection under per-minute and per-day quotas."""
+
+    def __init__(self, keys: List[str], per_minute: float = QUOTA_PER_MINUTE, per_day: float = QUOTA_PER_DAY,
+                 redis_client=None, cooldown: float = COOLDOWN_SECONDS, prefix: str = "keypool"):
+        self.keys = [k for k in keys if k]
+        self.ids = [_key_id(k) for k in self.keys]
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self.cooldown_seconds = cooldown
+        self.redis = redis_client
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._redis_down_until = 0.0
+        now = time.time()
+        self._buckets = {k: _Bucket(per_minute, per_day, now) for k in self.keys}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _redis_keys(self) -> List[str]:
+        return [f"{self.prefix}:{kid}" for kid in self.ids]
+
+    def acquire(self, wait: float = ACQUIRE_WAIT) -> str:
+        """Take one request token from the least-loaded key.
+
+        Waits up to `wait` seconds for a per-minute token to refill, then
+        raises KeyPoolExhausted.
+        """
+        if not self.keys:
+            raise KeyPoolExhausted("No RapidAPI keys configured")
+        deadline = time.monotonic() + wait
+        while True:
+            key = self._take()
+            if key is not None:
+                return key
+            if time.monotonic() >= deadline:
+                raise KeyPoolExhausted("All RapidAPI keys exhausted or cooling down")
+            time.sleep(min(0.25, max(0.0, deadline - time.monotonic())))
+
+    def try_acquire(self) -> Optional[str]:
+        """One non-blocking `acquire` attempt: a key, or None if none has a token right now.
+
+        For callers that wait on their own terms (the async fetcher sleeps on
+        the event loop between attempts).
+        """
+        if not self.keys:
+            raise KeyPoolExhausted("No RapidAPI keys configured")
+        return self._take()
+
+    def _take(self) -> Optional[str]:
+        if self._redis_usable():
+            try:
+                index = self.redis.eval(_ACQUIRE_SCRIPT, len(self.keys), *self._redis_keys(),
+                                        time.time(), self.per_minute, self.per_day)
+                return self.keys[int(index) - 1] if int(index) > 0 else None
+            except Exception as e:
+                self._redis_down_until = time.monotonic() + REDIS_RETRY_AFTER
+                logging.warning(f"Key pool Redis state unavailable, using in-memory buckets: {e}")
+        return self._take_local()
+
+    def _redis_usable(self) -> bool:
+        return self.redis is not None and time.monotonic() >= self._redis_down_until
+
+    def _refill(self, bucket: _Bucket, now: float) -> None:
+        elapsed = max(0.0, now - bucket.ts)
+        bucket.minute = min(self.per_minute, bucket.minute + elapsed * self.per_minute / 60)
+        bucket.day = min(self.per_day, bucket.day + elapsed * self.per_day / 86400)
+        bucket.ts = now
+
+    def _take_local(self) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            best, best_score = None, -1.0
+            for key in self.keys:
+                bucket = self._buckets[key]
+                self._refill(bucket, now)
+                if bucket.cool_until > now or bucket.minute < 1 or bucket.day < 1:
+                    continue
+                score = min(bucket.minute / self.per_minute, bucket.day / self.per_day)
+                if score > best_score:
+                    best, best_score = key, score
+            if best is None:
+                return None
+            self._buckets[best].minute -= 1
+            self._buckets[best].day -= 1
+            return best
+
+    def cooldown(self, key: str, seconds: Optional[float] = None) -> None:
+        """Take `key` out of rotation after a 429 (honours Retry-After when given)."""
+        until = time.time() + (seconds if seconds else self.cooldown_seconds)
+        logging.warning(f"RapidAPI key {_key_id(key)} rate limited; cooling down until {until:.0f}")
+        with self._lock:
+            if key in self._buckets:
+                self._buckets[key].cool_until = until
+        if self._redis_usable():
+            try:
+                name = f"{self.prefix}:{_key_id(key)}"
+                self.redis.hset(name, "cool", until)
+                self.redis.expire(name, 172800)
+            except Exception as e:
+                logging.warning(f"Key pool cooldown not shared via Redis: {e}")
+
+    def _shared_state(self, now: float) -> Optional[List[Dict[str, float]]]:
+        """Refilled per-key buckets as stored in Redis (None when Redis is unusable)."""
+        if not self._redis_usable():
+            return None
+        try:
+            state = []
+            for name in self._redis_keys():
+                mt, dt, ts, cool = self.redis.hmget(name, "mt", "dt", "ts", "cool")
+                # Same defaults and refill as _ACQUIRE_SCRIPT
+                elapsed = max(0.0, now - float(ts)) if ts is not None else 0.0
+                state.append({
+                    "minute": min(self.per_minute, (float(mt) if mt is not None else self.per_minute)
+                                  + elapsed * self.per_minute / 60),
+                    "day": min(self.per_day, (float(dt) if dt is not None else self.per_day)
+                               + elapsed * self.per_day / 86400),
+                    "cool_until": float(cool) if cool is not None else 0.0,
+                })
+            return state
+        except Exception as e:
+            self._redis_down_until = time.monotonic() + REDIS_RETRY_AFTER
+            logging.warning(f"Key pool Redis state unavailable, using in-memory buckets: {e}")
+            return None
+
+    def _local_state(self, now: float) -> List[Dict[str, float]]:
+        with self._lock:
+            state = []
+            for key in self.keys:
+                bucket = self._buckets[key]
+                self._refill(bucket, now)
+                state.append({"minute": bucket.minute, "day": bucket.day, "cool_until": bucket.cool_until})
+            return state
+
+    def _state(self, now: float) -> List[Dict[str, float]]:
+        """Per-key buckets: the shared Redis view, or this process's when Redis is down."""
+        shared = self._shared_state(now)
+        return shared if shared is not None else self._local_state(now)
+
+    def headroom(self) -> float:
+        """Fraction of the pool's daily quota still available (0..1).
+
+        Reads the shared Redis state when available, so a separate worker
+        process sees the budget used by the web app too.
+        """
+        if not self.keys:
+            return 0.0
+        remaining = sum(bucket["day"] for bucket in self._state(time.time()))
+        return remaining / (self.per_day * len(self.keys))
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Per-key remaining tokens and cooldown (shared Redis view when available)."""
+        now = time.time()
+        return [{
+            "key": _key_id(key),
+            "minute_tokens": round(bucket["minute"], 2),
+            "day_tokens": round(bucket["day"], 2),
+            "cooling_down": bucket["cool_until"] > now,
+        } for key, bucket in zip(self.keys, self._state(now))]
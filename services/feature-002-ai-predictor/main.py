@@ -7,72 +7,148 @@ import json
 import requests
 from typing import Optional, Dict, Any
 
+from http_pool import get_session, timeout_for
+from cache import cache_key, ttl_for, is_cacheable
+from compact import Columns, COMPACT_CACHE, COMPACT_ENDPOINTS
+from projection import project_payload
+from key_pool import KeyPoolExhausted
+from circuit import breaker_for
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    """Seconds from a numeric Retry-After header, if any."""
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _compacted(columns, payload: Dict[str, Any]) -> Any:
+    """Columnar form of a good payload; error payloads pass through uncached."""
+    return columns.from_response(payload) if is_cacheable(payload) else payload
+
 
 class EFootballFetcher:
     """Fetch e-football fixtures from RapidAPI."""
-    
+
     BASE_URL = "https://api-football-v1.p.rapidapi.com/v3"
     HOST = "api-football-v1.p.rapidapi.com"
-    
-    def __init__(self, api_key: Optional[str] = None):
-        """Initialize fetcher with RapidAPI key from env or argument."""
+
+    def __init__(self, api_key: Optional[str] = None, session: Optional[requests.Session] = None,
+                 base_url: Optional[str] = None, cache=None, key_pool=None):
+        """Initialize fetcher with RapidAPI key from env or argument.
+
+        Args:
+            api_key: RapidAPI key (falls back to RAPIDAPI_KEY)
+            session: HTTP session to use (default: shared pooled session)
+            base_url: Override API base URL (default: RAPIDAPI_BASE_URL or BASE_URL)
+            cache: Optional read-through cache (`cache.TieredCache`) for all endpoints
+            key_pool: Optional `key_pool.KeyPool`; when set every request takes
+                its key from the pool instead of using `api_key`
+        """
+        self.key_pool = key_pool
         self.api_key = api_key or os.environ.get("RAPIDAPI_KEY")
-        if not self.api_key:
+        if not self.api_key and not (key_pool is not None and len(key_pool)):
             raise ValueError("RAPIDAPI_KEY not set in environment or argument")
         self.headers = {
-            "X-RapidAPI-Key": self.api_key,
+            "X-RapidAPI-Key": self.api_key or "",
             "X-RapidAPI-Host": self.HOST,
         }
-    
+        self.session = session or get_session()
+        self.base_url = (base_url or os.environ.get("RAPIDAPI_BASE_URL") or self.BASE_URL).rstrip("/")
+        self.cache = cache
+
+    def _get(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """GET an endpoint, read-through the cache when one is configured.
+
+        Payloads are projected to the fields the app uses before caching.
+        """
+        if self.cache is None:
+            return project_payload(endpoint, self._request(endpoint, params))
+        compact = COMPACT_ENDPOINTS.get(endpoint) if COMPACT_CACHE else None
+        if compact is None:
+            return self.cache.get_or_load(
+                cache_key(endpoint, params),
+                lambda: project_payload(endpoint, self._request(endpoint, params)),
+                ttl_for(endpoint),
+            )
+        # Season fixtures/standings are cached in columnar form and expanded on read
+        value = self.cache.get_or_load(
+            cache_key(endpoint, params),
+            lambda: _compacted(compact, self._request(endpoint, params)),
+            ttl_for(endpoint),
+        )
+        return value.to_response() if isinstance(value, Columns) else value
+
+    def _request(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """GET an endpoint through the session with its configured timeout.
+
+        With a key pool, a 429 puts that key on cooldown and the request is
+        retried once per remaining key.
+        """
+        url = f"{self.base_url}/{endpoint}"
+        if self.key_pool is None:
+            response = self._send(endpoint, url, self.headers, params)
+            response.raise_for_status()
+            return response.json()
+
+        for _ in range(len(self.key_pool)):
+            key = self.key_pool.acquire()
+            headers = dict(self.headers, **{"X-RapidAPI-Key": key})
+            response = self._send(endpoint, url, headers, params)
+            if response.status_code == 429:
+                self.key_pool.cooldown(key, _retry_after(response))
+                continue
+            response.raise_for_status()
+            return response.json()
+        raise KeyPoolExhausted(f"All RapidAPI keys rate limited for {endpoint}")
+
+    def _send(self, endpoint: str, url: str, headers: Dict[str, str], params: Dict[str, Any]) -> requests.Response:
+        """One GET through the endpoint's circuit breaker (raises CircuitOpenError when open).
+
+        Connection errors, timeouts and 5xx count as failures; the read timeout
+        adapts to the endpoint's observed latency, capped at its configured value.
+        """
+        connect, read = timeout_for(endpoint)
+        return breaker_for(f"rapidapi:{endpoint}").call(
+            lambda timeout: self.session.get(url, headers=headers, params=params, timeout=(connect, timeout)),
+            read,
+            is_failure=lambda response: getattr(response, "status_code", 200) >= 500,
+        )
+
     def fetch_fixtures(self, league: int = 39, season: int = 2025, **kwargs) -> Dict[str, Any]:
         """
         Fetch fixtures for a given league and season.
-        
+
         Args:
             league: League ID (default 39 = Premier League)
             season: Season year (default 2025)
             **kwargs: Additional query params
-        
+
         Returns:
             JSON response dict
         """
         params = {"league": league, "season": season}
         params.update(kwargs)
-        
-        url = f"{self.BASE_URL}/fixtures"
-        response = requests.get(url, headers=self.headers, params=params, timeout=30)
-        response.raise_for_status()
-        return response.json()
-    
+        return self._get("fixtures", params)
+
     def fetch_standings(self, league: int = 39, season: int = 2025) -> Dict[str, Any]:
         """Fetch league standings."""
         params = {"league": league, "season": season}
-        url = f"{self.BASE_URL}/standings"
-        response = requests.get(url, headers=self.headers, params=params, timeout=30)
-        response.raise_for_status()
-        return response.json()
-    
+        return self._get("standings", params)
+
     def fetch_statistics(self, fixture_id: int) -> Dict[str, Any]:
         """Fetch fixture statistics."""
         params = {"fixture": fixture_id}
-        url = f"{self.BASE_URL}/fixtures/statistics"
-        response = requests.get(url, headers=self.headers, params=params, timeout=30)
-        response.raise_for_status()
-        return response.json()
+        return self._get("fixtures/statistics", params)
 
     def fetch_players(self, team: int, season: int = 2025) -> Dict[str, Any]:
         """Fetch players for a team (current season)."""
         params = {"team": team, "season": season}
-        url = f"{self.BASE_URL}/players"
-        response = requests.get(url, headers=self.headers, params=params, timeout=30)
-        response.raise_for_status()
-        return response.json()
+        return self._get("players", params)
 
     def fetch_team_stats(self, team: int, season: int = 2025) -> Dict[str, Any]:
         """Fetch aggregated team statistics (if available)."""
         # Some RapidAPI endpoints provide team statistics under /teams/statistics
         params = {"team": team, "season": season}
-        url = f"{self.BASE_URL}/teams/statistics"
-        response = requests.get(url, headers=self.headers, params=params, timeout=30)
-        response.raise_for_status()
-        return response.json()
+        return self._get("teams/statistics", params)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Incremental extraction of `matches[]` objects from model output.
+
+The model is asked for `{"matches": [...]}` but in practice wraps it in prose
+or code fences, and streamed or length-capped output can stop mid-object.
+`MatchStreamParser` scans text as it arrives and returns each match object as
+soon as its closing brace is seen, so every well-formed match is kept even if
+the tail is truncated or one object is broken.
+"""
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+_MATCHES_ARRAY = re.compile(r'"matches"\s*:\s*\[')
+_ARRAY_OF_OBJECTS = re.compile(r'\[\s*\{')
+_TRAILING_COMMA = re.compile(r',\s*([}\]])')
+
+
+def _loads_lenient(raw: str) -> Optional[Any]:
+    """json.loads, retrying once without trailing commas; None if still invalid."""
+    try:
+        return json.loads(raw)
+    except ValueError:
+        pass
+    try:
+        return json.loads(_TRAILING_COMMA.sub(r'\1', raw))
+    except ValueError:
+        return None
+
+
+class MatchStreamParser:
+    """Feed model text chunks; get back each match object once it is complete.
+
+    Scanning is resumable: each character is examined once, tracking string,
+    escape and brace-depth state, so feeding many small chunks stays linear.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.done = False
+        self.skipped = 0  # complete but malformed objects
+        self._start: Optional[int] = None  # first index inside the matches array
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._obj_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Append `chunk` and return the match objects completed by it."""
+        self.text += chunk or ""
+        if self.done:
+            return []
+        if self._start is None:
+            found = _MATCHES_ARRAY.search(self.text)
+            if not found:
+                return []
+            self._start = self._pos = found.end()
+        return self._scan()
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """Call once the model is done; recovers output without a `matches` key."""
+        if self._start is not None or self.done:
+            return []
+        # No "matches" key at all: accept a bare array of match objects
+        found = _ARRAY_OF_OBJECTS.search(self.text)
+        if not found:
+            return []
+        self._start = self._pos = found.start() + 1
+        return self._scan()
+
+    def _scan(self) -> List[Dict[str, Any]]:
+        out = []
+        text = self.text
+        i = self._pos
+        while i < len(text):
+            c = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = True
+            elif c == "{":
+                if self._depth == 0:
+                    self._obj_start = i
+                self._depth += 1
+            elif c == "}" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    obj = _loads_lenient(text[self._obj_start:i + 1])
+                    if isinstance(obj, dict):
+                        out.append(obj)
+                    else:
+                        self.skipped += 1
+                    self._obj_start = None
+            elif c == "]" and self._depth == 0:
+                self.done = True
+                i += 1
+                break
+            i += 1
+        self._pos = i
+        return out
+
+
+def parse_matches(text: str) -> List[Dict[str, Any]]:
+    """Extract every well-formed match object from a complete model response."""
+    parser = MatchStreamParser()
+    return parser.feed(text) + parser.finish()
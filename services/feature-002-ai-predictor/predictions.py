@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Per-fixture prediction cache helpers.
+
+Each fixture's prediction is cached under its fixture id plus a content hash
+of everything the model sees about that fixture (the fixture itself, context
+for its two teams, the query), the prompt version and the model name. Any
+change in a fixture's inputs produces a new key, so only that fixture is sent
+back to the model; unchanged fixtures are served from cache.
+"""
+import json
+import hashlib
+from typing import Any, Dict, Iterable, List, Optional
+
+from projection import key_players
+
+# Players per team given to the model
+PROMPT_PLAYERS_PER_TEAM = 4
+
+
+def content_hash(payload: Any) -> str:
+    """Stable SHA-256 of a JSON-serialisable payload (key order independent)."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def fixture_prediction_key(fixture_id: Any, inputs: Dict[str, Any], prompt_version: str, model_name: str) -> str:
+    """Cache key for one fixture's prediction under its current inputs."""
+    digest = content_hash({"inputs": inputs, "prompt_version": prompt_version, "model": model_name})
+    return f"prediction:{prompt_version}:fixture:{fixture_id}:{digest[:32]}"
+
+
+def latest_prediction_key(fixture_id: Any, prompt_version: str) -> str:
+    """Key of the most recent prediction for a fixture, whatever its inputs.
+
+    Served (marked stale) when the model cannot be reached.
+    """
+    return f"prediction:{prompt_version}:fixture:{fixture_id}:latest"
+
+
+def standings_rows(standings: List[Any], team_ids: Iterable[Any]) -> List[Dict[str, Any]]:
+    """Pick the standings rows of `team_ids` out of a RapidAPI standings response."""
+    wanted = set(t for t in team_ids if t is not None)
+    rows = []
+    for entry in standings or []:
+        groups = (entry.get("league", {}) if isinstance(entry, dict) else {}).get("standings", [])
+        for group in groups:
+            for row in group:
+                if row.get("team", {}).get("id") in wanted:
+                    rows.append(row)
+    return rows
+
+
+def fixture_inputs(fixture: Dict[str, Any], team_stats: Dict[Any, Any], players_status: Dict[Any, Any],
+                   standings: List[Any], query: str) -> Dict[str, Any]:
+    """Everything the model is given about one fixture (what its cache key hashes)."""
+    teams = [fixture.get("home_id"), fixture.get("away_id")]
+    return {
+        "fixture": fixture,
+        "team_stats": {t: team_stats[t] for t in teams if t in team_stats},
+        "players_status": {t: key_players(players_status[t], PROMPT_PLAYERS_PER_TEAM)
+                           for t in teams if t in players_status},
+        "standings": standings_rows(standings, teams),
+        "query": query,
+    }
+
+
+def _team_pair(home: Any, away: Any) -> tuple:
+    return (str(home or "").strip().lower(), str(away or "").strip().lower())
+
+
+class MatchAssigner:
+    """Map model matches back to fixture ids, one match at a time.
+
+    A match is paired by an echoed `fixture_id`/`id` when present, otherwise
+    by (home, away) team names, exact first and then by containment ("Arsenal"
+    vs "Arsenal FC"). A match without team names is placed by the model's
+    order (the n-th match goes to the n-th fixture if that one is still free).
+    """
+
+    def __init__(self, fixtures: List[Dict[str, Any]]):
+        self.fixtures = fixtures
+        self.by_id = {f["id"]: f for f in fixtures}
+        self.by_pair = {_team_pair(f["home"], f["away"]): f["id"] for f in fixtures}
+        self.assigned: Dict[Any, Dict[str, Any]] = {}
+        self._seen = 0
+
+    def assign(self, match: Any) -> Optional[Dict[str, Any]]:
+        """Return `match` tagged with its `fixture_id`, or None if it cannot be placed."""
+        if not isinstance(match, dict):
+            return None
+        position = self._seen
+        self._seen += 1
+        fid = match.get("fixture_id", match.get("id"))
+        pair = _team_pair(match.get("home"), match.get("away"))
+        if fid not in self.by_id:
+            fid = self.by_pair.get(pair) or self._loose_pair(pair)
+        if fid is None and not any(pair) and position < len(self.fixtures):
+            fid = self.fixtures[position]["id"]
+        if fid is None or fid in self.assigned:
+            return None
+        self.assigned[fid] = dict(match, fixture_id=fid)
+        return self.assigned[fid]
+
+    def _loose_pair(self, pair: tuple) -> Any:
+        if not all(pair):
+            return None
+        for (home, away), fid in self.by_pair.items():
+            if home and away and (home in pair[0] or pair[0] in home) and (away in pair[1] or pair[1] in away):
+                return fid
+        return None
+
+
+def assign_matches(fixtures: List[Dict[str, Any]], matches: List[Any]) -> Dict[Any, Dict[str, Any]]:
+    """Map a complete model `matches[]` list back to fixture ids.
+
+    If no match can be paired but the counts agree, the model's order is trusted.
+    """
+    assigner = MatchAssigner(fixtures)
+    for match in matches:
+        assigner.assign(match)
+    matches = [m for m in matches if isinstance(m, dict)]
+    if not assigner.assigned and matches and len(matches) == len(fixtures):
+        return {f["id"]: dict(m, fixture_id=f["id"]) for f, m in zip(fixtures, matches)}
+    return assigner.assigned
+
+
+def is_cacheable_match(match: Optional[Dict[str, Any]]) -> bool:
+    """Only cache real model output, never placeholders."""
+    return isinstance(match, dict) and bool(match.get("prediction")) and match.get("prediction") != "ANALYZING"
+
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Background prefetch of upcoming matchdays.
+
+Keeps fixtures, standings, team stats, players and predictions warm for the
+configured leagues so user requests on matchday hit the cache. Each league is
+re-warmed on a routine interval, again shortly before its next kickoff and
+frequently while matches are close. Runs are skipped while the API key pool
+is below its reserved share of the daily quota, leaving that for users.
+
+Runs in-process (PREFETCH_ENABLED=1 in app.py) or as a separate worker:
+
+    python prefetch.py            # loop
+    python prefetch.py --once     # warm due leagues once and exit
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from store import fixture_kickoff
+
+PREFETCH_INTERVAL = float(os.getenv("PREFETCH_INTERVAL", "21600"))
+PREFETCH_LEAD = float(os.getenv("PREFETCH_LEAD", "7200"))
+PREFETCH_MATCHDAY_INTERVAL = float(os.getenv("PREFETCH_MATCHDAY_INTERVAL", "900"))
+# Share of the daily API quota kept for user traffic
+PREFETCH_QUOTA_RESERVE = float(os.getenv("PREFETCH_QUOTA_RESERVE", "0.3"))
+PREFETCH_LOCK_TTL = float(os.getenv("PREFETCH_LOCK_TTL", "600"))
+PREFETCH_TICK = 60.0
+
+NOT_STARTED = {"NS", "TBD"}
+
+
+def next_kickoff(fixtures: Iterable[Dict[str, Any]], now: float) -> Optional[float]:
+    """Earliest kickoff of a not-yet-started fixture after `now`."""
+    upcoming = [
+        t for t in (fixture_kickoff(f) for f in fixtures
+                    if f.get("fixture", {}).get("status", {}).get("short", "NS") in NOT_STARTED)
+        if t is not None and t > now
+    ]
+    return min(upcoming) if upcoming else None
+
+
+class Prefetcher:
+    """Per-league warm-up schedule driven by kickoff times and quota headroom.
+
+    `warm(league)` must fetch everything for the league through the shared
+    caches and return its raw fixture list (used to plan the next run).
+    """
+
+    def __init__(self, leagues: Iterable[int], warm: Callable[[int], List[Dict[str, Any]]],
+                 key_pool=None, lock=None, interval: float = PREFETCH_INTERVAL, lead: float = PREFETCH_LEAD,
+                 matchday_interval: float = PREFETCH_MATCHDAY_INTERVAL, reserve: float = PREFETCH_QUOTA_RESERVE):
+        self.warm = warm
+        self.key_pool = key_pool
+        self.lock = lock
+        self.interval = interval
+        self.lead = lead
+        self.matchday_interval = matchday_interval
+        self.reserve = reserve
+        self.next_due: Dict[int, float] = {league: 0.0 for league in leagues}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def schedule(self, league: int, fixtures: List[Dict[str, Any]], now: float) -> float:
+        """Plan the next warm-up of `league` from its upcoming kickoff."""
+        kickoff = next_kickoff(fixtures, now)
+        if kickoff is None:
+            delay = self.interval
+        elif kickoff - now <= self.lead:
+            delay = self.matchday_interval
+        else:
+            delay = min(self.interval, kickoff - self.lead - now)
+        self.next_due[league] = now + delay
+        return self.next_due[league]
+
+    def has_budget(self) -> bool:
+        if self.key_pool is None:
+            return True
+        return self.key_pool.headroom() > self.reserve
+
+    def run_pending(self, now: Optional[float] = None) -> List[int]:
+        """Warm every league that is due; returns the leagues warmed."""
+        now = time.time() if now is None else now
+        warmed = []
+        for league, due in sorted(self.next_due.items(), key=lambda item: item[1]):
+            if due > now:
+                continue
+            if not self.has_budget():
+                logging.info(f"Prefetch paused: API quota below {self.reserve:.0%} reserve")
+                break
+            token = None
+            if self.lock is not None:
+                try:
+                    token = self.lock.acquire(f"prefetch:{league}")
+                    if token is None:
+                        # Another worker is warming this league
+                        self.next_due[league] = now + self.matchday_interval
+                        continue
+                except Exception as e:
+                    logging.warning(f"Prefetch lock failed for league {league}: {e}")
+            fixtures = []
+            try:
+                fixtures = self.warm(league) or []
+                warmed.append(league)
+            except Exception as e:
+                logging.warning(f"Prefetch failed for league {league}: {e}")
+            finally:
+                if token is not None:
+                    try:
+                        self.lock.release(f"prefetch:{league}", token)
+                    except Exception as e:
+                        logging.warning(f"Prefetch lock release failed for league {league}: {e}")
+            due_at = self.schedule(league, fixtures, time.time())
+            logging.info(f"Prefetched league {league}; next run in {due_at - time.time():.0f}s")
+        return warmed
+
+    def run_forever(self, tick: float = PREFETCH_TICK) -> None:
+        while not self._stop.is_set():
+            self.run_pending()
+            self._stop.wait(tick)
+
+    def start(self, tick: float = PREFETCH_TICK) -> None:
+        """Run the schedule on a daemon thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run_forever, args=(tick,), name="prefetch", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Warm caches for upcoming matchdays")
+    parser.add_argument("--once", action="store_true", help="warm due leagues once and exit")
+    parser.add_argument("--leagues", help="comma-separated league ids (default: app LEAGUES)")
+    args = parser.parse_args(argv)
+
+    import app
+    leagues = [int(x) for x in args.leagues.split(",")] if args.leagues else [l["id"] for l in app.LEAGUES]
+    prefetcher = app.make_prefetcher(leagues)
+    if args.once:
+        warmed = prefetcher.run_pending()
+        print(f"[OK] Warmed leagues: {warmed}")
+        return 0
+    prefetcher.run_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Field projection of upstream payloads.
+
+RapidAPI team statistics and player payloads carry far more than the prompt
+or the UI use (per-minute goal splits, lineups, every passing/duel stat...).
+Each endpoint has a declarative schema of the fields to keep; payloads are
+projected before they are cached and before they are rendered into the
+prompt, which cuts cache memory and, above all, prompt tokens.
+
+Schema language:
+    True                  keep the value as is
+    ("a", "b")            keep only these keys of a dict
+    {"a": schema, ...}    keep these keys, projecting each value by its schema
+    Each(schema, limit)   project every (or the first `limit`) list item
+"""
+import os
+from typing import Any, Dict, List, Optional
+
+PROJECT_PAYLOADS = os.getenv("PROJECT_PAYLOADS", "1") == "1"
+
+
+class Each:
+    """Schema for a list: project each item (optionally only the first `limit`)."""
+
+    __slots__ = ("schema", "limit")
+
+    def __init__(self, schema: Any, limit: Optional[int] = None):
+        self.schema = schema
+        self.limit = limit
+
+
+def project(data: Any, schema: Any) -> Any:
+    """Keep only the fields of `data` named by `schema` (missing fields are skipped)."""
+    if schema is True or data is None:
+        return data
+    if isinstance(schema, Each):
+        if not isinstance(data, list):
+            return data
+        items = data if schema.limit is None else data[:schema.limit]
+        return [project(item, schema.schema) for item in items]
+    if not isinstance(data, dict):
+        return data
+    if isinstance(schema, tuple):
+        return {k: data[k] for k in schema if k in data}
+    return {k: project(data[k], sub) for k, sub in schema.items() if k in data}
+
+
+_SPLIT = ("home", "away", "total")
+
+TEAM_STATISTICS = {
+    "team": ("id", "name"),
+    "form": True,
+    "fixtures": {"played": _SPLIT, "wins": _SPLIT, "draws": _SPLIT, "loses": _SPLIT},
+    "goals": {
+        "for": {"total": _SPLIT, "average": _SPLIT},
+        "against": {"total": _SPLIT, "average": _SPLIT},
+    },
+    "clean_sheet": _SPLIT,
+    "failed_to_score": _SPLIT,
+    "biggest": {"streak": ("wins", "draws", "loses")},
+}
+
+PLAYER = {
+    "player": ("id", "name", "age", "injured"),
+    # First entry is the player's current team/league
+    "statistics": Each({
+        "team": ("id", "name"),
+        "games": ("appearences", "minutes", "position", "rating", "captain"),
+        "goals": ("total", "assists"),
+        "cards": ("yellow", "red"),
+    }, limit=1),
+}
+
+STANDINGS_ROW = {
+    "rank": True,
+    "team": ("id", "name"),
+    "points": True,
+    "goalsDiff": True,
+    "form": True,
+    "description": True,
+    "all": {"played": True, "win": True, "draw": True, "lose": True, "goals": True},
+}
+
+# Schema of the `response` field per RapidAPI endpoint
+PROJECTIONS: Dict[str, Any] = {
+    "teams/statistics": TEAM_STATISTICS,
+    "players": Each(PLAYER),
+}
+
+
+def project_payload(endpoint: str, payload: Any) -> Any:
+    """Project the `response` of a RapidAPI envelope by its endpoint's schema."""
+    schema = PROJECTIONS.get(endpoint)
+    if not PROJECT_PAYLOADS or schema is None or not isinstance(payload, dict) or "response" not in payload:
+        return payload
+    return dict(payload, response=project(payload["response"], schema))
+
+
+def _minutes(player: Dict[str, Any]) -> int:
+    stats = player.get("statistics") or [{}]
+    return (stats[0].get("games") or {}).get("minutes") or 0
+
+
+def key_players(players: List[Any], limit: int) -> List[Any]:
+    """Injured players first, then the most-used ones, up to `limit`."""
+    players = [p for p in players or [] if isinstance(p, dict)]
+    ranked = sorted(players, key=lambda p: (not (p.get("player") or {}).get("injured"), -_minutes(p)))
+    return ranked[:limit]
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Prompt engine: precompiled templates, compact JSON and a token budget.
+
+Templates (`prompts/prompt_<version>_over_under.md`) are read and compiled
+once into literal/placeholder segments; they are reloaded only when
+PROMPT_VERSION changes. Context is rendered as compact JSON, and if the prompt
+exceeds the token budget the lowest-value context is trimmed first (player
+details, then standings, then team statistics; fixtures are never dropped).
+Every render reports its size so model latency and cost can be tracked.
+"""
+import os
+import re
+import json
+import math
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PROMPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'prompts'))
+DEFAULT_PROMPT_VERSION = "v2"
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "8000"))
+# Rough chars-per-token ratio for Gemini on JSON-heavy text
+CHARS_PER_TOKEN = 4
+
+_PLACEHOLDER = re.compile(r"\{([a-z_]+)\}")
+
+INLINE_TEMPLATE = ('Analyze these upcoming football fixtures for "{query}" predictions:\n'
+                   '{fixtures_json}\nReturn JSON.')
+
+
+def compact_json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+class CompiledTemplate:
+    """A template split once into literal text and placeholder names."""
+
+    __slots__ = ("name", "parts", "fields")
+
+    def __init__(self, text: str, fields: Tuple[str, ...], name: str = "inline"):
+        self.name = name
+        self.fields = fields
+        # Only known fields are placeholders; other braces (JSON examples) stay literal
+        self.parts: List[Tuple[bool, str]] = []
+        pos = 0
+        for found in _PLACEHOLDER.finditer(text):
+            if found.group(1) not in fields:
+                continue
+            self.parts.append((False, text[pos:found.start()]))
+            self.parts.append((True, found.group(1)))
+            pos = found.end()
+        self.parts.append((False, text[pos:]))
+
+    def render(self, values: Dict[str, str]) -> str:
+        return "".join(values.get(part, "") if is_field else part for is_field, part in self.parts)
+
+
+class RenderedPrompt:
+    __slots__ = ("text", "version", "tokens", "trimmed")
+
+    def __init__(self, text: str, version: str, trimmed: List[str]):
+        self.text = text
+        self.version = version
+        self.tokens = estimate_tokens(text)
+        self.trimmed = trimmed
+
+    def stats(self) -> Dict[str, Any]:
+        return {"version": self.version, "chars": len(self.text), "tokens": self.tokens, "trimmed": self.trimmed}
+
+
+def _fewer_players(limit: int) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    def trim(sections: Dict[str, Any]) -> Dict[str, Any]:
+        players = sections.get("players_status_json") or {}
+        return dict(sections, players_status_json={t: p[:limit] for t, p in players.items()})
+    return trim
+
+
+def _team_stats_summary(sections: Dict[str, Any]) -> Dict[str, Any]:
+    stats = sections.get("team_stats_json") or {}
+    keep = ("team", "form", "goals")
+    return dict(sections, team_stats_json={t: {k: s[k] for k in keep if k in s} if isinstance(s, dict) else s
+                                           for t, s in stats.items()})
+
+
+def _drop(field: str, empty: Any) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    return lambda sections: dict(sections, **{field: empty})
+
+
+# Applied in order until the prompt fits the budget (lowest-value context first)
+TRIM_STEPS: List[Tuple[str, Callable[[Dict[str, Any]], Dict[str, Any]]]] = [
+    ("players:2", _fewer_players(2)),
+    ("players", _drop("players_status_json", {})),
+    ("standings", _drop("standings_json", [])),
+    ("team_stats:summary", _team_stats_summary),
+    ("team_stats", _drop("team_stats_json", {})),
+]
+
+FIELDS = ("fixtures_json", "team_stats_json", "players_status_json", "standings_json", "query")
+
+
+class PromptEngine:
+    """Renders prompts for the current PROMPT_VERSION within a token budget."""
+
+    def __init__(self, prompts_dir: str = PROMPTS_DIR, default_version: str = DEFAULT_PROMPT_VERSION,
+                 budget: int = PROMPT_TOKEN_BUDGET):
+        self.prompts_dir = prompts_dir
+        self.default_version = default_version
+        self.budget = budget
+        self._lock = threading.Lock()
+        self._loaded_version: Optional[str] = None
+        self._template: Optional[CompiledTemplate] = None
+        self._inline = CompiledTemplate(INLINE_TEMPLATE, FIELDS)
+
+    @property
+    def version(self) -> str:
+        return os.getenv("PROMPT_VERSION", self.default_version)
+
+    def path_for(self, version: str) -> str:
+        return os.path.join(self.prompts_dir, f"prompt_{version}_over_under.md")
+
+    def template(self) -> CompiledTemplate:
+        """Compiled template for the current version (reloaded only when it changes)."""
+        version = self.version
+        if version != self._loaded_version:
+            with self._lock:
+                if version != self._loaded_version:
+                    self._template = self._load(version)
+                    self._loaded_version = version
+        return self._template
+
+    def reload(self) -> None:
+        with self._lock:
+            self._loaded_version = None
+
+    def _load(self, version: str) -> CompiledTemplate:
+        path = self.path_for(version)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+        except OSError as e:
+            logging.warning(f"Prompt template {path} unavailable ({e}); using inline prompt")
+            return self._inline
+        logging.info(f"Loaded prompt template {version} from {path}")
+        return CompiledTemplate(text, FIELDS, name=version)
+
+    def render(self, sections: Dict[str, Any], query: str = "") -> RenderedPrompt:
+        """Render `sections` (fixtures_json, team_stats_json, ...) within the token budget."""
+        template = self.template()
+        trimmed: List[str] = []
+        text = self._render(template, sections, query)
+        for name, step in TRIM_STEPS:
+            if estimate_tokens(text) <= self.budget:
+                break
+            sections = step(sections)
+            trimmed.append(name)
+            text = self._render(template, sections, query)
+        rendered = RenderedPrompt(text, template.name, trimmed)
+        if rendered.tokens > self.budget:
+            logging.warning(f"Prompt still {rendered.tokens} tokens after trimming (budget {self.budget})")
+        return rendered
+
+    @staticmethod
+    def section_sizes(sections: Dict[str, Any]) -> Dict[str, int]:
+        """Rendered length of each section (add the sizes of several to estimate their merge)."""
+        return {name: len(compact_json(value)) for name, value in sections.items()}
+
+    def estimate(self, sizes: Dict[str, int], query: str = "") -> int:
+        """Tokens of an untrimmed render with sections of `sizes` chars, without rendering or logging."""
+        template = self.template()
+        chars = 0
+        for is_field, part in template.parts:
+            if not is_field:
+                chars += len(part)
+            else:
+                chars += len(query) if part == "query" else sizes.get(part, 0)
+        return math.ceil(chars / CHARS_PER_TOKEN)
+
+    @staticmethod
+    def _render(template: CompiledTemplate, sections: Dict[str, Any], query: str) -> str:
+        values = {k: compact_json(v) for k, v in sections.items()}
+        values["query"] = query
+        return template.render(values)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Request coalescing ("single-flight") for identical upstream fetches.
+
+`SingleFlight` shares one in-flight call per key between all threads of a
+worker, `AsyncSingleFlight` between the tasks of an event loop (ASGI mode). `RedisLock` extends this across workers: only the lock holder fetches,
+the others wait for the value to appear in the shared cache.
+"""
+import os
+import time
+import uuid
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# Compare-and-delete so a worker never releases a lock another worker now holds
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Deduplicate concurrent calls with the same key within a process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run `fn` once for all concurrent callers of `key` and share its outcome."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+        return call.result
+
+    def is_running(self, key: str) -> bool:
+        with self._lock:
+            return key in self._calls
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """Deduplicate concurrent coroutine calls with the same key within an event loop."""
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await `fn()` once for all concurrent callers of `key` and share its outcome."""
+        while key in self._calls:
+            call = self._calls[key]
+            try:
+                # shield: a cancelled follower must not cancel the leader's call
+                return await asyncio.shield(call)
+            except asyncio.CancelledError:
+                if not call.cancelled():
+                    raise
+                # The leader was cancelled: take over
+
+        call = self._calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            call.cancel()
+            raise
+        except BaseException as e:
+            call.set_exception(e)
+            # Followers re-raise it; keep the loop from reporting it as never retrieved
+            call.exception()
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+    def is_running(self, key: str) -> bool:
+        return key in self._calls
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+
+class RedisLock:
+    """Short-lived per-key fetch lock shared by all workers through Redis."""
+
+    def __init__(self, client, ttl: float = None, wait: float = None, poll: float = 0.05):
+        self.client = client
+        self.ttl = ttl if ttl is not None else float(os.getenv("SINGLEFLIGHT_LOCK_TTL", "30"))
+        self.wait = wait if wait is not None else float(os.getenv("SINGLEFLIGHT_LOCK_WAIT", "10"))
+        self.poll = poll
+
+    def _name(self, key: str) -> str:
+        return f"lock:{key}"
+
+    def acquire(self, key: str) -> Optional[str]:
+        """Try to take the lock; return a release token or None if held elsewhere."""
+        token = uuid.uuid4().hex
+        if self.client.set(self._name(key), token, nx=True, px=int(self.ttl * 1000)):
+            return token
+        return None
+
+    def release(self, key: str, token: str) -> None:
+        self.client.eval(_RELEASE_SCRIPT, 1, self._name(key), token)
+
+    def held(self, key: str) -> bool:
+        return bool(self.client.exists(self._name(key)))
+
+    def wait_for(self, key: str, probe: Callable[[], Any]) -> Any:
+        """Poll `probe` while another worker holds the lock; None if it gave up."""
+        deadline = time.monotonic() + self.wait
+        while time.monotonic() < deadline:
+            time.sleep(self.poll)
+            value = probe()
+            if value is not None:
+                return value
+            if not self.held(key):
+                return probe()
+        return None
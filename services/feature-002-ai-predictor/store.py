@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Local fixture/team/standings store (SQLite).
+
+Fixtures are kept one row per fixture id, merged from incremental syncs,
+instead of caching a whole season as one blob. Fixtures, teams and standings
+are normalised into indexed tables so "next N fixtures of a league", "fixtures
+of team X" and "today's matches" are index lookups rather than scans over the
+raw JSON. In-memory by default; set FIXTURE_STORE_PATH to a file to keep it
+across restarts.
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+FIXTURE_STORE_PATH = os.getenv("FIXTURE_STORE_PATH", ":memory:")
+
+FINISHED_STATUSES = ("FT", "AET", "PEN", "PST", "CANC", "ABD", "AWD", "WO")
+# Fixtures that kicked off this long ago may still be in play
+MATCH_LENGTH = 3 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fixtures (
+    id INTEGER PRIMARY KEY,
+    league INTEGER NOT NULL,
+    season INTEGER NOT NULL,
+    kickoff REAL,
+    status TEXT,
+    home_id INTEGER,
+    away_id INTEGER,
+    updated_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS teams (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    logo TEXT
+);
+CREATE TABLE IF NOT EXISTS standings (
+    league INTEGER NOT NULL,
+    season INTEGER NOT NULL,
+    team_id INTEGER NOT NULL,
+    rank INTEGER,
+    points INTEGER,
+    data TEXT NOT NULL,
+    PRIMARY KEY (league, season, team_id)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    league INTEGER NOT NULL,
+    season INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    synced_at REAL NOT NULL,
+    PRIMARY KEY (league, season, kind)
+);
+"""
+
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_fixtures_league_kickoff ON fixtures (league, season, kickoff);
+CREATE INDEX IF NOT EXISTS idx_fixtures_kickoff ON fixtures (kickoff);
+CREATE INDEX IF NOT EXISTS idx_fixtures_status ON fixtures (status);
+CREATE INDEX IF NOT EXISTS idx_fixtures_home ON fixtures (home_id, kickoff);
+CREATE INDEX IF NOT EXISTS idx_fixtures_away ON fixtures (away_id, kickoff);
+CREATE INDEX IF NOT EXISTS idx_standings_team ON standings (team_id);
+"""
+
+
+def fixture_kickoff(fixture: Dict[str, Any]) -> Optional[float]:
+    """Kickoff of a raw RapidAPI fixture as a UNIX timestamp."""
+    info = fixture.get("fixture", {})
+    if info.get("timestamp"):
+        return float(info["timestamp"])
+    try:
+        return datetime.fromisoformat(info.get("date", "")).timestamp()
+    except ValueError:
+        return None
+
+
+def upcoming_fixtures(fixtures: List[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+    """Next `limit` fixtures of a raw list: not finished, in kickoff order.
+
+    Used when fixtures come straight from RapidAPI rather than the store;
+    fixtures without a kickoff keep their order after the dated ones.
+    """
+    pending = [f for f in fixtures if f.get("fixture", {}).get("status", {}).get("short") not in FINISHED_STATUSES]
+    pending.sort(key=lambda f: (fixture_kickoff(f) is None, fixture_kickoff(f) or 0))
+    return pending[:limit]
+
+
+class FixtureStore:
+    """Thread-safe SQLite store of raw RapidAPI fixtures, teams and standings."""
+
+    def __init__(self, path: str = FIXTURE_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(_SCHEMA)
+        self._migrate()
+        self.db.executescript(_INDEXES)
+
+    def _migrate(self) -> None:
+        # Stores created before team columns existed
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(fixtures)")}
+        for column in ("home_id", "away_id"):
+            if column not in columns:
+                self.db.execute(f"ALTER TABLE fixtures ADD COLUMN {column} INTEGER")
+        self.db.commit()
+
+    # --- writes ---
+
+    def upsert_fixtures(self, league: int, season: int, fixtures: Iterable[Dict[str, Any]]) -> int:
+        """Merge fixtures (and their teams) into the store; returns how many were new or changed."""
+        now = time.time()
+        rows, teams = [], {}
+        for f in fixtures:
+            info = f.get("fixture", {})
+            if info.get("id") is None:
+                continue
+            home = f.get("teams", {}).get("home", {})
+            away = f.get("teams", {}).get("away", {})
+            for team in (home, away):
+                if team.get("id") is not None:
+                    teams[team["id"]] = (team["id"], team.get("name"), team.get("logo"))
+            rows.append((info["id"], league, season, fixture_kickoff(f), info.get("status", {}).get("short"),
+                         home.get("id"), away.get("id"), now,
+                         json.dumps(f, sort_keys=True, separators=(",", ":"))))
+        with self._lock, self.db:
+            before = self.db.total_changes
+            self.db.executemany(
+                "INSERT INTO fixtures (id, league, season, kickoff, status, home_id, away_id, updated_at, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET league=excluded.league, season=excluded.season, "
+                "kickoff=excluded.kickoff, status=excluded.status, home_id=excluded.home_id, "
+                "away_id=excluded.away_id, updated_at=excluded.updated_at, data=excluded.data "
+                "WHERE fixtures.data != excluded.data",
+                rows,
+            )
+            changed = self.db.total_changes - before
+            self.db.executemany("INSERT OR REPLACE INTO teams (id, name, logo) VALUES (?, ?, ?)", teams.values())
+            return changed
+
+    def upsert_standings(self, league: int, season: int, standings: List[Any]) -> int:
+        """Store the rows of a RapidAPI standings response, one per team."""
+        rows = []
+        for entry in standings or []:
+            for group in (entry.get("league", {}) if isinstance(entry, dict) else {}).get("standings", []):
+                for row in group:
+                    team_id = row.get("team", {}).get("id")
+                    if team_id is not None:
+                        rows.append((league, season, team_id, row.get("rank"), row.get("points"),
+                                     json.dumps(row, separators=(",", ":"))))
+        with self._lock, self.db:
+            self.db.executemany("INSERT OR REPLACE INTO standings (league, season, team_id, rank, points, data) "
+                                "VALUES (?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    # --- indexed lookups ---
+
+    def _query(self, sql: str, args: Iterable[Any]) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self.db.execute(sql, tuple(args)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def fixtures(self, league: int, season: int, start: Optional[float] = None,
+                 end: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Stored fixtures of a league/season by kickoff, optionally within [start, end)."""
+        sql = "SELECT data FROM fixtures WHERE league = ? AND season = ?"
+        args: List[Any] = [league, season]
+        if start is not None:
+            sql += " AND kickoff >= ?"
+            args.append(start)
+        if end is not None:
+            sql += " AND kickoff < ?"
+            args.append(end)
+        return self._query(sql + " ORDER BY kickoff, id", args)
+
+    def next_fixtures(self, league: int, season: int, limit: int = 10,
+                      now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Next `limit` unfinished fixtures of a league (including ones in play)."""
+        now = time.time() if now is None else now
+        marks = ",".join("?" * len(FINISHED_STATUSES))
+        return self._query(
+            "SELECT data FROM fixtures WHERE league = ? AND season = ? AND kickoff >= ? "
+            f"AND status NOT IN ({marks}) ORDER BY kickoff, id LIMIT ?",
+            [league, season, now - MATCH_LENGTH, *FINISHED_STATUSES, limit],
+        )
+
+    def team_fixtures(self, team_id: int, limit: int = 10, upcoming: bool = True,
+                      now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """A team's next (or most recent, `upcoming=False`) fixtures."""
+        now = time.time() if now is None else now
+        op, order = (">=", "ASC") if upcoming else ("<", "DESC")
+        return self._query(
+            f"SELECT data FROM (SELECT data, kickoff, id FROM fixtures WHERE home_id = ? AND kickoff {op} ? "
+            f"UNION ALL SELECT data, kickoff, id FROM fixtures WHERE away_id = ? AND kickoff {op} ?) "
+            f"ORDER BY kickoff {order}, id LIMIT ?",
+            [team_id, now, team_id, now, limit],
+        )
+
+    def todays_fixtures(self, league: Optional[int] = None, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Fixtures kicking off on the current UTC day, optionally for one league."""
+        now = time.time() if now is None else now
+        day = datetime.fromtimestamp(now, tz=timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        start, end = day.timestamp(), (day + timedelta(days=1)).timestamp()
+        if league is None:
+            return self._query("SELECT data FROM fixtures WHERE kickoff >= ? AND kickoff < ? ORDER BY kickoff, id",
+                               [start, end])
+        return self._query("SELECT data FROM fixtures WHERE league = ? AND kickoff >= ? AND kickoff < ? "
+                           "ORDER BY kickoff, id", [league, start, end])
+
+    def standings(self, league: int, season: int) -> List[Dict[str, Any]]:
+        """Stored standings rows of a league, by rank."""
+        return self._query("SELECT data FROM standings WHERE league = ? AND season = ? ORDER BY rank",
+                           [league, season])
+
+    def team(self, team_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self.db.execute("SELECT id, name, logo FROM teams WHERE id = ?", (team_id,)).fetchone()
+        return {"id": row[0], "name": row[1], "logo": row[2]} if row else None
+
+    # --- sync bookkeeping ---
+
+    def statuses(self, league: int, season: int) -> List[tuple]:
+        """(kickoff, status) of every stored fixture, for sync planning."""
+        with self._lock:
+            return self.db.execute("SELECT kickoff, status FROM fixtures WHERE league = ? AND season = ?",
+                                   (league, season)).fetchall()
+
+    def last_modified(self, league: int, season: int) -> float:
+        """When a fixture of the league/season last changed (0 if none stored)."""
+        with self._lock:
+            row = self.db.execute("SELECT MAX(updated_at) FROM fixtures WHERE league = ? AND season = ?",
+                                  (league, season)).fetchone()
+        return row[0] or 0.0
+
+    def seasons(self) -> List[tuple]:
+        """(league, season) pairs with stored fixtures."""
+        with self._lock:
+            return self.db.execute("SELECT DISTINCT league, season FROM fixtures ORDER BY league, season").fetchall()
+
+    def last_sync(self, league: int, season: int, kind: str) -> float:
+        with self._lock:
+            row = self.db.execute("SELECT synced_at FROM sync_state WHERE league = ? AND season = ? AND kind = ?",
+                                  (league, season, kind)).fetchone()
+        return row[0] if row else 0.0
+
+    def mark_synced(self, league: int, season: int, kind: str, at: Optional[float] = None) -> None:
+        with self._lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO sync_state (league, season, kind, synced_at) VALUES (?, ?, ?, ?)",
+                            (league, season, kind, time.time() if at is None else at))
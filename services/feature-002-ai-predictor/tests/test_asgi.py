@@ -0,0 +1,203 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, APP_DIR)
+
+import app as predictor_app
+import asgi
+from async_fetcher import AsyncEFootballFetcher
+from key_pool import KeyPool
+
+
+class Resp:
+    def __init__(self, payload, status_code=200, headers=None):
+        self.payload = payload
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+    def json(self):
+        return self.payload
+
+
+def fixture(league):
+    return {"fixture": {"id": league, "date": "2099-08-16T14:00:00+00:00", "status": {"short": "NS"}},
+            "teams": {"home": {"id": league * 10, "name": f"Home{league}"},
+                      "away": {"id": league * 10 + 1, "name": f"Away{league}"}}}
+
+
+class SlowApi:
+    """RapidAPI stand-in: every call takes `delay` seconds of awaited I/O."""
+
+    def __init__(self, delay=0.1, limited=()):
+        self.delay = delay
+        self.limited = set(limited)
+        self.calls = []
+
+    async def get(self, url, headers=None, params=None, timeout=None):
+        self.calls.append((url.rsplit("/v3/", 1)[-1], headers["X-RapidAPI-Key"]))
+        await asyncio.sleep(self.delay)
+        if headers["X-RapidAPI-Key"] in self.limited:
+            return Resp({}, 429, {"Retry-After": "120"})
+        if url.endswith("/fixtures"):
+            return Resp({"response": [fixture(params["league"])], "errors": []})
+        if url.endswith("/teams/statistics"):
+            return Resp({"response": {}, "errors": []})
+        return Resp({"response": [], "errors": []})
+
+
+class AsyncModel:
+    """Gemini stand-in with an async API; tracks how many calls overlap."""
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def generate_content_async(self, prompt, **kwargs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        home = prompt.split('"home":"', 1)[1].split('"', 1)[0]
+        away = home.replace("Home", "Away")
+
+        class Answer:
+            text = json.dumps({"matches": [{"home": home, "away": away, "prediction": "OVER", "probability": 60}]})
+
+        return Answer()
+
+
+async def call(asgi_app, method, path, body=None):
+    sent = []
+    payload = json.dumps(body).encode() if body is not None else b""
+
+    async def receive():
+        return {"type": "http.request", "body": payload, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": method, "path": path, "query_string": b"",
+             "headers": [(b"content-type", b"application/json")]}
+    await asgi_app(scope, receive, send)
+    return sent[0]["status"], b"".join(m.get("body", b"") for m in sent[1:])
+
+
+def test_async_fetcher_rotates_keys_and_coalesces_cached_loads():
+    api = SlowApi(delay=0.05, limited={"a"})
+    cache = predictor_app.TieredCache([predictor_app.MemoryTier()])
+    fetcher = AsyncEFootballFetcher(client=api, base_url="http://test/v3", cache=cache,
+                                    key_pool=KeyPool(["a", "b"], per_minute=100, per_day=1000))
+
+    async def run():
+        return await asyncio.gather(*(fetcher.fetch_fixtures(39, 2025) for _ in range(10)))
+
+    results = asyncio.run(run())
+    assert all(r["response"][0]["fixture"]["id"] == 39 for r in results)
+    # One load for all ten callers; the rate-limited key was skipped
+    assert [key for _, key in api.calls][-1] == "b" and len(api.calls) <= 2
+    asyncio.run(fetcher.fetch_fixtures(39, 2025))
+    assert len(api.calls) <= 2
+
+
+def test_predictions_stay_in_flight_concurrently(monkeypatch):
+    api, model = SlowApi(delay=0.1), AsyncModel(delay=0.2)
+    cache = predictor_app.TieredCache([predictor_app.MemoryTier()])
+    monkeypatch.setattr(predictor_app, "DEMO_MODE", False)
+    monkeypatch.setattr(predictor_app, "FIXTURE_SYNC", False)
+    monkeypatch.setattr(predictor_app, "model", model)
+    monkeypatch.setattr(predictor_app, "response_cache", cache)
+    monkeypatch.setattr(predictor_app, "make_async_fetcher",
+                        lambda api_key=None: AsyncEFootballFetcher("k", client=api, cache=cache))
+    asgi_app = asgi.AsgiApp()
+
+    async def run():
+        return await asyncio.gather(*(call(asgi_app, "POST", "/api/predict", {"league": league, "mode": "llm"})
+                                      for league in range(1, 101)))
+
+    start = time.monotonic()
+    responses = asyncio.run(run())
+    elapsed = time.monotonic() - start
+
+    assert all(status == 200 for status, _ in responses)
+    bodies = [json.loads(body) for _, body in responses]
+    assert [b["matches"][0]["fixture_id"] for b in bodies] == list(range(1, 101))
+    # 100 x (fixtures + context + model) one after another would take 40s
+    assert elapsed < 10 and model.max_in_flight >= 50
+    asgi_app.bridge.close()
+
+
+def test_other_routes_and_streams_go_through_flask(monkeypatch):
+    fixtures = {"response": [fixture(1)]}
+
+    class StreamingModel:
+        def generate_content(self, prompt, stream=False, **kwargs):
+            class Chunk:
+                text = json.dumps({"matches": [{"home": "Home1", "away": "Away1", "prediction": "OVER"}]})
+            return [Chunk()]
+
+    monkeypatch.setattr(predictor_app, "DEMO_MODE", False)
+    monkeypatch.setattr(predictor_app, "model", StreamingModel())
+    monkeypatch.setattr(predictor_app, "get_fixtures", lambda league, season, upcoming=False: fixtures)
+    monkeypatch.setattr(predictor_app, "response_cache", predictor_app.TieredCache([predictor_app.MemoryTier()]))
+    asgi_app = asgi.AsgiApp()
+
+    status, body = asyncio.run(call(asgi_app, "GET", "/api/leagues"))
+    assert status == 200 and json.loads(body) == predictor_app.LEAGUES
+
+    status, body = asyncio.run(call(asgi_app, "POST", "/api/predict/stream", {"league": 39}))
+    events = [block.split("\n", 1)[0] for block in body.decode().strip().split("\n\n")]
+    assert status == 200 and "event: match" in events and events[-1] == "event: done"
+
+    status, _ = asyncio.run(call(asgi_app, "POST", "/api/predict", {"mode": "x"}))
+    assert status == 400
+    asgi_app.bridge.close()
+
+
+def test_key_waits_and_tier_io_stay_off_the_default_executor(monkeypatch):
+    from async_fetcher import acquire_key
+    from cache import run_io, start_age_tracking, tracked_age
+    from key_pool import KeyPoolExhausted
+
+    def no_default_executor(*args, **kwargs):
+        raise AssertionError("asyncio.to_thread used")
+
+    monkeypatch.setattr(asyncio, "to_thread", no_default_executor)
+    pool = KeyPool(["a"], per_minute=600, per_day=10000)   # refills a token every 0.1s
+    take_threads = set()
+    try_acquire = pool.try_acquire
+    monkeypatch.setattr(pool, "try_acquire",
+                        lambda: take_threads.add(threading.current_thread().name) or try_acquire())
+
+    async def run():
+        first = await acquire_key(pool)
+        while try_acquire() is not None:
+            pass
+        start = time.monotonic()
+        second = await acquire_key(pool, wait=1)
+        waited = time.monotonic() - start
+        pool.cooldown("a", 60)
+        try:
+            await acquire_key(pool, wait=0.1)
+            exhausted = False
+        except KeyPoolExhausted:
+            exhausted = True
+        start_age_tracking()
+        thread = await run_io(lambda: (tracked_age() is not None, threading.current_thread().name))
+        return first, second, waited, exhausted, thread
+
+    first, second, waited, exhausted, (tracked, thread_name) = asyncio.run(run())
+    assert first == second == "a" and 0.02 < waited < 0.5 and exhausted
+    # Token takes (a Redis round trip with a shared pool) never run on the loop's thread
+    assert take_threads and all(name.startswith("cache-io") for name in take_threads)
+    # Blocking I/O runs on the dedicated pool, with the request's tracking context
+    assert tracked and thread_name.startswith("cache-io")
@@ -0,0 +1,102 @@
+import os
+import sys
+import json
+
+import numpy as np
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, APP_DIR)
+
+import backtest
+from backtest import Score, walk_forward, finished, llm_probabilities
+from goal_model import GoalModel
+from store import FixtureStore
+
+
+def synthetic_season(league, season, teams=10, seed=0):
+    """Double round robin, one round per day; strong teams have low ids."""
+    rng = np.random.default_rng(seed)
+    strength = np.linspace(1.6, 0.6, teams)
+    fixtures, fid = [], league * 100000 + season * 10
+    pairs = [(h, a) for h in range(teams) for a in range(teams) if h != a]
+    for i, (h, a) in enumerate(pairs):
+        fid += 1
+        kickoff = 1700000000 + (i // (teams // 2)) * 86400
+        fixtures.append({
+            "fixture": {"id": fid, "timestamp": kickoff, "status": {"short": "FT"}},
+            "teams": {"home": {"id": h + 1, "name": f"Team {h + 1}"}, "away": {"id": a + 1, "name": f"Team {a + 1}"}},
+            "goals": {"home": int(rng.poisson(1.2 * strength[h] / strength[a] ** 0.5)),
+                      "away": int(rng.poisson(0.9 * strength[a] / strength[h] ** 0.5))},
+        })
+    return fixtures
+
+
+def test_scores_match_hand_computed_values():
+    score = Score.binary(np.array([0.8, 0.4]), np.array([True, True]))
+    assert score.as_dict() == {"n": 2, "brier": round((0.04 + 0.36) / 2, 4),
+                               "log_loss": round(-(np.log(0.8) + np.log(0.4)) / 2, 4), "hit_rate": 0.5}
+    three = Score.categorical(np.array([[0.5, 0.3, 0.2]]), np.array([0]))
+    assert three.as_dict()["brier"] == round(0.25 + 0.09 + 0.04, 4)
+    assert (score + three).n == 3
+
+
+def test_walk_forward_only_uses_earlier_days():
+    results = finished(synthetic_season(39, 2023))
+    mask, p = walk_forward(results, GoalModel(), min_history=20)
+    assert not mask[:20].any() and mask[-1]
+
+    # Changing the last day's scores must not change any earlier prediction
+    changed = [dict(f, goals={"home": 9, "away": 9}) if i >= len(results) - 5 else f for i, f in enumerate(results)]
+    _, q = walk_forward(changed, GoalModel(), min_history=20)
+    assert np.allclose(p["over"], q["over"])
+
+
+def test_llm_predictions_join_by_id_or_team_names():
+    results = finished(synthetic_season(39, 2023))[:3]
+    rows = [{"fixture_id": results[0]["fixture"]["id"], "prediction": "OVER", "probability": 70},
+            {"home_team": "Team 1", "away_team": "Team 3", "prediction": "Under 2.5", "probability": 60,
+             "prediction_type": "over 2.5"},
+            {"home": "Team 1", "away": "Team 4", "prediction": "OVER", "probability": 90, "query": "over 1.5"}]
+    index, p_over = llm_probabilities(results, rows, 2.5)
+    assert list(index) == [0, 1] and np.allclose(p_over, [0.7, 0.4])
+
+
+def test_backtest_runs_archive_seasons_in_parallel(tmp_path, capsys):
+    for league, season in ((39, 2023), (140, 2023)):
+        with open(tmp_path / f"{league}_{season}.json", "w", encoding="utf-8") as f:
+            json.dump({"response": synthetic_season(league, season, seed=league)}, f)
+    rows = [{"fixture_id": f["fixture"]["id"], "prediction": "OVER", "probability": 55}
+            for f in synthetic_season(39, 2023)]
+    with open(tmp_path / "preds.jsonl", "w", encoding="utf-8") as f:
+        f.write("\n".join(json.dumps(r) for r in rows))
+
+    report = backtest.backtest(str(tmp_path), backtest.archive_seasons(str(tmp_path)),
+                               predictions=backtest.load_predictions(str(tmp_path / "preds.jsonl")), workers=2)
+    assert report["fixtures"] == 180
+    total = report["total"]
+    assert total["model/over"]["n"] == 2 * (90 - 30)
+    assert total["llm/over"]["n"] == 90
+    assert 0 < total["model/1x2"]["brier"] < 1 and 0 < total["model/over"]["hit_rate"] <= 1
+
+    assert backtest.main(["--archive", str(tmp_path), "--leagues", "39", "--workers", "1"]) == 0
+    assert "TOTAL (90 fixtures" in capsys.readouterr().out
+
+
+def test_store_archive(tmp_path):
+    store = FixtureStore(str(tmp_path / "fixtures.db"))
+    store.upsert_fixtures(39, 2023, synthetic_season(39, 2023))
+    assert backtest.archive_seasons(str(tmp_path / "fixtures.db")) == [(39, 2023)]
+    assert backtest.evaluate_season(str(tmp_path / "fixtures.db"), 39, 2023)["fixtures"] == 90
+
+
+def test_llm_predictions_of_other_seasons_are_dropped():
+    results = finished(synthetic_season(39, 2023))[:1]
+    home, away = results[0]["teams"]["home"]["name"], results[0]["teams"]["away"]["name"]
+    rows = [{"league_id": 39, "season": 2023, "home_team": home, "away_team": away, "prediction": "OVER",
+             "probability": 70},
+            {"league_id": 39, "season": 2024, "home_team": home, "away_team": away, "prediction": "UNDER",
+             "probability": 90},
+            {"league_id": 140, "season": 2023, "fixture_id": results[0]["fixture"]["id"], "prediction": "UNDER",
+             "probability": 90}]
+    index, p_over = llm_probabilities(results, rows, 2.5, league=39, season=2023)
+    assert list(index) == [0] and np.allclose(p_over, [0.7])
@@ -0,0 +1,139 @@
+import os
+import sys
+import time
+
+import pytest
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, APP_DIR)
+
+import circuit
+from cache import CacheEntry, TieredCache, MemoryTier, cache_key
+from circuit import CircuitBreaker, CircuitOpenError, breaker_for, reset_breakers
+from main import EFootballFetcher
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers():
+    reset_breakers()
+    yield
+    reset_breakers()
+
+
+class StatusSession:
+    def __init__(self, status):
+        self.status = status
+        self.calls = 0
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        self.calls += 1
+        status = self.status
+
+        class Resp:
+            status_code = status
+
+            def raise_for_status(self):
+                if status >= 400:
+                    raise RuntimeError(f"HTTP {status}")
+
+            def json(self):
+                return {"response": [{"league": {"id": 39}}], "errors": []}
+
+        return Resp()
+
+
+def fail():
+    raise ConnectionError("upstream down")
+
+
+def test_opens_after_threshold_and_fails_fast():
+    breaker = CircuitBreaker("t", failure_threshold=2, reset_timeout=60)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            breaker.call(lambda timeout: fail(), 5)
+    assert breaker.state == circuit.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda timeout: "never called", 5)
+
+
+def test_half_open_lets_one_probe_through_and_closes_on_success():
+    breaker = CircuitBreaker("t", failure_threshold=1, reset_timeout=0.05)
+    with pytest.raises(ConnectionError):
+        breaker.call(lambda timeout: fail(), 5)
+    time.sleep(0.06)
+    assert breaker.allow()          # the probe
+    assert not breaker.allow()      # everyone else still fails fast
+    breaker.record_success(0.1)
+    assert breaker.state == circuit.CLOSED
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker("t", failure_threshold=3, reset_timeout=0.05)
+    for _ in range(3):
+        breaker.record_failure()
+    time.sleep(0.06)
+    with pytest.raises(ConnectionError):
+        breaker.call(lambda timeout: fail(), 5)
+    assert breaker.state == circuit.OPEN
+
+
+def test_timeout_adapts_to_latency_percentile(monkeypatch):
+    monkeypatch.setattr(circuit, "TIMEOUT_MIN_SAMPLES", 5)
+    monkeypatch.setattr(circuit, "TIMEOUT_MULTIPLIER", 3.0)
+    monkeypatch.setattr(circuit, "TIMEOUT_FLOOR", 0.5)
+    breaker = CircuitBreaker("t")
+    assert breaker.timeout(30) == 30  # not enough samples yet
+    for _ in range(10):
+        breaker.record_success(1.0)
+    assert breaker.timeout(30) == pytest.approx(3.0)
+    assert breaker.timeout(2) == 2    # never above the configured ceiling
+
+
+def test_server_errors_open_endpoint_circuit_and_cache_serves_stale(monkeypatch):
+    monkeypatch.setattr(circuit, "FAILURE_THRESHOLD", 2)
+    cache = TieredCache([MemoryTier()], stale_while_revalidate=0, max_stale=86400)
+    key = cache_key("standings", {"league": 39, "season": 2025})
+    cache.tiers[0].set(key, CacheEntry({"response": ["old"], "errors": []}, time.time() - 7200), 86400)
+    session = StatusSession(503)
+    fetcher = EFootballFetcher("key", session=session, base_url="http://test", cache=cache)
+
+    for _ in range(3):
+        assert fetcher.fetch_standings(39, 2025) == {"response": ["old"], "errors": []}
+
+    assert breaker_for("rapidapi:standings").state == circuit.OPEN
+    assert session.calls == 2  # third call failed fast without touching upstream
+
+
+def test_predict_serves_last_known_prediction_when_model_circuit_is_open(monkeypatch):
+    import app as predictor_app
+
+    class Model:
+        calls = 0
+
+        def generate_content(self, prompt, **kwargs):
+            Model.calls += 1
+            if Model.calls > 1:
+                raise TimeoutError("deadline exceeded")
+
+            class Resp:
+                text = '{"matches": [{"home": "Arsenal", "away": "Chelsea", "prediction": "OVER", "probability": 61}]}'
+            return Resp()
+
+    monkeypatch.setattr(circuit, "FAILURE_THRESHOLD", 1)
+    monkeypatch.setattr(predictor_app, "model", Model())
+    monkeypatch.setattr(predictor_app, "response_cache", TieredCache([MemoryTier()]))
+
+    def fixtures(status):
+        return {"response": [{"fixture": {"id": 1, "status": {"short": status}},
+                              "teams": {"home": {"id": 10, "name": "Arsenal"}, "away": {"id": 11, "name": "Chelsea"}}}]}
+
+    predictor_app.ai_predict(fixtures("NS"), "over 2.5")
+    failed = predictor_app.ai_predict(fixtures("1H"), "over 2.5")
+    short_circuited = predictor_app.ai_predict(fixtures("HT"), "over 2.5")
+
+    for result in (failed, short_circuited):
+        assert result["matches"][0]["prediction"] == "OVER"
+        assert result["matches"][0]["stale"] is True
+        assert result["stale"] == 1
+    assert "is open" in short_circuited["error"]
+    assert Model.calls == 2
@@ -0,0 +1,104 @@
+import os
+import sys
+import json
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, APP_DIR)
+
+from cache import CacheEntry, RedisTier, is_cacheable
+from compact import FixtureColumns, StandingsColumns
+
+
+def season(n=380):
+    return {"get": "fixtures", "parameters": {"league": "39", "season": "2025"}, "errors": [], "results": n,
+            "response": [{
+                "fixture": {"id": 1000 + i, "date": "2025-08-16T14:00:00+00:00", "timestamp": 1755352800 + i * 3600,
+                            "status": {"short": "FT" if i < 100 else "NS", "long": "Match Finished" if i < 100 else "Not Started"},
+                            "venue": {"id": 1 + i % 10, "name": "Stadium", "city": "City"}, "referee": "Ref",
+                            "timezone": "UTC", "periods": {"first": None, "second": None}},
+                "league": {"id": 39, "name": "Premier League", "country": "England", "season": 2025,
+                           "round": f"Regular Season - {i // 10 + 1}", "logo": "x", "flag": "y"},
+                "teams": {"home": {"id": 40 + i % 20, "name": f"Team {i % 20}", "logo": "l", "winner": True if i < 100 else None},
+                          "away": {"id": 40 + (i + 1) % 20, "name": f"Team {(i + 1) % 20}", "logo": "l",
+                                   "winner": False if i < 100 else None}},
+                "goals": {"home": 2 if i < 100 else None, "away": 1 if i < 100 else None},
+                "score": {"halftime": {"home": 1 if i < 100 else None, "away": 0 if i < 100 else None},
+                          "fulltime": {"home": 2 if i < 100 else None, "away": 1 if i < 100 else None}},
+            } for i in range(n)]}
+
+
+def table():
+    rows = [{"rank": r + 1, "team": {"id": 40 + r, "name": f"Team {r}", "logo": "l"}, "points": 30 - r,
+             "goalsDiff": 10 - r, "group": "Premier League", "form": "WWDLW", "description": None,
+             "status": "same", "update": "2025-11-01T00:00:00+00:00",
+             "all": {"played": 12, "win": 9, "draw": 3, "lose": 0, "goals": {"for": 20, "against": 10}},
+             "home": {"played": 6, "win": 5, "draw": 1, "lose": 0, "goals": {"for": 12, "against": 4}},
+             "away": {"played": 6, "win": 4, "draw": 2, "lose": 0, "goals": {"for": 8, "against": 6}}}
+            for r in range(20)]
+    return {"parameters": {}, "errors": [], "response": [
+        {"league": {"id": 39, "name": "Premier League", "country": "England", "logo": "x", "flag": "y",
+                    "season": 2025, "standings": [rows]}}]}
+
+
+class DictRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value.encode() if isinstance(value, str) else value
+
+
+def test_fixture_columns_keep_fields_the_app_uses():
+    payload = season(3)
+    out = FixtureColumns.from_bytes(FixtureColumns.from_response(payload).to_bytes()).to_response()
+    original, restored = payload["response"][0], out["response"][0]
+    assert restored["fixture"]["id"] == original["fixture"]["id"]
+    assert restored["fixture"]["date"] == original["fixture"]["date"]
+    assert restored["fixture"]["status"] == original["fixture"]["status"]
+    assert restored["teams"]["home"]["name"] == original["teams"]["home"]["name"]
+    assert restored["league"]["round"] == original["league"]["round"]
+    assert restored["goals"] == original["goals"]
+    assert out["response"][2]["fixture"]["timestamp"] == payload["response"][2]["fixture"]["timestamp"]
+
+
+def test_fixture_columns_are_lossless():
+    payload = season()
+    payload["response"][5]["fixture"]["date"] = "2025-08-16T20:00:00+01:00"
+    payload["response"][6]["fixture"]["status"]["elapsed"] = 90
+    payload["response"][7]["teams"]["home"]["name"] = None
+    del payload["response"][8]["goals"]["away"]
+    out = FixtureColumns.from_bytes(FixtureColumns.from_response(payload).to_bytes()).to_response()
+    assert out["response"] == payload["response"]
+    assert out["parameters"] == payload["parameters"]
+
+    out["response"][0]["fixture"]["venue"]["name"] = "changed"
+    assert out["response"][10]["fixture"]["venue"]["name"] == "Stadium"
+
+
+def test_standings_round_trip():
+    payload = table()
+    out = StandingsColumns.from_bytes(StandingsColumns.from_response(payload).to_bytes()).to_response()
+    assert out["response"] == payload["response"]
+
+
+def test_binary_frame_is_much_smaller_than_json_and_round_trips_through_redis():
+    payload = season()
+    columns = FixtureColumns.from_response(payload)
+    assert is_cacheable(columns)
+    entry = CacheEntry(columns)
+    assert len(entry.encode()) * 4 < len(json.dumps(payload))
+
+    tier = RedisTier(DictRedis())
+    tier.set("k", entry, 60)
+    restored = tier.get("k")
+    assert restored.stored_at == entry.stored_at
+    assert restored.value.to_response() == columns.to_response()
+
+
+def test_supabase_form_is_json_safe():
+    entry = CacheEntry(StandingsColumns.from_response(table()))
+    restored = CacheEntry.from_dict(json.loads(json.dumps(entry.to_dict())))
+    assert restored.value.to_response() == entry.value.to_response()
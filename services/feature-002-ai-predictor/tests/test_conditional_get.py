@@ -0,0 +1,149 @@
+import os
+import sys
+import gzip
+import json
+import time
+from datetime import datetime, timezone
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, APP_DIR)
+
+import app as predictor_app
+from cache import record_version
+
+
+def make_fixture(fid, date, status, home, away):
+    return {"fixture": {"id": fid, "date": date, "status": {"short": status}},
+            "teams": {"home": {"id": home, "name": f"T{home}"}, "away": {"id": away, "name": f"T{away}"}}}
+
+
+FIXTURES = [
+    make_fixture(1, "2025-08-16T14:00:00+00:00", "FT", 10, 11),
+    make_fixture(2, "2025-08-17T14:00:00+00:00", "NS", 12, 10),
+    make_fixture(3, "2025-08-23T14:00:00+00:00", "NS", 11, 12),
+]
+
+
+def serve_fixtures(monkeypatch, version=1000.0):
+    state = {"version": version}
+
+    def fake_fixtures(league=39, season=2025, upcoming=False):
+        record_version(f"fixtures:{league}:{season}", state["version"])
+        return {"response": FIXTURES, "errors": []}
+
+    monkeypatch.setattr(predictor_app, "FIXTURE_SYNC", False)
+    monkeypatch.setattr(predictor_app, "get_fixtures", fake_fixtures)
+    return state
+
+
+def test_matching_etag_gets_304_until_the_data_changes(monkeypatch):
+    state = serve_fixtures(monkeypatch)
+    client = predictor_app.app.test_client()
+
+    first = client.get("/api/fixtures?league=39")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and first.headers["Last-Modified"]
+
+    again = client.get("/api/fixtures?league=39", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.data == b""
+    # Another query of the same data is another representation
+    assert client.get("/api/fixtures?league=39&status=NS", headers={"If-None-Match": etag}).status_code == 200
+
+    state["version"] = 2000.0
+    changed = client.get("/api/fixtures?league=39", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+
+
+def test_large_bodies_are_gzipped_when_accepted(monkeypatch):
+    serve_fixtures(monkeypatch)
+    monkeypatch.setattr("api_response.COMPRESS_MIN_BYTES", 0)
+    client = predictor_app.app.test_client()
+
+    resp = client.get("/api/fixtures", headers={"Accept-Encoding": "gzip;q=1.0, identity;q=0.5"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert resp.headers["Vary"] == "Accept-Encoding"
+    assert json.loads(gzip.decompress(resp.data))["total"] == 3
+
+    plain = client.get("/api/fixtures", headers={"Accept-Encoding": "gzip;q=0"})
+    assert "Content-Encoding" not in plain.headers and plain.get_json()["total"] == 3
+
+
+def test_fixture_filters_fields_and_paging(monkeypatch):
+    serve_fixtures(monkeypatch)
+    client = predictor_app.app.test_client()
+
+    body = client.get("/api/fixtures?from=2025-08-17&to=2025-08-23&team=12&fields=fixture.id").get_json()
+    assert body["response"] == [{"fixture": {"id": 2}}, {"fixture": {"id": 3}}]
+    assert client.get("/api/fixtures?status=ft").get_json()["total"] == 1
+
+    page = client.get("/api/fixtures?limit=1&offset=1&fields=fixture.id").get_json()
+    assert page["response"] == [{"fixture": {"id": 2}}]
+    assert (page["total"], page["results"], page["offset"], page["limit"]) == (3, 1, 1, 1)
+
+    assert client.get("/api/fixtures?from=16-08-2025").status_code == 400
+    assert client.get("/api/fixtures?team=arsenal").status_code == 400
+
+
+def test_standings_team_filter_returns_rows(monkeypatch):
+    table = {"response": [{"league": {"id": 39, "standings": [[
+        {"rank": 1, "team": {"id": 10, "name": "T10"}, "points": 9},
+        {"rank": 2, "team": {"id": 11, "name": "T11"}, "points": 6},
+    ]]}}], "errors": []}
+
+    class Fetcher:
+        def fetch_standings(self, league, season):
+            return table
+
+    monkeypatch.setattr(predictor_app, "make_fetcher", lambda api_key=None: Fetcher())
+    client = predictor_app.app.test_client()
+
+    assert client.get("/api/standings").get_json()["response"] == table["response"]
+    body = client.get("/api/standings?team=11&fields=rank,team.name").get_json()
+    assert body["response"] == [{"rank": 2, "team": {"name": "T11"}}]
+    # Nothing versioned behind it: the ETag is the body's
+    etag = client.get("/api/standings").headers["ETag"]
+    assert client.get("/api/standings", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_store_serves_its_window_and_the_season_the_rest(monkeypatch):
+    from fixture_sync import FixtureSync
+    from store import FixtureStore
+
+    now = time.time()
+    today = datetime.fromtimestamp(now, tz=timezone.utc).date()
+    store = FixtureStore(":memory:")
+    store.upsert_fixtures(39, 2025, [make_fixture(4, f"{today}T23:00:00+00:00", "NS", 10, 12)])
+    store.mark_synced(39, 2025, "window", now)
+    season_calls = []
+
+    class Fetcher:
+        def fetch_fixtures(self, league, season):
+            season_calls.append(league)
+            record_version(f"fixtures:{league}:{season}", 1000.0)
+            return {"response": FIXTURES, "errors": []}
+
+    monkeypatch.setattr(predictor_app, "FIXTURE_SYNC", True)
+    monkeypatch.setattr(predictor_app, "fixture_store", store)
+    monkeypatch.setattr(predictor_app, "fixture_sync", FixtureSync(store, Fetcher))
+    monkeypatch.setattr(predictor_app, "make_fetcher", lambda api_key=None: Fetcher())
+    client = predictor_app.app.test_client()
+
+    body = client.get(f"/api/fixtures?from={today}&to={today}").get_json()
+    assert [f["fixture"]["id"] for f in body["response"]] == [4] and season_calls == []
+    # Finished fixtures of the whole season and old windows come from the season response
+    assert client.get("/api/fixtures?status=FT").get_json()["total"] == 1
+    body = client.get("/api/fixtures?from=2025-08-16&to=2025-08-17").get_json()
+    assert [f["fixture"]["id"] for f in body["response"]] == [1, 2] and len(season_calls) == 2
+
+
+def test_etag_follows_the_fixtures_returned(monkeypatch):
+    serve_fixtures(monkeypatch)
+    client = predictor_app.app.test_client()
+    etag = client.get("/api/fixtures?status=NS").headers["ETag"]
+    # Same source version and query, but another set of fixtures
+    FIXTURES.append(make_fixture(5, "2025-08-30T14:00:00+00:00", "NS", 10, 11))
+    try:
+        changed = client.get("/api/fixtures?status=NS", headers={"If-None-Match": etag})
+        assert changed.status_code == 200 and changed.get_json()["total"] == 3
+    finally:
+        FIXTURES.pop()
@@ -7,13 +7,24 @@ BASE_DIR = os.path.dirname(__file__)
 APP_DIR = os.path.abspath(os.path.join(BASE_DIR, '..'))
 
 
-def start_app():
+def start_app(timeout=15):
     env = os.environ.copy()
     env['DEMO_MODE'] = '1'
     # Start the app as a subprocess
     p = subprocess.Popen(['python', 'app.py'], cwd=APP_DIR, env=env)
-    time.sleep(2)
-    return p
+    # Poll readiness instead of sleeping for a fixed time
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if p.poll() is not None:
+            raise RuntimeError(f"app exited with code {p.returncode}")
+        try:
+            if requests.get('http://127.0.0.1:5000/api/ready', timeout=1).status_code == 200:
+                return p
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.05)
+    stop_app(p)
+    raise RuntimeError("app not ready in time")
 
 
 def stop_app(p):
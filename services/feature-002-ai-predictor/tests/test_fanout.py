@@ -0,0 +1,32 @@
+import os
+import sys
+import time
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, APP_DIR)
+
+from fanout import fan_out
+
+
+def test_fan_out_runs_concurrently():
+    calls = {i: (lambda i=i: (time.sleep(0.2), i)[1]) for i in range(6)}
+    outcome = fan_out(calls, max_workers=6, deadline=5)
+    assert outcome.complete
+    assert outcome.results == {i: i for i in range(6)}
+    assert outcome.elapsed < 0.6
+
+
+def test_fan_out_returns_partial_results_on_deadline():
+    def boom():
+        raise RuntimeError("upstream down")
+
+    calls = {
+        "fast": lambda: "ok",
+        "slow": lambda: time.sleep(2),
+        "error": boom,
+    }
+    outcome = fan_out(calls, max_workers=3, deadline=0.3)
+    assert outcome.results == {"fast": "ok"}
+    assert outcome.timed_out == {"slow"}
+    assert isinstance(outcome.errors["error"], RuntimeError)
+    assert outcome.elapsed < 1
@@ -0,0 +1,140 @@
+import os
+import sys
+import time
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, APP_DIR)
+
+from fixture_sync import FixtureSync
+from store import FixtureStore
+
+NOW = 1_760_000_000.0  # 2025-10-09 UTC
+
+
+def fixture(fid, kickoff, status="NS", goals=None):
+    return {"fixture": {"id": fid, "timestamp": kickoff, "status": {"short": status}},
+            "goals": {"home": goals, "away": goals}}
+
+
+class RecordingFetcher:
+    def __init__(self, responses):
+        self.responses = responses
+        self.calls = []
+
+    def fetch_fixtures(self, league, season, **kwargs):
+        self.calls.append(kwargs)
+        return {"response": self.responses.pop(0), "errors": []}
+
+
+def make_sync(responses, **kwargs):
+    fetcher = RecordingFetcher(responses)
+    return FixtureSync(FixtureStore(":memory:"), lambda: fetcher, **kwargs), fetcher
+
+
+def test_window_sync_fetches_date_range_and_merges_per_fixture():
+    sync, fetcher = make_sync([
+        [fixture(1, NOW + 3600), fixture(2, NOW + 7200)],
+        [fixture(1, NOW + 3600), fixture(2, NOW + 9000), fixture(3, NOW + 86400)],
+    ], interval=900)
+
+    assert sync.sync(39, 2025, NOW) == 2
+    assert fetcher.calls[0] == {"from": "2025-10-08", "to": "2025-10-16"}
+    assert sync.sync(39, 2025, NOW + 60) == 0          # not due: no request
+    assert len(fetcher.calls) == 1
+    assert sync.sync(39, 2025, NOW + 900) == 2         # fixture 2 moved, fixture 3 new
+    assert [f["fixture"]["id"] for f in sync.store.fixtures(39, 2025)] == [1, 2, 3]
+
+
+def test_live_sync_only_while_matches_are_in_play():
+    sync, fetcher = make_sync([
+        [fixture(1, NOW - 600, "1H", 0), fixture(2, NOW + 86400)],
+        [fixture(1, NOW - 600, "1H", 1)],
+    ], interval=900, live_interval=60)
+    sync.sync(39, 2025, NOW)
+
+    assert sync.sync(39, 2025, NOW + 60) == 1
+    assert fetcher.calls[1] == {"live": "all"}
+    assert sync.store.fixtures(39, 2025)[0]["goals"]["home"] == 1
+
+
+def test_no_live_sync_without_live_fixtures():
+    sync, fetcher = make_sync([[fixture(1, NOW + 86400)]], interval=900, live_interval=60)
+    sync.sync(39, 2025, NOW)
+    assert sync.sync(39, 2025, NOW + 120) == 0
+    assert len(fetcher.calls) == 1
+
+
+def test_get_fixtures_serves_every_stored_fixture(monkeypatch):
+    import app as predictor_app
+
+    now = time.time()
+    sync, _ = make_sync([[fixture(i, now + 3600 * i) for i in range(1, 16)]])
+    sync.sync(39, 2025, now)
+    monkeypatch.setattr(predictor_app, "fixture_store", sync.store)
+    monkeypatch.setattr(predictor_app, "fixture_sync", sync)
+    monkeypatch.setattr(predictor_app, "FIXTURE_SYNC", True)
+
+    data = predictor_app.get_fixtures(39, 2025)
+    assert len(data["response"]) == 15
+    # Only predictions are capped
+    assert len(predictor_app.prediction_fixtures(data)) == predictor_app.PREDICT_MAX_FIXTURES
+
+
+def test_prediction_fixtures_come_from_the_indexed_query(monkeypatch):
+    import app as predictor_app
+
+    now = time.time()
+    sync, _ = make_sync([[fixture(i, now + 3600 * i) for i in range(1, 16)]])
+    sync.sync(39, 2025, now)
+    monkeypatch.setattr(predictor_app, "fixture_store", sync.store)
+    monkeypatch.setattr(predictor_app, "fixture_sync", sync)
+    monkeypatch.setattr(predictor_app, "FIXTURE_SYNC", True)
+    monkeypatch.setattr(sync.store, "fixtures", lambda *args: pytest.fail("read the whole season"))
+
+    data = predictor_app.get_fixtures(39, 2025, upcoming=True)
+    ids = [f["fixture"]["id"] for f in data["response"]]
+    assert ids == list(range(1, predictor_app.PREDICT_MAX_FIXTURES + 1))
+    assert predictor_app.prediction_fixtures(data) == data["response"]
+
+
+def test_due_sync_runs_in_background_and_age_is_reported(monkeypatch):
+    import app as predictor_app
+
+    release = threading.Event()
+
+    class BlockingFetcher(RecordingFetcher):
+        def fetch_fixtures(self, league, season, **kwargs):
+            release.wait(5)
+            return super().fetch_fixtures(league, season, **kwargs)
+
+    now = time.time()
+    fetcher = BlockingFetcher([[fixture(2, now + 7200)]])
+    sync = FixtureSync(FixtureStore(":memory:"), lambda: fetcher, interval=900)
+    sync.store.upsert_fixtures(39, 2025, [fixture(1, now + 3600)])
+    sync.store.mark_synced(39, 2025, "window", now - 1000)
+    monkeypatch.setattr(predictor_app, "fixture_store", sync.store)
+    monkeypatch.setattr(predictor_app, "fixture_sync", sync)
+    monkeypatch.setattr(predictor_app, "FIXTURE_SYNC", True)
+    client = predictor_app.app.test_client()
+    today = datetime.fromtimestamp(now, tz=timezone.utc).date()
+    url = f"/api/fixtures?from={today}&to={today + timedelta(days=2)}"
+
+    response = client.get(url)
+    # Served from the store while the due sync is still waiting on RapidAPI
+    assert [f["fixture"]["id"] for f in response.get_json()["response"]] == [1]
+    assert int(response.headers["X-Data-Age"]) >= 1000 and response.headers["X-Data-Stale"] == "1"
+    assert not sync.sync_in_background(39, 2025)       # single-flighted
+
+    release.set()
+    for _ in range(100):
+        if not sync.flight.is_running("39:2025"):
+            break
+        time.sleep(0.01)
+    response = client.get(url)
+    assert [f["fixture"]["id"] for f in response.get_json()["response"]] == [1, 2]
+    assert int(response.headers["X-Data-Age"]) < 60 and response.headers["X-Data-Stale"] == "0"
+    assert len(fetcher.calls) == 1
@@ -0,0 +1,121 @@
+import os
+import sys
+import math
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, APP_DIR)
+
+import app as predictor_app
+from goal_model import GoalModel, goal_line
+
+
+def result(fid, home, away, hg, ag, status="FT"):
+    return {"fixture": {"id": fid, "date": "2025-08-16T14:00:00+00:00", "status": {"short": status}},
+            "teams": {"home": {"id": home, "name": f"Team {home}"}, "away": {"id": away, "name": f"Team {away}"}},
+            "goals": {"home": hg, "away": ag}}
+
+
+def season():
+    # Team 1 scores freely, team 4 concedes freely, teams 2/3 are tight
+    scores = {(1, 2): (3, 1), (1, 3): (4, 2), (1, 4): (5, 2), (2, 1): (1, 3), (2, 3): (0, 0), (2, 4): (2, 2),
+              (3, 1): (2, 3), (3, 2): (0, 1), (3, 4): (2, 1), (4, 1): (2, 4), (4, 2): (1, 2), (4, 3): (1, 3)}
+    return [result(i, h, a, *g) for i, ((h, a), g) in enumerate(scores.items(), 1)]
+
+
+def test_probabilities_are_consistent_and_follow_team_rates():
+    model = GoalModel().fit(season())
+    p = model.probabilities([1, 2, 99], [4, 3, 98], line=2.5)
+    for i in range(3):
+        assert math.isclose(p["home"][i] + p["draw"][i] + p["away"][i], 1.0)
+        assert 0 < p["btts"][i] < 1
+    # Attacking fixture above the tight one; unknown teams at the league average
+    assert p["over"][0] > p["over"][2] > p["over"][1]
+    assert p["xg_home"][0] > p["xg_away"][0]
+    assert math.isclose(p["xg_home"][2], model.mu[0]) and math.isclose(p["xg_away"][2], model.mu[1])
+
+
+def test_unfinished_fixtures_are_ignored_and_sources_fill_gaps():
+    upcoming = result(100, 1, 2, None, None, status="NS")
+    standings = [{"league": {"standings": [[{"team": {"id": 7}, "home": {"played": 5, "goals": {"for": 15, "against": 2}},
+                                             "away": {"played": 5, "goals": {"for": 10, "against": 4}}}]]}}]
+    model = GoalModel().fit(season() + [upcoming], standings=standings)
+    assert model.games == 17
+    xg_home, _ = model.expected_goals([7], [99])
+    assert xg_home[0] > model.mu[0]
+
+
+def test_predict_returns_model_output_shape():
+    fixtures = [{"id": 1, "home": "Team 1", "away": "Team 4", "home_id": 1, "away_id": 4}]
+    match = GoalModel().fit(season()).predict(fixtures, "under 3.5")[1]
+    assert goal_line("under 3.5") == 3.5
+    assert match["prediction"] in ("OVER", "UNDER") and 50 <= match["probability"] <= 100
+    assert set(match["baseline"]) == {"p_over_3.5", "p_btts", "p_1x2", "xg"}
+
+
+def test_predict_endpoint_stats_mode_skips_the_model(monkeypatch):
+    class NoModel:
+        def generate_content(self, *args, **kwargs):
+            raise AssertionError("stats mode must not call the model")
+
+    fixtures = {"response": season() + [result(100, 1, 4, None, None, status="NS")]}
+    monkeypatch.setattr(predictor_app, "DEMO_MODE", False)
+    monkeypatch.setattr(predictor_app, "model", NoModel())
+    monkeypatch.setattr(predictor_app, "get_fixtures", lambda league, season, upcoming=False: fixtures)
+    monkeypatch.setattr(predictor_app, "save_predictions", lambda *args: None)
+
+    client = predictor_app.app.test_client()
+    body = client.post("/api/predict", json={"league": 39, "mode": "stats"}).get_json()
+    assert body["mode"] == "stats"
+    assert [m["fixture_id"] for m in body["matches"]] == [100]
+    assert body["matches"][0]["model"] == "poisson"
+    assert client.post("/api/predict", json={"mode": "oracle"}).status_code == 400
+
+
+def test_model_failure_falls_back_to_poisson(monkeypatch):
+    class DownModel:
+        def generate_content(self, *args, **kwargs):
+            raise RuntimeError("503 model overloaded")
+
+    fixtures = {"response": season() + [result(100, 1, 4, None, None, status="NS")]}
+    monkeypatch.setattr(predictor_app, "model", DownModel())
+    monkeypatch.setattr(predictor_app, "response_cache", predictor_app.TieredCache([predictor_app.MemoryTier()]))
+    monkeypatch.setattr(predictor_app, "gather_additional_context", lambda *args, **kwargs: ({}, {}, []))
+
+    out = predictor_app.ai_predict(fixtures, "over 2.5", mode="prior")
+    assert out["error"] and out["fallback"] == 1
+    assert out["matches"][0]["model"] == "poisson"
+
+
+def test_stats_mode_fetches_standings_on_a_cold_process(monkeypatch):
+    class Fetcher:
+        def __init__(self, rows):
+            self.rows = rows
+            self.calls = []
+
+        def fetch_standings(self, league, season):
+            self.calls.append("standings")
+            return {"response": [{"league": {"standings": [self.rows]}}] if self.rows else []}
+
+        def fetch_team_stats(self, team, season):
+            self.calls.append(f"stats:{team}")
+            return {"response": {}}
+
+    split = {"played": 5, "goals": {"for": 10, "against": 5}}
+    fetcher = Fetcher([{"team": {"id": 1}, "home": split, "away": split},
+                       {"team": {"id": 4}, "home": split, "away": split}])
+    fixtures = {"response": [result(100, 1, 4, None, None, status="NS"), result(101, 1, 9, None, None, status="NS")]}
+    monkeypatch.setattr(predictor_app, "fixture_store", predictor_app.FixtureStore(":memory:"))
+    monkeypatch.setattr(predictor_app, "make_fetcher", lambda api_key=None: fetcher)
+
+    out = predictor_app.stats_predict(fixtures, league=39, season=2025)
+    assert "standings" in fetcher.calls and "error" not in out
+    assert [m["fixture_id"] for m in out["matches"]] == [100, 101]
+    assert out["unrated_teams"] == [9]
+    # Fetched standings are kept in the store for the next request
+    assert predictor_app.fixture_store.standings(39, 2025)
+
+    # Nothing anywhere: an error, not league-average constants
+    fetcher.rows = []
+    monkeypatch.setattr(predictor_app, "fixture_store", predictor_app.FixtureStore(":memory:"))
+    out = predictor_app.stats_predict(fixtures, league=39, season=2025)
+    assert out["matches"] == [] and out["error"]
@@ -0,0 +1,53 @@
+import os
+import sys
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, APP_DIR)
+
+import http_pool
+from main import EFootballFetcher
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class FakeSession:
+    def __init__(self):
+        self.calls = []
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        self.calls.append((url, params, timeout))
+        return FakeResponse({"response": []})
+
+
+def test_fetcher_uses_injected_session_and_endpoint_timeouts():
+    session = FakeSession()
+    fetcher = EFootballFetcher("key", session=session, base_url="http://upstream")
+    fetcher.fetch_standings(league=39, season=2025)
+    fetcher.fetch_team_stats(team=50, season=2025)
+
+    assert session.calls[0][0] == "http://upstream/standings"
+    assert session.calls[0][2] == http_pool.timeout_for("standings")
+    assert session.calls[1][0] == "http://upstream/teams/statistics"
+    assert session.calls[1][1] == {"team": 50, "season": 2025}
+
+
+def test_shared_session_is_process_wide(monkeypatch):
+    http_pool.reset_session()
+    try:
+        assert EFootballFetcher("a").session is EFootballFetcher("b").session
+    finally:
+        http_pool.reset_session()
+
+
+def test_timeout_env_override(monkeypatch):
+    monkeypatch.setenv("HTTP_TIMEOUT_TEAMS_STATISTICS", "7")
+    assert http_pool.timeout_for("teams/statistics") == (http_pool.CONNECT_TIMEOUT, 7.0)
@@ -0,0 +1,124 @@
+import os
+import sys
+import time
+
+import pytest
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, APP_DIR)
+
+from key_pool import KeyPool, KeyPoolExhausted
+from main import EFootballFetcher
+
+
+class Resp:
+    def __init__(self, status_code=200, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+    def json(self):
+        return {"response": [], "errors": []}
+
+
+class KeyedSession:
+    """Returns 429 for the keys in `limited`, 200 otherwise."""
+
+    def __init__(self, limited=()):
+        self.limited = set(limited)
+        self.keys_used = []
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        key = headers["X-RapidAPI-Key"]
+        self.keys_used.append(key)
+        if key in self.limited:
+            return Resp(429, {"Retry-After": "120"})
+        return Resp()
+
+
+class BrokenRedis:
+    def eval(self, *args):
+        raise ConnectionError("redis down")
+
+    def hset(self, *args):
+        raise ConnectionError("redis down")
+
+
+def test_least_loaded_key_spreads_requests():
+    pool = KeyPool(["a", "b"], per_minute=10, per_day=100)
+    used = [pool.acquire(wait=0) for _ in range(6)]
+    assert used.count("a") == 3 and used.count("b") == 3
+
+
+def test_minute_bucket_exhaustion_raises():
+    pool = KeyPool(["a"], per_minute=2, per_day=100)
+    pool.acquire(wait=0)
+    pool.acquire(wait=0)
+    with pytest.raises(KeyPoolExhausted):
+        pool.acquire(wait=0)
+
+
+def test_day_bucket_limits_independently_of_minute():
+    pool = KeyPool(["a", "b"], per_minute=100, per_day=1)
+    assert {pool.acquire(wait=0), pool.acquire(wait=0)} == {"a", "b"}
+    with pytest.raises(KeyPoolExhausted):
+        pool.acquire(wait=0)
+
+
+def test_cooldown_takes_key_out_of_rotation():
+    pool = KeyPool(["a", "b"], per_minute=10, per_day=100)
+    pool.cooldown("a", 60)
+    assert all(pool.acquire(wait=0) == "b" for _ in range(3))
+
+
+def test_falls_back_to_memory_when_redis_fails():
+    pool = KeyPool(["a"], per_minute=10, per_day=100, redis_client=BrokenRedis())
+    assert pool.acquire(wait=0) == "a"
+    pool.cooldown("a", 60)
+    with pytest.raises(KeyPoolExhausted):
+        pool.acquire(wait=0)
+
+
+def test_fetcher_cools_down_rate_limited_key_and_retries():
+    pool = KeyPool(["a", "b"], per_minute=10, per_day=100)
+    session = KeyedSession(limited={"a"})
+    fetcher = EFootballFetcher(session=session, base_url="http://test", key_pool=pool)
+    for _ in range(3):
+        fetcher.fetch_standings(39, 2025)
+    assert session.keys_used.count("a") == 1
+    assert session.keys_used[-1] == "b"
+    assert [s["cooling_down"] for s in pool.status()] == [True, False]
+
+
+def test_fetcher_raises_when_every_key_is_rate_limited():
+    pool = KeyPool(["a", "b"], per_minute=10, per_day=100)
+    fetcher = EFootballFetcher(session=KeyedSession(limited={"a", "b"}), base_url="http://test", key_pool=pool)
+    with pytest.raises(KeyPoolExhausted):
+        fetcher.fetch_standings(39, 2025)
+
+
+class HashRedis:
+    """Just the hash reads the pool's status/headroom use."""
+
+    def __init__(self, hashes):
+        self.hashes = hashes
+
+    def hmget(self, name, *fields):
+        return [self.hashes.get(name, {}).get(f) for f in fields]
+
+
+def test_status_reports_shared_redis_buckets():
+    pool = KeyPool(["a", "b"], per_minute=10, per_day=100)
+    names = pool._redis_keys()
+    pool.redis = HashRedis({names[0]: {"mt": "0", "dt": "5", "ts": str(time.time()), "cool": str(time.time() + 60)}})
+    status = pool.status()
+    assert status[0]["day_tokens"] < 6 and status[0]["cooling_down"]
+    # A key never used through Redis has its full buckets
+    assert status[1]["day_tokens"] == 100 and not status[1]["cooling_down"]
+    assert pool.headroom() < 0.6
+
+    pool.redis = BrokenRedis()
+    assert pool.status()[0]["day_tokens"] == 100
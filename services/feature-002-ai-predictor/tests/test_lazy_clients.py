@@ -0,0 +1,140 @@
+import os
+import sys
+import time
+import subprocess
+import threading
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, APP_DIR)
+
+import app as predictor_app
+from clients import LazyClient
+
+
+def test_client_is_built_once_on_first_use_across_threads():
+    calls = []
+
+    def factory():
+        calls.append(1)
+        time.sleep(0.05)
+        return {"built": True}
+
+    client = LazyClient(factory, "test")
+    assert not client.initialized and client.state()["state"] == "pending"
+
+    threads = [threading.Thread(target=client.resolve) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert client.keys() == {"built": True}.keys()
+    assert client.state()["state"] == "ok"
+
+
+def test_failed_factory_leaves_client_unavailable_until_reset():
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError("unreachable")
+        return object()
+
+    client = LazyClient(factory, "flaky", required=True)
+    assert not client
+    assert client.state() == {"state": "failed", "required": True, "init_ms": client.state()["init_ms"],
+                              "error": "unreachable"}
+    client.reset()
+    assert client and len(attempts) == 2
+
+
+def test_import_builds_no_clients():
+    out = subprocess.run([sys.executable, "-c", "import app; print(any(c.initialized for c in app.CLIENTS.values()))"],
+                         cwd=APP_DIR, capture_output=True, text=True, timeout=30)
+    assert out.stdout.strip() == "False"
+
+
+def test_import_does_not_load_numpy():
+    out = subprocess.run([sys.executable, "-c", "import sys, app; print('numpy' in sys.modules)"],
+                         cwd=APP_DIR, capture_output=True, text=True, timeout=30)
+    assert out.stdout.strip() == "False"
+
+
+def test_ready_builds_clients(monkeypatch):
+    client = predictor_app.create_app().test_client()
+    health = client.get("/api/health").get_json()
+    assert health["status"] == "healthy" and "clients" in health
+
+    monkeypatch.setitem(predictor_app.CLIENTS, "gemini", LazyClient(lambda: None, "gemini", required=True))
+    assert client.get("/api/ready").status_code == 503
+    monkeypatch.setitem(predictor_app.CLIENTS, "gemini", LazyClient(object, "gemini", required=True))
+    body = client.get("/api/ready").get_json()
+    assert body["ready"] and body["clients"]["key_pool"]["state"] == "ok"
+
+
+def test_failed_factory_is_retried_after_the_backoff():
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError("redis restarting")
+        return {"built": True}
+
+    client = LazyClient(factory, "redis", retry_after=0.05)
+    assert not client and not client
+    assert len(attempts) == 1               # no retry within the backoff
+    time.sleep(0.06)
+    assert client and client.state()["state"] == "ok" and len(attempts) == 2
+    # A factory returning None (not configured) is not retried
+    unconfigured = LazyClient(lambda: attempts.append(1), "supabase", retry_after=0)
+    assert not unconfigured and not unconfigured and len(attempts) == 3
+
+
+def test_create_app_starts_one_prefetcher(monkeypatch):
+    started = []
+
+    class Prefetcher:
+        def start(self):
+            started.append(1)
+
+    monkeypatch.setattr(predictor_app, "PREFETCH_ENABLED", True)
+    monkeypatch.setattr(predictor_app, "_prefetcher_started", False)
+    monkeypatch.setattr(predictor_app, "make_prefetcher", Prefetcher)
+    predictor_app.create_app()
+    predictor_app.create_app()
+    assert started == [1]
+
+
+def test_cache_tiers_and_key_pool_pick_up_a_client_built_after_a_failure(monkeypatch):
+    class DictRedis:
+        def __init__(self):
+            self.data = {}
+
+        def get(self, key):
+            return self.data.get(key)
+
+        def setex(self, key, ttl, value):
+            self.data[key] = value
+
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError("redis restarting")
+        return DictRedis()
+
+    redis = LazyClient(factory, "redis", retry_after=0.05)
+    assert not redis                        # down when the cache and key pool are built
+    monkeypatch.setattr(predictor_app, "r", redis)
+    monkeypatch.setattr(predictor_app, "REDIS_AVAILABLE", True)
+    monkeypatch.setattr(predictor_app, "SUPABASE_AVAILABLE", False)
+    cache = predictor_app._response_cache()
+    pool = predictor_app.key_pool._factory()
+    assert pool.redis is redis
+
+    time.sleep(0.06)
+    cache.set("k", {"response": [1], "errors": []}, 60)
+    assert "k" in redis.resolve().data and len(attempts) == 2
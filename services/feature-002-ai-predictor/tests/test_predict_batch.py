@@ -0,0 +1,110 @@
+import os
+import sys
+import json
+import time
+import threading
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, APP_DIR)
+
+import app as predictor_app
+
+
+def make_fixture(fid, home, away):
+    return {"fixture": {"id": fid, "date": "2099-08-16T14:00:00+00:00", "status": {"short": "NS"}},
+            "teams": {"home": {"id": fid * 10, "name": home}, "away": {"id": fid * 10 + 1, "name": away}}}
+
+
+LEAGUE_FIXTURES = {
+    39: [make_fixture(1, "Arsenal", "Chelsea")],
+    140: [make_fixture(2, "Sevilla", "Betis")],
+    135: [make_fixture(3, "Roma", "Lazio")],
+    78: [],
+}
+
+
+class EchoModel:
+    """Predicts OVER for every fixture named in the prompt."""
+
+    def __init__(self):
+        self.prompts = []
+        self.lock = threading.Lock()
+
+    def generate_content(self, prompt, **kwargs):
+        with self.lock:
+            self.prompts.append(prompt)
+        matches = [{"home": f["teams"]["home"]["name"], "away": f["teams"]["away"]["name"],
+                    "prediction": "OVER", "probability": 60}
+                   for fixtures in LEAGUE_FIXTURES.values() for f in fixtures
+                   if f["teams"]["home"]["name"] in prompt]
+
+        class Resp:
+            text = json.dumps({"matches": matches})
+
+        return Resp()
+
+
+def setup_app(monkeypatch, delay=0.2):
+    model = EchoModel()
+
+    def slow_fixtures(league, season, upcoming=False):
+        time.sleep(delay)
+        return {"response": LEAGUE_FIXTURES[league], "errors": []}
+
+    def slow_context(fixtures, league=39, season=2025):
+        time.sleep(delay)
+        return {}, {}, []
+
+    monkeypatch.setattr(predictor_app, "model", model)
+    monkeypatch.setattr(predictor_app, "get_fixtures", slow_fixtures)
+    monkeypatch.setattr(predictor_app, "gather_additional_context", slow_context)
+    monkeypatch.setattr(predictor_app, "response_cache", predictor_app.TieredCache([predictor_app.MemoryTier()]))
+    return model
+
+
+def test_batch_runs_leagues_in_parallel_and_merges_model_calls(monkeypatch):
+    model = setup_app(monkeypatch)
+    client = predictor_app.app.test_client()
+
+    start = time.monotonic()
+    body = client.post("/api/predict/batch", json={"requests": [
+        {"league": 39}, {"league": 140}, {"league": 135}, {"league": 78}]}).get_json()
+    elapsed = time.monotonic() - start
+
+    # 4 leagues x (fixtures + context) sequentially would take 1.6s
+    assert elapsed < 1.0
+    assert body["model_calls"] == 1 and len(model.prompts) == 1
+    statuses = {r["league"]: r["status"] for r in body["leagues"]}
+    assert statuses == {39: "ok", 140: "ok", 135: "ok", 78: "error"}
+    by_league = {r["league"]: [m["fixture_id"] for m in r["matches"]] for r in body["leagues"]}
+    assert by_league[39] == [1] and by_league[140] == [2] and by_league[135] == [3]
+
+
+def test_batch_splits_model_calls_over_the_token_budget(monkeypatch):
+    model = setup_app(monkeypatch, delay=0)
+    monkeypatch.setattr(predictor_app.prompt_engine, "budget", 1)
+    result = predictor_app.batch_predict([{"league": l, "season": 2025, "query": "over 2.5", "mode": "llm"}
+                                          for l in (39, 140)])
+    assert result["model_calls"] == 2 and len(model.prompts) == 2
+    assert [r["status"] for r in result["leagues"]] == ["ok", "ok"]
+
+
+def test_batch_validates_requests():
+    client = predictor_app.app.test_client()
+    assert client.post("/api/predict/batch", json={"requests": [{"season": 2025}]}).status_code == 400
+    assert client.post("/api/predict/batch", json={"requests": [{"league": 39, "mode": "x"}]}).status_code == 400
+
+
+def test_batch_predicts_repeated_items_once_and_packs_without_rendering(monkeypatch):
+    model = setup_app(monkeypatch, delay=0)
+    renders = []
+    render = predictor_app.prompt_engine.render
+    monkeypatch.setattr(predictor_app.prompt_engine, "render", lambda *args: renders.append(1) or render(*args))
+    items = [{"league": l, "season": 2025, "query": "over 2.5", "mode": "llm"} for l in (39, 140, 39, 135, 39)]
+    result = predictor_app.batch_predict(items)
+
+    assert result["model_calls"] == 1 and len(model.prompts) == 1 and len(renders) == 1
+    # Each fixture appears in the prompt once
+    assert model.prompts[0].count("Arsenal") == 1
+    assert [r["league"] for r in result["leagues"]] == [39, 140, 39, 135, 39]
+    assert all(r["status"] == "ok" and len(r["matches"]) == 1 for r in result["leagues"])
@@ -0,0 +1,113 @@
+import os
+import sys
+import json
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, APP_DIR)
+
+import app as predictor_app
+from model_output import MatchStreamParser, parse_matches
+from circuit import reset_breakers
+
+
+MODEL_TEXT = ('Sure! ```json\n{"matches": [\n'
+              '{"home": "Arsenal", "away": "Chelsea", "prediction": "OVER", "probability": 61},\n'
+              '{"home": "Everton", "away": "Fulham", "prediction": "UNDER", "probability": 55}\n]}\n```')
+
+
+class Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class StreamingModel:
+    def generate_content(self, prompt, stream=False, **kwargs):
+        assert stream
+        return [Chunk(MODEL_TEXT[i:i + 17]) for i in range(0, len(MODEL_TEXT), 17)]
+
+
+def fixture(fid, home, away):
+    return {"fixture": {"id": fid, "date": "2025-08-16T14:00:00+00:00", "status": {"short": "NS"}},
+            "teams": {"home": {"id": fid * 10, "name": home}, "away": {"id": fid * 10 + 1, "name": away}}}
+
+
+def parse_sse(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_parser_emits_each_match_once_complete():
+    parser = MatchStreamParser()
+    seen = []
+    for i in range(0, len(MODEL_TEXT), 5):
+        seen.extend(m["home"] for m in parser.feed(MODEL_TEXT[i:i + 5]))
+    assert seen == ["Arsenal", "Everton"]
+    assert parser.done
+
+
+def test_predict_stream_sends_progress_and_match_events(monkeypatch):
+    fixtures = {"response": [fixture(1, "Arsenal", "Chelsea"), fixture(2, "Everton", "Fulham")]}
+    monkeypatch.setattr(predictor_app, "DEMO_MODE", False)
+    monkeypatch.setattr(predictor_app, "model", StreamingModel())
+    monkeypatch.setattr(predictor_app, "get_fixtures", lambda league, season, upcoming=False: fixtures)
+    monkeypatch.setattr(predictor_app, "response_cache", predictor_app.TieredCache([predictor_app.MemoryTier()]))
+
+    client = predictor_app.app.test_client()
+    response = client.post("/api/predict/stream", json={"league": 39, "season": 2025})
+    assert response.mimetype == "text/event-stream"
+    events = parse_sse(response.get_data(as_text=True))
+
+    stages = [data["stage"] for name, data in events if name == "progress"]
+    assert stages == ["fixtures", "context", "cache", "model"]
+    matches = [data for name, data in events if name == "match"]
+    assert [(m["fixture_id"], m["prediction"]) for m in matches] == [(1, "OVER"), (2, "UNDER")]
+    assert events[-1] == ("done", {"cached": 0, "computed": 2, "prompt_version": predictor_app.PROMPT_VERSION})
+
+    # Second request is served entirely from the per-fixture cache
+    events = parse_sse(client.get("/api/predict/stream?league=39&season=2025").get_data(as_text=True))
+    assert [name for name, _ in events].count("match") == 2
+    assert events[-1][1]["cached"] == 2
+
+
+def test_parser_keeps_matches_before_a_truncated_tail():
+    text = ('Analysis below.\n{"matches": [{"home": "A", "away": "B", "reasoning": "brace } in \\"text\\"",},'
+            '{"home": "C", "away": "D", "prediction": "UNDER"}, {"home": "E", "away": "F", "predic')
+    parser = MatchStreamParser()
+    matches = parser.feed(text) + parser.finish()
+    assert [m["home"] for m in matches] == ["A", "C"]
+    assert matches[0]["reasoning"] == 'brace } in "text"'
+    assert not parser.done
+
+
+def test_parser_skips_broken_object_and_accepts_bare_array():
+    assert [m["home"] for m in parse_matches('[{"home": "A"}, {"home": B}, {"home": "C"}] trailing prose')] == ["A", "C"]
+    assert parse_matches("no json here") == []
+
+
+def test_truncated_model_output_only_placeholders_missing_fixtures(monkeypatch):
+    class TruncatingModel:
+        def generate_content(self, prompt, **kwargs):
+            return Chunk(MODEL_TEXT[:MODEL_TEXT.index('"UNDER"')])
+
+    monkeypatch.setattr(predictor_app, "model", TruncatingModel())
+    monkeypatch.setattr(predictor_app, "response_cache", predictor_app.TieredCache([predictor_app.MemoryTier()]))
+    result = predictor_app.ai_predict({"response": [fixture(1, "Arsenal", "Chelsea"), fixture(2, "Everton", "Fulham")]})
+
+    assert [m["prediction"] for m in result["matches"]] == ["OVER", "ANALYZING"]
+
+
+def test_model_calls_match_the_pinned_sdk_signature(monkeypatch):
+    # The repo-root stub mirrors the SDK's signature and rejects unknown kwargs
+    import asyncio
+    import google.generativeai as genai
+    reset_breakers()
+    monkeypatch.setattr(predictor_app, "model", genai.GenerativeModel(predictor_app.MODEL_NAME))
+    summary = predictor_app.summarize_fixtures([fixture(1, "Arsenal", "Chelsea")])
+    prompt = predictor_app.build_prompt(summary, {}, {}, [], "over 2.5")
+
+    assert predictor_app._generate(summary, prompt.text)[1] is None
+    list(predictor_app.stream_predictions(summary, prompt))
+    assert asyncio.run(predictor_app.agenerate_predictions(summary, {}, {}, [], "over 2.5"))[1] is None
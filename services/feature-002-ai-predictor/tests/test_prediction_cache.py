@@ -0,0 +1,79 @@
+import os
+import sys
+import json
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, APP_DIR)
+
+import app as predictor_app
+from predictions import assign_matches, fixture_prediction_key
+
+
+def make_fixture(fid, home, away, status="NS"):
+    return {"fixture": {"id": fid, "date": "2025-08-16T14:00:00+00:00", "status": {"short": status}},
+            "teams": {"home": {"id": fid * 10, "name": home}, "away": {"id": fid * 10 + 1, "name": away}}}
+
+
+class CountingModel:
+    """Answers for every fixture it knows; ai_predict keeps only the ones it asked for."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate_content(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+
+        class Resp:
+            text = "Here you go:\n" + json.dumps({"matches": [
+                {"home": "Arsenal", "away": "Chelsea", "prediction": "OVER", "probability": 61},
+                {"home": "Everton", "away": "Fulham", "prediction": "UNDER", "probability": 55},
+            ]})
+
+        return Resp()
+
+
+def setup_app(monkeypatch):
+    model = CountingModel()
+    monkeypatch.setattr(predictor_app, "model", model)
+    monkeypatch.setattr(predictor_app, "response_cache", predictor_app.TieredCache([predictor_app.MemoryTier()]))
+    return model
+
+
+def test_identical_inputs_reuse_cached_predictions(monkeypatch):
+    model = setup_app(monkeypatch)
+    fixtures = {"response": [make_fixture(1, "Arsenal", "Chelsea"), make_fixture(2, "Everton", "Fulham")]}
+
+    first = predictor_app.ai_predict(fixtures, "over 2.5")
+    second = predictor_app.ai_predict(fixtures, "over 2.5")
+
+    assert first["matches"] == second["matches"]
+    assert [m["fixture_id"] for m in second["matches"]] == [1, 2]
+    assert (second["cached"], second["computed"]) == (2, 0)
+    assert len(model.prompts) == 1
+
+
+def test_only_changed_fixtures_go_back_to_the_model(monkeypatch):
+    model = setup_app(monkeypatch)
+    fixtures = {"response": [make_fixture(1, "Arsenal", "Chelsea"), make_fixture(2, "Everton", "Fulham")]}
+    predictor_app.ai_predict(fixtures, "over 2.5")
+
+    changed = {"response": [make_fixture(1, "Arsenal", "Chelsea"), make_fixture(2, "Everton", "Fulham", "1H")]}
+    result = predictor_app.ai_predict(changed, "over 2.5")
+
+    assert (result["cached"], result["computed"]) == (1, 1)
+    assert len(model.prompts) == 2
+    assert "Everton" in model.prompts[1] and "Arsenal" not in model.prompts[1]
+    assert [m["prediction"] for m in result["matches"]] == ["OVER", "UNDER"]
+
+
+def test_fixture_key_depends_on_prompt_version_and_inputs():
+    inputs = {"fixture": {"id": 1}, "query": "over 2.5"}
+    assert fixture_prediction_key(1, inputs, "v1", "m") != fixture_prediction_key(1, inputs, "v2", "m")
+    assert fixture_prediction_key(1, inputs, "v2", "m") == fixture_prediction_key(1, dict(reversed(list(inputs.items()))), "v2", "m")
+    assert fixture_prediction_key(1, inputs, "v2", "m") != fixture_prediction_key(1, dict(inputs, query="btts"), "v2", "m")
+
+
+def test_assign_matches_falls_back_to_model_order():
+    fixtures = [{"id": 7, "home": "A", "away": "B"}, {"id": 8, "home": "C", "away": "D"}]
+    matches = [{"home": "Gunners", "away": "Blues"}, {"home": "Toffees", "away": "Cottagers"}]
+    assert {k: v["home"] for k, v in assign_matches(fixtures, matches).items()} == {7: "Gunners", 8: "Toffees"}
@@ -0,0 +1,64 @@
+import os
+import sys
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, APP_DIR)
+
+from key_pool import KeyPool
+from prefetch import Prefetcher, next_kickoff
+
+NOW = 1_760_000_000.0
+
+
+def fixture(kickoff, status="NS"):
+    return {"fixture": {"id": int(kickoff), "timestamp": kickoff, "status": {"short": status}}}
+
+
+class HeldLock:
+    def acquire(self, key):
+        return None
+
+
+def test_next_kickoff_ignores_started_and_past_fixtures():
+    fixtures = [fixture(NOW - 60), fixture(NOW + 600, "1H"), fixture(NOW + 7200), fixture(NOW + 3600)]
+    assert next_kickoff(fixtures, NOW) == NOW + 3600
+
+
+def test_schedule_follows_upcoming_kickoff():
+    p = Prefetcher([39], warm=lambda league: [], interval=21600, lead=7200, matchday_interval=900)
+    assert p.schedule(39, [], NOW) == NOW + 21600                       # nothing upcoming
+    assert p.schedule(39, [fixture(NOW + 3 * 3600)], NOW) == NOW + 3600  # lead time before kickoff
+    assert p.schedule(39, [fixture(NOW + 1800)], NOW) == NOW + 900       # matchday: refresh often
+
+
+def test_run_pending_warms_due_leagues_only():
+    warmed = []
+    p = Prefetcher([39, 140], warm=lambda league: warmed.append(league) or [])
+    p.next_due[140] = NOW + 60
+    assert p.run_pending(NOW) == [39]
+    assert warmed == [39]
+    assert p.next_due[39] > NOW
+
+
+def test_pauses_when_quota_is_below_reserve():
+    pool = KeyPool(["a"], per_minute=1000, per_day=10)
+    for _ in range(8):
+        pool.acquire(wait=0)
+    p = Prefetcher([39], warm=lambda league: [], key_pool=pool, reserve=0.3)
+    assert p.run_pending(NOW) == []
+    assert p.next_due[39] == 0.0
+
+
+def test_skips_league_another_worker_is_warming():
+    p = Prefetcher([39], warm=lambda league: [], lock=HeldLock(), matchday_interval=900)
+    assert p.run_pending(NOW) == []
+    assert p.next_due[39] == NOW + 900
+
+
+def test_failed_warm_is_rescheduled():
+    def boom(league):
+        raise RuntimeError("upstream down")
+
+    p = Prefetcher([39], warm=boom, interval=600)
+    assert p.run_pending(NOW) == []
+    assert p.next_due[39] > NOW
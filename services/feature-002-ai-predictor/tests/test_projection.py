@@ -0,0 +1,83 @@
+import os
+import sys
+import json
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, APP_DIR)
+
+from cache import TieredCache, MemoryTier, cache_key
+from main import EFootballFetcher
+from projection import Each, key_players, project, project_payload
+
+
+def player(pid, minutes, injured=False):
+    return {
+        "player": {"id": pid, "name": f"P{pid}", "age": 25, "injured": injured, "birth": {"date": "2000-01-01"},
+                   "height": "180 cm", "photo": "https://x/p.png"},
+        "statistics": [
+            {"team": {"id": 40, "name": "Team", "logo": "l"}, "league": {"id": 39},
+             "games": {"appearences": 10, "lineups": 9, "minutes": minutes, "position": "Attacker", "rating": "7.1"},
+             "shots": {"total": 20, "on": 9}, "passes": {"total": 300, "key": 12, "accuracy": 80},
+             "goals": {"total": 5, "assists": 2, "conceded": 0, "saves": None}, "cards": {"yellow": 1, "red": 0}},
+            {"team": {"id": 99}, "league": {"id": 2}, "games": {"minutes": 90}},
+        ],
+    }
+
+
+class PayloadSession:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        payload = self.payload
+
+        class Resp:
+            status_code = 200
+
+            def raise_for_status(self):
+                pass
+
+            def json(self):
+                return payload
+
+        return Resp()
+
+
+def test_schema_forms():
+    data = {"a": 1, "b": {"c": 2, "d": 3}, "e": [{"f": 1, "g": 2}, {"f": 3, "g": 4}], "h": 5}
+    schema = {"a": True, "b": ("c",), "e": Each(("f",), limit=1), "missing": True}
+    assert project(data, schema) == {"a": 1, "b": {"c": 2}, "e": [{"f": 1}]}
+
+
+def test_players_payload_keeps_only_prompt_fields():
+    payload = {"errors": [], "paging": {"current": 1, "total": 3}, "response": [player(1, 800)]}
+    projected = project_payload("players", payload)
+    assert projected["paging"] == payload["paging"]
+    (p,) = projected["response"]
+    assert p["player"] == {"id": 1, "name": "P1", "age": 25, "injured": False}
+    assert p["statistics"] == [{"team": {"id": 40, "name": "Team"},
+                                "games": {"appearences": 10, "minutes": 800, "position": "Attacker", "rating": "7.1"},
+                                "goals": {"total": 5, "assists": 2}, "cards": {"yellow": 1, "red": 0}}]
+    assert len(json.dumps(projected)) < len(json.dumps(payload))
+
+
+def test_unknown_endpoints_pass_through():
+    payload = {"response": [{"x": 1}]}
+    assert project_payload("odds", payload) is payload
+
+
+def test_key_players_puts_injured_first_then_minutes():
+    players = [player(1, 100), player(2, 900), player(3, 50, injured=True), player(4, 500)]
+    assert [p["player"]["id"] for p in key_players(players, 3)] == [3, 2, 4]
+
+
+def test_fetcher_caches_projected_payload():
+    cache = TieredCache([MemoryTier()])
+    payload = {"errors": [], "response": [player(1, 800)]}
+    fetcher = EFootballFetcher("key", session=PayloadSession(payload), base_url="http://test", cache=cache)
+
+    result = fetcher.fetch_players(team=40, season=2025)
+
+    cached = cache.get(cache_key("players", {"team": 40, "season": 2025}))
+    assert cached == result
+    assert "shots" not in result["response"][0]["statistics"][0]
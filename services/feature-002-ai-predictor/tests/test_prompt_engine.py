@@ -0,0 +1,71 @@
+import os
+import sys
+import json
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, APP_DIR)
+
+from prompt_engine import PromptEngine, PROMPTS_DIR
+
+
+FIXTURES = [{"id": 1, "home": "Arsenal", "away": "Chelsea", "home_id": 10, "away_id": 11}]
+
+
+def sections(players=10, filler=0):
+    return {
+        "fixtures_json": FIXTURES,
+        "team_stats_json": {10: {"team": {"id": 10}, "form": "WWDLW", "goals": {"for": 30},
+                                 "fixtures": {"played": {"total": 20}}, "biggest": "x" * filler}},
+        "players_status_json": {10: [{"player": {"id": i, "name": f"Player {i}"}} for i in range(players)]},
+        "standings_json": [{"rank": r, "team": {"id": r}, "description": "y" * filler} for r in range(20)],
+    }
+
+
+def test_repo_templates_are_found_and_rendered_compactly(monkeypatch):
+    monkeypatch.setenv("PROMPT_VERSION", "v2")
+    engine = PromptEngine()
+    assert os.path.exists(engine.path_for("v2")), PROMPTS_DIR
+    prompt = engine.render(sections(), "over 2.5")
+    assert prompt.version == "v2"
+    assert "- FIXTURES: " + json.dumps(FIXTURES, separators=(",", ":")) in prompt.text
+    # JSON example braces in the template are left alone
+    assert '"matches": [' in prompt.text
+    assert prompt.stats()["chars"] == len(prompt.text) and prompt.trimmed == []
+
+
+def test_template_is_compiled_once_and_reloaded_when_version_changes(tmp_path, monkeypatch):
+    (tmp_path / "prompt_a_over_under.md").write_text("A {fixtures_json}", encoding="utf-8")
+    (tmp_path / "prompt_b_over_under.md").write_text("B {query}", encoding="utf-8")
+    engine = PromptEngine(prompts_dir=str(tmp_path), default_version="a")
+    monkeypatch.delenv("PROMPT_VERSION", raising=False)
+    first = engine.template()
+    (tmp_path / "prompt_a_over_under.md").write_text("changed", encoding="utf-8")
+    assert engine.template() is first
+
+    monkeypatch.setenv("PROMPT_VERSION", "b")
+    assert engine.render(sections(), "under 1.5").text == "B under 1.5"
+    monkeypatch.setenv("PROMPT_VERSION", "missing")
+    assert engine.render(sections(), "q").text.startswith('Analyze these upcoming football fixtures for "q"')
+
+
+def test_budget_trims_lowest_value_context_first(monkeypatch):
+    monkeypatch.setenv("PROMPT_VERSION", "v2")
+    engine = PromptEngine(budget=10 ** 6)
+    full = engine.render(sections(filler=200), "over 2.5")
+
+    engine.budget = full.tokens - 10
+    assert engine.render(sections(filler=200), "over 2.5").trimmed == ["players:2"]
+
+    engine.budget = engine.render(sections(players=0, filler=200), "").tokens - 50
+    prompt = engine.render(sections(filler=200), "over 2.5")
+    assert prompt.trimmed[:3] == ["players:2", "players", "standings"]
+    assert prompt.tokens <= engine.budget
+    # Fixtures are never trimmed
+    assert json.dumps(FIXTURES, separators=(",", ":")) in prompt.text
+
+
+def test_estimate_matches_an_untrimmed_render(monkeypatch):
+    monkeypatch.setenv("PROMPT_VERSION", "v2")
+    engine = PromptEngine(budget=10 ** 6)
+    sizes = engine.section_sizes(sections(filler=50))
+    assert engine.estimate(sizes, "over 2.5") == engine.render(sections(filler=50), "over 2.5").tokens
@@ -0,0 +1,157 @@
+import os
+import sys
+import time
+
+import pytest
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, APP_DIR)
+
+from cache import CacheEntry, TieredCache, cache_key, start_age_tracking, ttl_for
+from main import EFootballFetcher
+
+
+class DictTier:
+    name = "dict"
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key, (None, None))[0]
+
+    def set(self, key, entry, expire_in):
+        self.data[key] = (entry, expire_in)
+
+
+class CountingSession:
+    def __init__(self, payload):
+        self.payload = payload
+        self.calls = 0
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        self.calls += 1
+        payload = self.payload
+
+        class Resp:
+            def raise_for_status(self):
+                pass
+
+            def json(self):
+                return payload
+
+        return Resp()
+
+
+def test_repeat_fetch_is_served_from_cache_with_kind_ttl():
+    tier = DictTier()
+    session = CountingSession({"response": [{"league": {"id": 39}}], "errors": []})
+    cache = TieredCache([tier])
+    fetcher = EFootballFetcher("key", session=session, cache=cache)
+
+    first = fetcher.fetch_standings(league=39, season=2025)
+    second = fetcher.fetch_standings(season=2025, league=39)
+
+    assert first == second
+    assert session.calls == 1
+    key = cache_key("standings", {"season": 2025, "league": 39})
+    entry, expire_in = tier.data[key]
+    assert entry.value.to_response() == first  # stored in columnar form
+    assert expire_in == cache.lifetime(ttl_for("standings"))
+
+
+def test_error_payloads_are_not_cached():
+    tier = DictTier()
+    session = CountingSession({"response": [], "errors": {"requests": "limit reached"}})
+    fetcher = EFootballFetcher("key", session=session, cache=TieredCache([tier]))
+
+    fetcher.fetch_players(team=33)
+    fetcher.fetch_players(team=33)
+
+    assert session.calls == 2
+    assert tier.data == {}
+
+
+def test_lower_tier_hit_backfills_upper_tier():
+    upper, lower = DictTier(), DictTier()
+    lower.set("k", CacheEntry({"response": [1]}), 60)
+    cache = TieredCache([upper, lower])
+
+    assert cache.get("k", ttl=60) == {"response": [1]}
+    assert upper.get("k").value == {"response": [1]}
+
+
+def test_memory_tier_evicts_least_recently_used_over_byte_budget():
+    from cache import MemoryTier
+
+    tier = MemoryTier(max_bytes=40, max_ttl=60)
+    tier.set("a", CacheEntry({"v": "x" * 10}), 60)
+    tier.set("b", CacheEntry({"v": "y" * 10}), 60)
+    assert tier.get("a") is not None  # touch "a" so "b" is the LRU entry
+    tier.set("c", CacheEntry({"v": "z" * 10}), 60)
+
+    assert tier.get("b") is None
+    assert tier.get("a").value == {"v": "x" * 10}
+    assert tier.size <= 40
+
+
+def test_memory_tier_serves_parsed_object_and_counts_hits_per_tier():
+    from cache import MemoryTier
+
+    memory, shared = MemoryTier(), DictTier()
+    shared.set("k", CacheEntry({"response": [1]}), 60)
+    cache = TieredCache([memory, shared])
+
+    first = cache.get("k", ttl=60)
+    second = cache.get("k", ttl=60)
+
+    assert first is second
+    stats = cache.stats()
+    assert stats["memory"] == {"hits": 1, "misses": 1, "hit_ratio": 0.5}
+    assert stats["dict"]["hits"] == 1
+
+
+def test_stale_entry_is_served_immediately_and_refreshed_in_background():
+    tier = DictTier()
+    tier.set("k", CacheEntry({"v": "old"}, stored_at=time.time() - 120), 3600)
+    cache = TieredCache([tier], stale_while_revalidate=600, max_stale=3600)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return {"v": "new"}
+
+    holder = start_age_tracking()
+    assert cache.get_or_load("k", loader, ttl=60) == {"v": "old"}
+    assert holder["stale"] and holder["age"] >= 120
+
+    for _ in range(100):
+        if tier.get("k").value == {"v": "new"}:
+            break
+        time.sleep(0.01)
+    assert calls == [1]
+    assert cache.get_or_load("k", loader, ttl=60) == {"v": "new"}
+
+
+def test_entry_past_refresh_window_reloads_and_falls_back_to_stale_on_error():
+    tier = DictTier()
+    tier.set("k", CacheEntry({"v": "old"}, stored_at=time.time() - 1000), 3600)
+    cache = TieredCache([tier], stale_while_revalidate=100, max_stale=3600)
+
+    def failing():
+        raise RuntimeError("upstream down")
+
+    assert cache.get_or_load("k", failing, ttl=60) == {"v": "old"}
+    assert cache.get_or_load("k", lambda: {"v": "new"}, ttl=60) == {"v": "new"}
+
+
+def test_data_beyond_max_staleness_is_never_served():
+    tier = DictTier()
+    tier.set("k", CacheEntry({"v": "ancient"}, stored_at=time.time() - 7200), 3600)
+    cache = TieredCache([tier], stale_while_revalidate=100, max_stale=3600)
+
+    def failing():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_load("k", failing, ttl=60)
@@ -0,0 +1,136 @@
+import os
+import sys
+import time
+import itertools
+import threading
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, APP_DIR)
+
+from cache import TieredCache, MemoryTier
+from main import EFootballFetcher
+from singleflight import RedisLock, SingleFlight
+
+
+class SlowSession:
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+
+        class Resp:
+            def raise_for_status(self):
+                pass
+
+            def json(self):
+                return {"response": [{"fixture": {"id": 1}}], "errors": []}
+
+        return Resp()
+
+
+class FakeRedis:
+    """Just enough of redis-py for RedisLock and a shared cache tier."""
+
+    def __init__(self):
+        self.data = {}
+        self._lock = threading.Lock()
+
+    def set(self, name, value, nx=False, px=None):
+        with self._lock:
+            if nx and name in self.data:
+                return None
+            self.data[name] = value
+            return True
+
+    def exists(self, name):
+        return int(name in self.data)
+
+    def eval(self, script, numkeys, name, token):
+        with self._lock:
+            if self.data.get(name) == token:
+                del self.data[name]
+                return 1
+            return 0
+
+
+class SharedTier:
+    name = "shared"
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, entry, expire_in):
+        self.data[key] = entry
+
+
+def run_concurrently(n, fn):
+    barrier = threading.Barrier(n)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(fn())
+
+    threads = [threading.Thread(target=worker) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_concurrent_identical_fetches_make_one_upstream_call():
+    session = SlowSession()
+    fetcher = EFootballFetcher("key", session=session, cache=TieredCache([MemoryTier()]))
+
+    results = run_concurrently(20, lambda: fetcher.fetch_fixtures(39, 2025))
+
+    assert session.calls == 1
+    assert len(results) == 20
+    assert all(r == results[0] for r in results)
+
+
+def test_waiters_share_leader_error():
+    flight = SingleFlight()
+
+    def failing():
+        time.sleep(0.1)
+        raise RuntimeError("boom")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("k", failing)
+        except RuntimeError as e:
+            errors.append(e)
+
+    run_concurrently(5, call)
+    assert len(errors) == 5
+    assert flight.in_flight() == 0
+
+
+def test_redis_lock_coalesces_across_workers():
+    session = SlowSession()
+    redis_client, shared = FakeRedis(), SharedTier()
+    # Two "workers": separate in-process state, shared Redis lock + cache tier
+    workers = [
+        EFootballFetcher("key", session=session,
+                         cache=TieredCache([MemoryTier(), shared], lock=RedisLock(redis_client, poll=0.01)))
+        for _ in range(2)
+    ]
+
+    picks = itertools.count()
+    results = run_concurrently(10, lambda: workers[next(picks) % 2].fetch_standings(39, 2025))
+
+    assert session.calls == 1
+    assert len(results) == 10
+    assert redis_client.data == {}
@@ -0,0 +1,71 @@
+import os
+import sys
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, APP_DIR)
+
+from store import FixtureStore, upcoming_fixtures
+
+NOW = 1_760_000_000.0  # 2025-10-09 08:53 UTC
+
+
+def fixture(fid, kickoff, home, away, status="NS"):
+    return {"fixture": {"id": fid, "timestamp": kickoff, "status": {"short": status}},
+            "teams": {"home": {"id": home, "name": f"Team {home}"}, "away": {"id": away, "name": f"Team {away}"}}}
+
+
+def seeded_store():
+    store = FixtureStore(":memory:")
+    store.upsert_fixtures(39, 2025, [
+        fixture(1, NOW - 86400, 10, 11, "FT"),
+        fixture(2, NOW + 3 * 86400, 12, 10),
+        fixture(3, NOW + 3600, 13, 14),
+        fixture(4, NOW - 1800, 11, 12, "1H"),
+        fixture(5, NOW + 86400, 10, 13, "PST"),
+    ])
+    store.upsert_fixtures(140, 2025, [fixture(6, NOW + 7200, 20, 21)])
+    return store
+
+
+def ids(fixtures):
+    return [f["fixture"]["id"] for f in fixtures]
+
+
+def test_next_fixtures_skips_finished_and_orders_by_kickoff():
+    store = seeded_store()
+    assert ids(store.next_fixtures(39, 2025, limit=10, now=NOW)) == [4, 3, 2]
+    assert ids(store.next_fixtures(39, 2025, limit=2, now=NOW)) == [4, 3]
+
+
+def test_team_fixtures_covers_home_and_away():
+    store = seeded_store()
+    assert ids(store.team_fixtures(10, now=NOW)) == [5, 2]
+    assert ids(store.team_fixtures(10, upcoming=False, now=NOW)) == [1]
+    assert store.team(13) == {"id": 13, "name": "Team 13", "logo": None}
+
+
+def test_todays_fixtures_all_leagues_or_one():
+    store = seeded_store()
+    assert ids(store.todays_fixtures(now=NOW)) == [4, 3, 6]
+    assert ids(store.todays_fixtures(140, now=NOW)) == [6]
+
+
+def test_standings_are_stored_per_team():
+    store = FixtureStore(":memory:")
+    response = [{"league": {"standings": [[{"rank": 2, "points": 10, "team": {"id": 11}},
+                                            {"rank": 1, "points": 12, "team": {"id": 10}}]]}}]
+    assert store.upsert_standings(39, 2025, response) == 2
+    assert [row["team"]["id"] for row in store.standings(39, 2025)] == [10, 11]
+
+
+def test_lookups_use_indexes():
+    store = seeded_store()
+    plan = " ".join(str(row) for row in store.db.execute(
+        "EXPLAIN QUERY PLAN SELECT data FROM fixtures WHERE league = 39 AND season = 2025 AND kickoff >= 0 "
+        "ORDER BY kickoff LIMIT 10"))
+    assert "idx_fixtures_league_kickoff" in plan
+
+
+def test_upcoming_fixtures_on_raw_list():
+    raw = [fixture(1, NOW - 86400, 1, 2, "FT"), fixture(2, NOW + 7200, 3, 4), fixture(3, NOW + 3600, 5, 6)]
+    assert ids(upcoming_fixtures(raw, 10)) == [3, 2]
@@ -0,0 +1,103 @@
+import os
+import sys
+import json
+import time
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, APP_DIR)
+
+import app as predictor_app
+from write_behind import WriteBehind
+
+
+class Sink:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def __call__(self, rows):
+        if self.fail:
+            raise ConnectionError("supabase unreachable")
+        self.batches.append(list(rows))
+
+
+def wait_for(predicate, timeout=2.0):
+    stop = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < stop:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_rows_are_written_in_batches_off_the_caller_thread(tmp_path):
+    sink = Sink()
+    writer = WriteBehind(sink, batch_size=3, interval=10, spill_path=str(tmp_path / "spill.jsonl"))
+    writer.submit([{"n": i} for i in range(7)])
+    # Size-triggered flush without waiting for the interval
+    assert wait_for(lambda: sum(map(len, sink.batches)) >= 6)
+    writer.stop()
+    assert [len(b) for b in sink.batches] == [3, 3, 1]
+    assert writer.status()["written"] == 7
+
+
+def test_failed_writes_spill_and_are_replayed(tmp_path):
+    spill = tmp_path / "spill.jsonl"
+    sink = Sink(fail=True)
+    writer = WriteBehind(sink, batch_size=10, interval=10, spill_path=str(spill), retry_after=0)
+    writer.buffer.extend([{"n": 1}, {"n": 2}])
+    writer.flush()
+    assert [json.loads(line) for line in spill.read_text().splitlines()] == [{"n": 1}, {"n": 2}]
+    assert writer.status()["failures"] == 1
+
+    sink.fail = False
+    writer.buffer.append({"n": 3})
+    assert writer.flush() == 3
+    assert sink.batches == [[{"n": 1}, {"n": 2}], [{"n": 3}]]
+    assert not spill.exists()
+
+
+def test_full_buffer_spills_overflow(tmp_path):
+    spill = tmp_path / "spill.jsonl"
+    writer = WriteBehind(Sink(), batch_size=100, interval=10, max_buffer=2, spill_path=str(spill))
+    writer.submit([{"n": i} for i in range(5)])
+    assert writer.status()["buffered"] == 2
+    assert len(spill.read_text().splitlines()) == 3
+    writer.stop()
+    assert writer.status()["written"] == 5 and not spill.exists()
+
+
+def test_prediction_rows_carry_player_snapshot():
+    players = {10: [{"player": {"name": "Saka"}}], 11: [{"player": {"name": "Palmer"}}]}
+    fixtures = [{"id": 1, "home_id": 10, "away_id": 11}]
+    prediction = {"matches": [
+        {"fixture_id": 1, "home": "Arsenal", "away": "Chelsea", "prediction": "OVER", "probability": 61},
+        {"fixture_id": 2, "home": "A", "away": "B", "prediction": "UNDER", "model": "poisson"},
+    ]}
+    rows = predictor_app.prediction_rows(prediction, 39, 2025, "over 2.5", players, fixtures)
+    assert len(rows) == 1 and rows[0]["fixture_id"] == 1
+    assert json.loads(rows[0]["player_snapshot"]) == {"home_players": ["Saka"], "away_players": ["Palmer"]}
+
+
+def test_unwritable_spill_drops_and_counts_without_raising(tmp_path):
+    writer = WriteBehind(Sink(fail=True), batch_size=100, interval=10, max_buffer=1,
+                         spill_path=str(tmp_path / "missing" / "spill.jsonl"), retry_after=60)
+    writer.submit([{"n": 1}, {"n": 2}, {"n": 3}])
+    writer.stop()
+    status = writer.status()
+    assert status["dropped"] == 3 and status["spill_failures"] == 2 and status["buffered"] == 0
+
+
+def test_only_fresh_predictions_are_persisted(monkeypatch):
+    saved = []
+    monkeypatch.setattr(predictor_app, "save_predictions", lambda prediction, *args: saved.append(prediction))
+    fixtures = [{"id": 1}, {"id": 2}]
+    plan = {"fixture_summary": fixtures, "pending": [fixtures[1]], "league": 39, "season": 2025,
+            "query": "over 2.5", "mode": "llm", "players_status": {},
+            "cached": {1: {"fixture_id": 1, "prediction": "OVER"}}}
+    fresh = {2: {"fixture_id": 2, "prediction": "UNDER"}}
+
+    result = predictor_app.finish_prediction(plan, fresh, None, None, persist=True)
+    assert [m["fixture_id"] for m in result["matches"]] == [1, 2]
+    assert saved == [{"matches": [fresh[2]]}]
+    # All cached: nothing to store
+    predictor_app.finish_prediction(dict(plan, pending=[], cached={**plan["cached"], **fresh}), {}, None, None, True)
+    assert len(saved) == 1
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Write-behind queue for prediction rows.
+
+Requests only append rows to a bounded in-memory buffer; a daemon thread
+writes them in bulk (one insert per batch) when the batch size is reached or
+the flush interval passes. If the sink (Supabase) fails, the batch goes to a
+local JSONL spill file and the sink is left alone for a while; the spill is
+replayed once writes succeed again. Rows that do not fit in a full buffer are
+spilled straight away, so a request never waits on a remote write. Only when
+the spill file cannot be written either are rows dropped (and counted).
+"""
+import os
+import json
+import time
+import atexit
+import logging
+import tempfile
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "100"))
+WRITE_BEHIND_INTERVAL = float(os.getenv("WRITE_BEHIND_INTERVAL", "2"))
+WRITE_BEHIND_MAX_BUFFER = int(os.getenv("WRITE_BEHIND_MAX_BUFFER", "5000"))
+WRITE_BEHIND_SPILL_PATH = os.getenv("WRITE_BEHIND_SPILL_PATH",
+                                    os.path.join(tempfile.gettempdir(), "ai_predictions.spill.jsonl"))
+# Seconds to leave the sink alone after a failed write
+WRITE_BEHIND_RETRY_AFTER = float(os.getenv("WRITE_BEHIND_RETRY_AFTER", "30"))
+
+
+class WriteBehind:
+    """Buffer rows and write them to `sink(rows)` in batches on a background thread."""
+
+    def __init__(self, sink: Callable[[List[Dict[str, Any]]], Any], name: str = "write-behind",
+                 batch_size: int = WRITE_BEHIND_BATCH_SIZE, interval: float = WRITE_BEHIND_INTERVAL,
+                 max_buffer: int = WRITE_BEHIND_MAX_BUFFER, spill_path: Optional[str] = WRITE_BEHIND_SPILL_PATH,
+                 retry_after: float = WRITE_BEHIND_RETRY_AFTER):
+        self.sink = sink
+        self.name = name
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_buffer = max_buffer
+        self.spill_path = spill_path
+        self.retry_after = retry_after
+        self.buffer: deque = deque()
+        self.counts = {"written": 0, "spilled": 0, "replayed": 0, "failures": 0, "spill_failures": 0, "dropped": 0}
+        self._cond = threading.Condition()
+        self._spill_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._down_until = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, rows: List[Dict[str, Any]]) -> None:
+        """Queue rows for writing; never blocks on the sink."""
+        if not rows:
+            return
+        with self._cond:
+            room = max(0, self.max_buffer - len(self.buffer))
+            self.buffer.extend(rows[:room])
+            overflow = rows[room:]
+            if len(self.buffer) >= self.batch_size:
+                self._cond.notify()
+        if overflow:
+            logging.warning(f"{self.name}: buffer full, spilling {len(overflow)} rows")
+            self._spill(overflow)
+        self.start()
+
+    # --- worker ---
+
+    def start(self) -> None:
+        """Start the writer thread (on first submit)."""
+        if self._thread is None or not self._thread.is_alive():
+            with self._cond:
+                if self._thread is None or not self._thread.is_alive():
+                    self._stop.clear()
+                    self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                    self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the writer and flush what is buffered."""
+        with self._cond:
+            self._stop.set()
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            with self._cond:
+                if len(self.buffer) < self.batch_size and not self._stop.is_set():
+                    self._cond.wait(self.interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"{self.name}: flush failed: {e}")
+
+    def flush(self) -> int:
+        """Write everything buffered (and any spill, if the sink is up); returns rows written."""
+        with self._write_lock:
+            written = 0
+            if time.monotonic() >= self._down_until:
+                written += self._replay_spill()
+            while True:
+                with self._cond:
+                    batch = [self.buffer.popleft() for _ in range(min(self.batch_size, len(self.buffer)))]
+                if not batch:
+                    return written
+                if self._write(batch):
+                    written += len(batch)
+                else:
+                    self._spill(batch)
+
+    def _write(self, batch: List[Dict[str, Any]]) -> bool:
+        if time.monotonic() < self._down_until:
+            return False
+        try:
+            self.sink(batch)
+        except Exception as e:
+            self.counts["failures"] += 1
+            self._down_until = time.monotonic() + self.retry_after
+            logging.warning(f"{self.name}: write of {len(batch)} rows failed ({e}); spilling for {self.retry_after}s")
+            return False
+        self.counts["written"] += len(batch)
+        return True
+
+    # --- spill file ---
+
+    def _spill(self, rows: List[Dict[str, Any]]) -> None:
+        """Append rows to the spill file; never raises (rows it cannot keep are dropped and counted)."""
+        if not self.spill_path:
+            logging.error(f"{self.name}: no spill file, dropping {len(rows)} rows")
+            self.counts["dropped"] += len(rows)
+            return
+        try:
+            lines = "".join(json.dumps(row, ensure_ascii=False, default=str) + "\n" for row in rows)
+            with self._spill_lock, open(self.spill_path, "a", encoding="utf-8") as f:
+                f.write(lines)
+        except (OSError, ValueError) as e:
+            self.counts["spill_failures"] += 1
+            self.counts["dropped"] += len(rows)
+            logging.error(f"{self.name}: spill to {self.spill_path} failed ({e}), dropping {len(rows)} rows")
+            return
+        self.counts["spilled"] += len(rows)
+
+    def _replay_spill(self) -> int:
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return 0
+        with self._spill_lock:
+            try:
+                with open(self.spill_path, "r", encoding="utf-8") as f:
+                    lines = f.readlines()
+                os.remove(self.spill_path)
+            except OSError as e:
+                logging.error(f"{self.name}: cannot read spill {self.spill_path}: {e}")
+                return 0
+        rows = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                # A torn line from a crash mid-append
+                self.counts["dropped"] += 1
+        replayed = 0
+        for i in range(0, len(rows), self.batch_size):
+            batch = rows[i:i + self.batch_size]
+            if not self._write(batch):
+                self._spill(rows[i:])
+                break
+            replayed += len(batch)
+        if replayed:
+            self.counts["replayed"] += replayed
+            logging.info(f"{self.name}: replayed {replayed} spilled rows")
+        return replayed
+
+    def status(self) -> Dict[str, Any]:
+        with self._cond:
+            buffered = len(self.buffer)
+        return dict(self.counts, buffered=buffered, sink_down=time.monotonic() < self._down_until)
+
+    def register_atexit(self) -> "WriteBehind":
+        atexit.register(self.stop)
+        return self